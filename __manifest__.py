@@ -20,6 +20,7 @@
     'license': 'LGPL-3',
     'depends': [
         'base',
+        'bus',
         'product',
         'sale',
         'purchase',
@@ -37,6 +38,7 @@
         'views/config_views.xml',
         'views/wizard_views.xml',
         'views/menu_views.xml',
+        'views/benchmark_views.xml',
         'report/migration_report.xml',
     ],
     'demo': [],
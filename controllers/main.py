@@ -2,6 +2,7 @@
 from odoo import http
 from odoo.http import request
 import json
+from ..models import connection_pool
 
 class CsCartMigrationController(http.Controller):
     
@@ -21,21 +22,21 @@ class CsCartMigrationController(http.Controller):
             'products_imported': wizard.products_imported,
             'customers_imported': wizard.customers_imported,
             'suppliers_imported': wizard.suppliers_imported,
+            'images_imported': wizard.images_imported,
+            'inventory_imported': wizard.inventory_imported,
+            'orders_imported': wizard.orders_imported,
+            # Records done, total, records/s and ETA of each entity, updated per batch
+            'entities': wizard._get_entity_progress(),
         }
     
     @http.route('/cs_cart_migration/test_connection', type='json', auth='user')
     def test_connection_api(self, host, port, database, username, password):
         """Test connection via API"""
-        import mysql.connector
         from mysql.connector import Error
         
         try:
-            connection = mysql.connector.connect(
-                host=host,
-                port=int(port),
-                database=database,
-                user=username,
-                password=password,
+            connection = connection_pool.connect_once(
+                host, int(port), database, username, password,
                 connect_timeout=5
             )
             
@@ -84,7 +85,7 @@ class CsCartMigrationController(http.Controller):
             # Write header
             writer.writerow([
                 'Date', 'Migration Type', 'Status', 'Total Records',
-                'Successful', 'Failed', 'Duration (s)', 'Error Message'
+                'Successful', 'Failed', 'Duration (s)', 'Error Message', 'Errors by Class'
             ])
             
             # Write data
@@ -98,6 +99,7 @@ class CsCartMigrationController(http.Controller):
                     log.failed_records,
                     log.duration,
                     log.error_message or '',
+                    log.error_summary or '',
                 ])
             
             content = output.getvalue()
@@ -108,4 +110,57 @@ class CsCartMigrationController(http.Controller):
                 ('Content-Disposition', 'attachment; filename="cs_cart_migration_logs.csv"'),
             ])
         
+        return request.not_found()
+    
+    @http.route('/cs_cart_migration/export_benchmarks', type='http', auth='user')
+    def export_benchmark_results(self, scale=None, format='csv'):
+        """Export benchmark results, one row per run and phase, to compare releases"""
+        domain = [('run_id.state', '=', 'done')]
+        if scale:
+            domain.append(('scale', '=', scale))
+        
+        results = request.env['cs.cart.benchmark.result'].search(domain, order='id')
+        rows = [{
+            'run': result.run_id.name,
+            'date': result.run_id.start_date.strftime('%Y-%m-%d %H:%M:%S'),
+            'module_version': result.module_version or '',
+            'scale': result.scale,
+            'seed': result.run_id.seed,
+            'batch_size': result.run_id.batch_size,
+            'fast_import': result.run_id.fast_import,
+            'phase': result.phase,
+            'records': result.records,
+            'duration': round(result.duration, 3),
+            'rows_per_second': round(result.rows_per_second, 2),
+            'peak_memory_mb': round(result.peak_memory_mb, 1),
+            'sql_count': result.sql_count,
+        } for result in results]
+        
+        if format == 'json':
+            import json
+            return request.make_response(json.dumps(rows, indent=2), [
+                ('Content-Type', 'application/json'),
+                ('Content-Disposition', 'attachment; filename="cs_cart_benchmarks.json"'),
+            ])
+        
+        if format == 'csv':
+            import csv
+            from io import StringIO
+            
+            output = StringIO()
+            writer = csv.DictWriter(output, fieldnames=[
+                'run', 'date', 'module_version', 'scale', 'seed', 'batch_size', 'fast_import',
+                'phase', 'records', 'duration', 'rows_per_second', 'peak_memory_mb', 'sql_count',
+            ])
+            writer.writeheader()
+            writer.writerows(rows)
+            
+            content = output.getvalue()
+            output.close()
+            
+            return request.make_response(content, [
+                ('Content-Type', 'text/csv'),
+                ('Content-Disposition', 'attachment; filename="cs_cart_benchmarks.csv"'),
+            ])
+        
         return request.not_found()
\ No newline at end of file
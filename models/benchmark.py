@@ -0,0 +1,623 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError, UserError
+import logging
+import os
+import random
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Products generated for each benchmark scale
+BENCHMARK_SCALES = {
+    '10k': 10000,
+    '100k': 100000,
+    '1m': 1000000,
+}
+
+# Rows sent per INSERT while generating a dataset
+GENERATE_BATCH_SIZE = 5000
+
+# Only databases holding this table (or no CS-Cart table) are ever
+# (re)generated, so a benchmark never overwrites a real CS-Cart store
+BENCHMARK_MARKER_TABLE = 'cscart_benchmark_dataset'
+
+# Distinct image files written per image folder of the dataset
+IMAGE_POOL_SIZE = 16
+
+# Schema of the synthetic store: the columns read by the 4.0, 4.10 and
+# Multi-Vendor queries of the migrations
+BENCHMARK_SCHEMA = {
+    BENCHMARK_MARKER_TABLE: """
+        seed INT NOT NULL, products INT NOT NULL, generated_at INT NOT NULL
+    """,
+    'cscart_settings': """
+        name VARCHAR(128) NOT NULL PRIMARY KEY, value VARCHAR(255) NOT NULL
+    """,
+    'cscart_categories': """
+        category_id INT NOT NULL PRIMARY KEY, parent_id INT NOT NULL DEFAULT 0,
+        category VARCHAR(255) NOT NULL DEFAULT '', description TEXT,
+        position INT NOT NULL DEFAULT 0, status CHAR(1) NOT NULL DEFAULT 'A',
+        timestamp INT NOT NULL DEFAULT 0, KEY (parent_id, position)
+    """,
+    'cscart_category_descriptions': """
+        category_id INT NOT NULL, lang_code CHAR(2) NOT NULL,
+        category VARCHAR(255) NOT NULL DEFAULT '', description TEXT,
+        PRIMARY KEY (category_id, lang_code)
+    """,
+    'cscart_products': """
+        product_id INT NOT NULL PRIMARY KEY, product_code VARCHAR(64) NOT NULL DEFAULT '',
+        product VARCHAR(255) NOT NULL DEFAULT '', full_description TEXT, short_description TEXT,
+        status CHAR(1) NOT NULL DEFAULT 'A', list_price DECIMAL(12,2) NOT NULL DEFAULT 0,
+        price DECIMAL(12,2) NOT NULL DEFAULT 0, amount INT NOT NULL DEFAULT 0,
+        weight DECIMAL(12,3) NOT NULL DEFAULT 0, length DECIMAL(12,2) NOT NULL DEFAULT 0,
+        width DECIMAL(12,2) NOT NULL DEFAULT 0, height DECIMAL(12,2) NOT NULL DEFAULT 0,
+        timestamp INT NOT NULL DEFAULT 0, updated_timestamp INT NOT NULL DEFAULT 0
+    """,
+    'cscart_product_descriptions': """
+        product_id INT NOT NULL, lang_code CHAR(2) NOT NULL,
+        product VARCHAR(255) NOT NULL DEFAULT '', full_description TEXT, short_description TEXT,
+        PRIMARY KEY (product_id, lang_code)
+    """,
+    'cscart_products_categories': """
+        product_id INT NOT NULL, category_id INT NOT NULL, link_type CHAR(1) NOT NULL DEFAULT 'M',
+        PRIMARY KEY (product_id, category_id)
+    """,
+    'cscart_images': """
+        image_id INT NOT NULL PRIMARY KEY, image_path VARCHAR(255) NOT NULL DEFAULT '',
+        object_id INT NOT NULL DEFAULT 0, object_type VARCHAR(32) NOT NULL DEFAULT 'product',
+        detailed_id INT NOT NULL DEFAULT 0, KEY (object_id, object_type)
+    """,
+    'cscart_images_links': """
+        pair_id INT NOT NULL PRIMARY KEY, object_id INT NOT NULL, object_type VARCHAR(32) NOT NULL,
+        detailed_id INT NOT NULL, type CHAR(1) NOT NULL DEFAULT 'A', KEY (object_id, object_type)
+    """,
+    'cscart_companies': """
+        company_id INT NOT NULL PRIMARY KEY, company VARCHAR(255) NOT NULL DEFAULT '',
+        status CHAR(1) NOT NULL DEFAULT 'A'
+    """,
+    'cscart_users': """
+        user_id INT NOT NULL PRIMARY KEY, user_type CHAR(1) NOT NULL DEFAULT 'C',
+        status CHAR(1) NOT NULL DEFAULT 'A', email VARCHAR(128) NOT NULL DEFAULT '',
+        firstname VARCHAR(128) NOT NULL DEFAULT '', lastname VARCHAR(128) NOT NULL DEFAULT '',
+        phone VARCHAR(32) NOT NULL DEFAULT '', fax VARCHAR(32) NOT NULL DEFAULT '',
+        company VARCHAR(255) NOT NULL DEFAULT '', address VARCHAR(255) NOT NULL DEFAULT '',
+        city VARCHAR(64) NOT NULL DEFAULT '', state VARCHAR(32) NOT NULL DEFAULT '',
+        country CHAR(2) NOT NULL DEFAULT '', zipcode VARCHAR(16) NOT NULL DEFAULT '',
+        timestamp INT NOT NULL DEFAULT 0, company_id INT NOT NULL DEFAULT 0
+    """,
+    'cscart_orders': """
+        order_id INT NOT NULL PRIMARY KEY, user_id INT NOT NULL DEFAULT 0,
+        timestamp INT NOT NULL DEFAULT 0, status CHAR(1) NOT NULL DEFAULT 'O',
+        total DECIMAL(12,2) NOT NULL DEFAULT 0, subtotal DECIMAL(12,2) NOT NULL DEFAULT 0,
+        notes TEXT, firstname VARCHAR(128) NOT NULL DEFAULT '', lastname VARCHAR(128) NOT NULL DEFAULT '',
+        company VARCHAR(255) NOT NULL DEFAULT '', email VARCHAR(128) NOT NULL DEFAULT '',
+        phone VARCHAR(32) NOT NULL DEFAULT ''
+    """,
+    'cscart_order_details': """
+        item_id INT NOT NULL, order_id INT NOT NULL, product_id INT NOT NULL,
+        product_code VARCHAR(64) NOT NULL DEFAULT '', price DECIMAL(12,2) NOT NULL DEFAULT 0,
+        amount INT NOT NULL DEFAULT 1, PRIMARY KEY (order_id, item_id)
+    """,
+}
+
+# Phases of a benchmark run, in import order
+BENCHMARK_PHASES = ['category', 'product', 'image', 'inventory', 'customer', 'supplier', 'order']
+
+# Seconds between two resident memory samples during a phase
+MEMORY_SAMPLE_INTERVAL = 0.05
+
+
+class _PeakMemorySampler:
+    """Peak resident memory of the process over a block, sampled by a helper thread
+    
+    Resident memory counts the native buffers of the MySQL connector and
+    PIL as well; sampling it leaves the timing of the block unaffected.
+    It is read from /proc/self/statm, elsewhere ``increase`` stays 0.
+    """
+    
+    def __init__(self, interval=MEMORY_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.baseline = self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def _rss(self):
+        try:
+            with open('/proc/self/statm') as statm:
+                return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, IndexError, AttributeError):
+            return 0
+    
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self._rss())
+    
+    def __enter__(self):
+        self.baseline = self.peak = self._rss()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._rss())
+    
+    @property
+    def increase(self):
+        """Peak resident memory above the one at the start of the block, in bytes"""
+        return self.peak - self.baseline
+
+class CsCartBenchmarkRun(models.Model):
+    _name = 'cs.cart.benchmark.run'
+    _description = 'CS-Cart Migration Benchmark Run'
+    _order = 'create_date desc'
+    
+    name = fields.Char(string='Name', required=True, default=lambda self: _('Benchmark'))
+    connection_id = fields.Many2one(
+        'cs.cart.connection',
+        string='Connection',
+        required=True,
+        ondelete='cascade',
+        help="Connection of the MySQL/MariaDB database holding the synthetic store"
+    )
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('generated', 'Dataset Generated'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='draft', required=True)
+    
+    # Dataset
+    scale = fields.Selection([
+        ('10k', '10k Products'),
+        ('100k', '100k Products'),
+        ('1m', '1M Products'),
+    ], string='Scale', default='10k', required=True)
+    seed = fields.Integer(string='Random Seed', default=42,
+                          help="Same seed and scale generate the same data, runs stay comparable")
+    category_depth = fields.Integer(string='Category Depth', default=5)
+    category_fanout = fields.Integer(string='Subcategories per Category', default=4)
+    images_per_product = fields.Integer(string='Images per Product', default=3)
+    languages = fields.Char(string='Languages', default='en,tr,de',
+                            help="Comma separated CS-Cart language codes, the first is the main language")
+    customers_per_product = fields.Float(string='Customers per Product', default=0.5)
+    orders_per_product = fields.Float(string='Orders per Product', default=0.2)
+    
+    # Run
+    batch_size = fields.Integer(string='Batch Size', default=100)
+    fast_import = fields.Boolean(string='Fast Import', default=True)
+    module_version = fields.Char(string='Module Version', readonly=True)
+    start_date = fields.Datetime(string='Start Date', readonly=True)
+    end_date = fields.Datetime(string='End Date', readonly=True)
+    error_message = fields.Text(string='Error Message', readonly=True)
+    result_ids = fields.One2many('cs.cart.benchmark.result', 'run_id', string='Results')
+    
+    @api.constrains('category_depth', 'category_fanout')
+    def _check_category_tree(self):
+        for run in self:
+            if run.category_depth < 1 or run.category_fanout < 1:
+                raise ValidationError(_("Category depth and subcategories must be at least 1"))
+            if sum(run.category_fanout ** depth for depth in range(1, run.category_depth + 1)) > 100000:
+                raise ValidationError(_("The category tree cannot have more than 100000 categories"))
+    
+    @api.constrains('images_per_product')
+    def _check_images_per_product(self):
+        for run in self:
+            if run.images_per_product < 0 or run.images_per_product > 10:
+                raise ValidationError(_("Images per product must be between 0 and 10"))
+    
+    def action_generate_dataset(self):
+        """Generate the synthetic store into the connection's database"""
+        self.ensure_one()
+        self.env['cs.cart.benchmark.dataset'].generate(self)
+        # The generated tables replace the ones the profile described
+        self.connection_id._refresh_schema_profile()
+        self.state = 'generated'
+    
+    def action_run_benchmark(self):
+        """Run the benchmark as a background job"""
+        self.ensure_one()
+        if self.state == 'draft':
+            raise UserError(_('Generate the dataset before running the benchmark'))
+        self.with_delay().run_benchmark()
+    
+    def _get_languages(self):
+        """CS-Cart language codes of the dataset, main language first"""
+        return [code.strip().lower() for code in (self.languages or 'en').split(',') if code.strip()] or ['en']
+    
+    def _get_phase_runners(self):
+        """Callable running each benchmark phase on the synthetic store"""
+        connection = self.connection_id
+        langs = self._get_languages()
+        params = {'batch_size': self.batch_size, 'fast_import': self.fast_import}
+        location = self.env['stock.warehouse'].search(
+            [('company_id', '=', self.env.company.id)], limit=1
+        ).lot_stock_id
+        return {
+            'category': lambda: self.env['cs.cart.category.migration'].migrate_categories(
+                connection, lang_code=langs[0], translation_langs=','.join(langs[1:]), **params),
+            'product': lambda: self.env['cs.cart.product.migration'].migrate_products(
+                connection, lang_code=langs[0], translation_langs=','.join(langs[1:]), **params),
+            'image': lambda: self.env['cs.cart.image.migration'].migrate_images(connection, **params),
+            'inventory': lambda: self.env['cs.cart.inventory.migration'].migrate_inventory(
+                connection, location, **params),
+            'customer': lambda: self.env['cs.cart.partner.migration'].migrate_customers(connection, **params),
+            'supplier': lambda: self.env['cs.cart.partner.migration'].migrate_suppliers(connection, **params),
+            'order': lambda: self.env['cs.cart.order.migration'].migrate_orders(connection, **params),
+        }
+    
+    def run_benchmark(self):
+        """Run every migration against the synthetic store and record its cost
+        
+        Each phase stores its throughput, its peak resident memory above the
+        one at its start (sampled alongside, not traced, so timings are not
+        skewed) and the number of SQL statements run
+        on the Odoo cursor. Meant for a throwaway Odoo
+        database: the migrations commit their batches.
+        """
+        self.ensure_one()
+        Log = self.env['cs.cart.migration.log']
+        self.result_ids.unlink()
+        self.write({
+            'module_version': self.env['ir.module.module'].search(
+                [('name', '=', self._module)], limit=1
+            ).latest_version,
+            'start_date': fields.Datetime.now(),
+            'end_date': False,
+            'error_message': False,
+        })
+        self.env.cr.commit()
+        
+        runners = self._get_phase_runners()
+        try:
+            for phase in BENCHMARK_PHASES:
+                if phase == 'image' and not (self.connection_id.images_path and self.images_per_product):
+                    continue
+                # Vendors are only read from Multi-Vendor stores
+                if phase == 'supplier' and self.connection_id.cs_cart_version != 'mve':
+                    continue
+                
+                self.env.flush_all()
+                last_log_id = Log.search([], order='id desc', limit=1).id or 0
+                queries = self.env.cr.sql_log_count
+                with _PeakMemorySampler() as memory:
+                    started = time.perf_counter()
+                    runners[phase]()
+                    self.env.flush_all()
+                    duration = time.perf_counter() - started
+                
+                log = Log.search([
+                    ('id', '>', last_log_id),
+                    ('connection_id', '=', self.connection_id.id),
+                    ('migration_type', '=', phase),
+                ], order='id desc', limit=1)
+                records = log.processed_records if log else 0
+                self.env['cs.cart.benchmark.result'].create({
+                    'run_id': self.id,
+                    'phase': phase,
+                    'log_id': log.id,
+                    'records': records,
+                    'duration': duration,
+                    'rows_per_second': records / duration if duration else 0.0,
+                    'peak_memory_mb': memory.increase / (1024.0 * 1024.0),
+                    'sql_count': self.env.cr.sql_log_count - queries,
+                })
+                self.env.cr.commit()
+                _logger.info(f"Benchmark {self.name} [{self.scale}] {phase}: {records} records "
+                             f"in {duration:.1f}s ({records / duration if duration else 0.0:.1f} records/s)")
+            
+            self.write({'state': 'done', 'end_date': fields.Datetime.now()})
+        except Exception as e:
+            self.env.cr.rollback()
+            self.write({
+                'state': 'failed',
+                'end_date': fields.Datetime.now(),
+                'error_message': str(e),
+            })
+            _logger.error(f"Benchmark {self.name} failed: {str(e)}")
+        self.env.cr.commit()
+    
+    def _get_previous_run(self):
+        """Last finished run on the same dataset before this one, the baseline of its results"""
+        self.ensure_one()
+        return self.search([
+            ('id', '!=', self.id),
+            ('scale', '=', self.scale),
+            ('seed', '=', self.seed),
+            ('state', '=', 'done'),
+            ('start_date', '<', self.start_date or fields.Datetime.now()),
+        ], order='start_date desc', limit=1)
+
+class CsCartBenchmarkResult(models.Model):
+    _name = 'cs.cart.benchmark.result'
+    _description = 'CS-Cart Migration Benchmark Result'
+    _order = 'run_id desc, id'
+    _rec_name = 'phase'
+    
+    run_id = fields.Many2one(
+        'cs.cart.benchmark.run',
+        string='Benchmark Run',
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+    scale = fields.Selection(related='run_id.scale', store=True)
+    module_version = fields.Char(related='run_id.module_version', store=True)
+    phase = fields.Selection(
+        selection=lambda self: self.env['cs.cart.migration.log']._fields['migration_type'].selection,
+        string='Phase',
+        required=True
+    )
+    log_id = fields.Many2one('cs.cart.migration.log', string='Migration Log', ondelete='set null')
+    records = fields.Integer(string='Records')
+    duration = fields.Float(string='Duration (seconds)')
+    rows_per_second = fields.Float(string='Records per Second')
+    peak_memory_mb = fields.Float(
+        string='Peak Memory (MB)',
+        help="Peak resident memory of the process during the phase, above the one at its start"
+    )
+    sql_count = fields.Integer(string='SQL Statements')
+    previous_rows_per_second = fields.Float(string='Previous Records per Second',
+                                            compute='_compute_regression')
+    rows_per_second_delta = fields.Float(string='Throughput Change (%)', compute='_compute_regression',
+                                         help="Change against the previous run of the same scale")
+    
+    @api.depends('rows_per_second', 'run_id.scale', 'run_id.start_date')
+    def _compute_regression(self):
+        for result in self:
+            previous = result.run_id._get_previous_run().result_ids.filtered(
+                lambda r: r.phase == result.phase
+            )[:1]
+            result.previous_rows_per_second = previous.rows_per_second
+            if previous.rows_per_second:
+                result.rows_per_second_delta = (
+                    (result.rows_per_second - previous.rows_per_second) * 100 / previous.rows_per_second
+                )
+            else:
+                result.rows_per_second_delta = 0.0
+
+class CsCartBenchmarkDataset(models.AbstractModel):
+    _name = 'cs.cart.benchmark.dataset'
+    _description = 'CS-Cart Synthetic Benchmark Dataset'
+    
+    def generate(self, run):
+        """(Re)create the synthetic CS-Cart store of a benchmark run
+        
+        The data only depends on the run's seed and dataset settings. The
+        target database must be empty or hold a previously generated store.
+        """
+        connection = run.connection_id
+        if connection.source_type != 'mysql':
+            raise UserError(_('The synthetic store is generated into a MySQL database, not a dump or CSV source'))
+        rng = random.Random(run.seed)
+        products = BENCHMARK_SCALES[run.scale]
+        langs = run._get_languages()
+        
+        conn = connection.get_connection()
+        try:
+            cursor = conn.cursor()
+            self._create_schema(cursor)
+            conn.commit()
+            
+            started = time.perf_counter()
+            cursor.execute(
+                f"INSERT INTO {BENCHMARK_MARKER_TABLE} VALUES (%s, %s, %s)",
+                (run.seed, products, int(time.time()))
+            )
+            cursor.execute(
+                "INSERT INTO cscart_settings VALUES ('version', '4.0.3 (benchmark)')"
+            )
+            leaf_ids = self._generate_categories(conn, cursor, rng, run, langs)
+            self._generate_products(conn, cursor, rng, products, leaf_ids, langs)
+            if run.images_per_product:
+                self._generate_images(conn, cursor, rng, products, run.images_per_product, connection.images_path)
+            customers = int(products * run.customers_per_product)
+            self._generate_users(conn, cursor, rng, customers, max(products // 100, 1))
+            self._generate_orders(conn, cursor, rng, int(products * run.orders_per_product), customers, products)
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+        
+        _logger.info(f"Generated benchmark dataset [{run.scale}] in {connection.database} "
+                     f"in {time.perf_counter() - started:.1f}s")
+    
+    def _create_schema(self, cursor):
+        """Drop a previously generated store and create the empty schema"""
+        cursor.execute("SHOW TABLES LIKE 'cscart\\_%'")
+        tables = [row[0] for row in cursor.fetchall()]
+        if tables and BENCHMARK_MARKER_TABLE not in tables:
+            raise UserError(_('The database holds CS-Cart tables that were not generated by a benchmark, '
+                              'use an empty database for the synthetic store'))
+        for table in tables:
+            cursor.execute(f"DROP TABLE {table}")
+        for table, columns in BENCHMARK_SCHEMA.items():
+            cursor.execute(f"CREATE TABLE {table} ({columns}) DEFAULT CHARSET=utf8mb4")
+    
+    def _insert_rows(self, conn, cursor, table, rows):
+        """Insert generated rows in multi-row statements, one commit per batch"""
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == GENERATE_BATCH_SIZE:
+                self._insert_batch(cursor, table, batch)
+                conn.commit()
+                batch = []
+        if batch:
+            self._insert_batch(cursor, table, batch)
+            conn.commit()
+    
+    def _insert_batch(self, cursor, table, batch):
+        """Insert one batch of rows; executemany sends a single INSERT"""
+        placeholders = ', '.join(['%s'] * len(batch[0]))
+        cursor.executemany(f"INSERT INTO {table} VALUES ({placeholders})", batch)
+    
+    def _generate_categories(self, conn, cursor, rng, run, langs):
+        """Category tree of ``category_depth`` levels; returns the leaf ids
+        
+        Ids are given level by level, parents always come before their
+        children.
+        """
+        categories = []
+        level = [0]
+        next_id = 1
+        for depth in range(run.category_depth):
+            children = []
+            for parent_id in level:
+                for position in range(run.category_fanout):
+                    categories.append((next_id, parent_id, depth, position))
+                    children.append(next_id)
+                    next_id += 1
+            level = children
+        
+        self._insert_rows(conn, cursor, 'cscart_categories', (
+            (category_id, parent_id, f"Category {category_id}",
+             f"Level {depth + 1} category {category_id}", position, 'A', rng.randint(1, 2 ** 30))
+            for category_id, parent_id, depth, position in categories
+        ))
+        self._insert_rows(conn, cursor, 'cscart_category_descriptions', (
+            (category_id, lang, f"Category {category_id} [{lang}]", f"Category {category_id} description [{lang}]")
+            for category_id, _parent_id, _depth, _position in categories
+            for lang in langs
+        ))
+        return level
+    
+    def _generate_products(self, conn, cursor, rng, products, leaf_ids, langs):
+        """Products with a main category and, for one in five, a second one"""
+        def product_rows():
+            for product_id in range(1, products + 1):
+                price = round(rng.uniform(1, 1000), 2)
+                yield (
+                    product_id, f"SKU-{product_id:07d}", f"Product {product_id}",
+                    f"<p>Full description of product {product_id}</p>" * rng.randint(1, 5),
+                    f"Product {product_id}", 'A', round(price * 1.2, 2), price,
+                    rng.randint(0, 500), round(rng.uniform(0.1, 20), 3),
+                    rng.randint(1, 100), rng.randint(1, 100), rng.randint(1, 100),
+                    rng.randint(1, 2 ** 30), 0,
+                )
+        
+        def category_rows():
+            for product_id in range(1, products + 1):
+                category_ids = rng.sample(leaf_ids, min(2, len(leaf_ids)))
+                yield (product_id, category_ids[0], 'M')
+                if product_id % 5 == 0 and len(category_ids) > 1:
+                    yield (product_id, category_ids[1], 'A')
+        
+        self._insert_rows(conn, cursor, 'cscart_products', product_rows())
+        self._insert_rows(conn, cursor, 'cscart_product_descriptions', (
+            (product_id, lang, f"Product {product_id} [{lang}]",
+             f"<p>Full description of product {product_id} [{lang}]</p>", f"Product {product_id} [{lang}]")
+            for product_id in range(1, products + 1)
+            for lang in langs
+        ))
+        self._insert_rows(conn, cursor, 'cscart_products_categories', category_rows())
+    
+    def _generate_images(self, conn, cursor, rng, products, images_per_product, images_path):
+        """Image rows of every product and, when the connection has an images
+        directory, the image files themselves (a small pool per folder)
+        """
+        # Both tables walk the same images: their counts come from one seed
+        counts_seed = rng.random()
+        
+        def image_ids():
+            counts = random.Random(counts_seed)
+            image_id = 1
+            for product_id in range(1, products + 1):
+                for position in range(counts.randint(1, images_per_product)):
+                    yield image_id, product_id, position
+                    image_id += 1
+        
+        def image_path(image_id):
+            return f"bench_{image_id % IMAGE_POOL_SIZE}.png"
+        
+        self._insert_rows(conn, cursor, 'cscart_images', (
+            (image_id, image_path(image_id), product_id, 'product', image_id)
+            for image_id, product_id, _position in image_ids()
+        ))
+        self._insert_rows(conn, cursor, 'cscart_images_links', (
+            (image_id, product_id, 'product', image_id, 'M' if position == 0 else 'A')
+            for image_id, product_id, position in image_ids()
+        ))
+        
+        if images_path:
+            cursor.execute("SELECT MAX(image_id) FROM cscart_images")
+            max_image_id = cursor.fetchone()[0] or 0
+            for folder in range(max_image_id // 1000 + 1):
+                path = os.path.join(images_path, 'detailed', str(folder))
+                os.makedirs(path, exist_ok=True)
+                for index in range(IMAGE_POOL_SIZE):
+                    with open(os.path.join(path, f"bench_{index}.png"), 'wb') as image_file:
+                        image_file.write(self._make_image(folder * IMAGE_POOL_SIZE + index))
+    
+    def _make_image(self, index):
+        """Small plain PNG image, a different color for each index"""
+        from PIL import Image
+        from io import BytesIO
+        
+        output = BytesIO()
+        color = (index % 256, (index // 256) % 256, (index * 197) % 256)
+        Image.new('RGB', (400, 400), color).save(output, format='PNG')
+        return output.getvalue()
+    
+    def _generate_users(self, conn, cursor, rng, customers, vendors):
+        """Customers, then vendor users with their companies (Multi-Vendor)"""
+        countries = [('US', 'CA'), ('TR', '34'), ('DE', 'BE'), ('FR', ''), ('GB', '')]
+        
+        def user_rows():
+            for user_id in range(1, customers + vendors + 1):
+                vendor = user_id > customers
+                country, state = rng.choice(countries)
+                yield (
+                    user_id, 'V' if vendor else 'C', 'A', f"user{user_id}@bench.example.com",
+                    f"First{user_id}", f"Last{user_id}", f"+1555{user_id:07d}", '',
+                    f"Company {user_id}" if vendor or user_id % 10 == 0 else '',
+                    f"{user_id} Benchmark Street", f"City {user_id % 500}", state, country,
+                    f"{user_id % 100000:05d}", rng.randint(1, 2 ** 30),
+                    user_id - customers if vendor else 0,
+                )
+        
+        self._insert_rows(conn, cursor, 'cscart_companies', (
+            (company_id, f"Vendor {company_id}", 'A') for company_id in range(1, vendors + 1)
+        ))
+        self._insert_rows(conn, cursor, 'cscart_users', user_rows())
+    
+    def _generate_orders(self, conn, cursor, rng, orders, customers, products):
+        """Orders of registered customers and guests, with one to five lines"""
+        statuses = ['C', 'C', 'C', 'P', 'O', 'B', 'F', 'D', 'I']
+        order_lines = {}
+        
+        def order_rows():
+            for order_id in range(1, orders + 1):
+                user_id = rng.randint(1, customers) if customers and order_id % 4 else 0
+                lines = [
+                    (item_id, rng.randint(1, products), round(rng.uniform(1, 1000), 2), rng.randint(1, 5))
+                    for item_id in range(1, rng.randint(1, 5) + 1)
+                ]
+                order_lines[order_id] = lines
+                total = round(sum(price * amount for _item, _product, price, amount in lines), 2)
+                email = f"user{user_id}@bench.example.com" if user_id else f"guest{order_id % 1000}@bench.example.com"
+                yield (
+                    order_id, user_id, rng.randint(1, 2 ** 30), rng.choice(statuses), total, total, '',
+                    f"First{user_id or order_id}", f"Last{user_id or order_id}", '', email, '',
+                )
+        
+        def detail_rows():
+            for order_id, lines in order_lines.items():
+                for item_id, product_id, price, amount in lines:
+                    yield (item_id, order_id, product_id, f"SKU-{product_id:07d}", price, amount)
+            order_lines.clear()
+        
+        # Orders are inserted batch by batch, their lines right after them
+        batch = []
+        for row in order_rows():
+            batch.append(row)
+            if len(batch) == GENERATE_BATCH_SIZE:
+                self._insert_batch(cursor, 'cscart_orders', batch)
+                self._insert_rows(conn, cursor, 'cscart_order_details', detail_rows())
+                batch = []
+        if batch:
+            self._insert_batch(cursor, 'cscart_orders', batch)
+            self._insert_rows(conn, cursor, 'cscart_order_details', detail_rows())
\ No newline at end of file
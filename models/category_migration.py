@@ -2,7 +2,8 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 import logging
-from .migration_base import MigrationBase
+from collections import defaultdict
+from .migration_base import MigrationBase, FAST_IMPORT_CONTEXT
 
 _logger = logging.getLogger(__name__)
 
@@ -11,50 +12,99 @@ class CategoryMigration(models.Model):
     _description = 'CS-Cart Category Migration'
     _inherit = 'cs.cart.migration.base'
     
-    def migrate_categories(self, connection, lang_code='tr', batch_size=100, update_existing=True):
-        """Migrate categories from CS-Cart to Odoo"""
+    def migrate_categories(self, connection, lang_code='tr', batch_size=100, update_existing=True,
+                           extraction_mode='stream', resume_log=None,
+                           changed_since=None, fast_import=False, translation_langs=None):
+        """Migrate categories from CS-Cart to Odoo
+        
+        ``translation_langs`` (comma separated CS-Cart language codes) are
+        imported as translations of the categories in the same pass.
+        """
+        if fast_import:
+            self = self.with_context(**FAST_IMPORT_CONTEXT)
+        
         import mysql.connector
         from mysql.connector import Error
         
-        log = self._create_migration_log(connection, 'category')
+        langs = self._get_translation_langs(translation_langs, lang_code)
+        log = resume_log or self._create_migration_log(
+            connection, 'category', lang_code=lang_code, batch_size=batch_size,
+            update_existing=update_existing, extraction_mode=extraction_mode,
+            changed_since=changed_since, fast_import=fast_import,
+            translation_langs=translation_langs
+        )
         migrated_categories = []
-        category_mapping = {}  # CS-Cart ID -> Odoo ID mapping
+        # CS-Cart ID -> Odoo ID mapping, including parents loaded by an earlier
+        # run when resuming or when a delta sync only reads changed children
+        if resume_log or changed_since:
+            category_mapping = self._get_category_mapping(connection)
+        else:
+            category_mapping = {}
         
         try:
             conn = connection.get_connection()
-            cursor = conn.cursor(dictionary=True)
             
             # Get query based on CS-Cart version
-            query = self._get_cs_cart_query(connection.cs_cart_version, 'categories')
+            query = self._get_cs_cart_query(connection, 'categories', conn)
+            params = (lang_code,) if '%s' in query else None
+            query, params = self._filter_changed_since(connection, query, params, 'categories', changed_since)
             
-            # Execute query with parameters if needed
-            if '%s' in query:
-                cursor.execute(query, (lang_code,))
-            else:
-                cursor.execute(query)
+            # A resumed run keeps the total counted when it started
+            if not resume_log:
+                log.total_records = self._count_cs_cart_rows(conn, query, params)
+                self._update_migration_log(log, processed_records=0)
+                self.env.cr.commit()
+            
+            prepare_vals = lambda cat: self._prepare_category_vals(cat, category_mapping)
             
-            categories = cursor.fetchall()
-            log.total_records = len(categories)
-            self._update_migration_log(log, processed_records=0)
+            # The whole category graph is read first (it is small next to the
+            # product catalog) so that parents are always loaded before their
+            # children, whatever their ids or the source order
+            rows = {}
+            for categories in self._iter_cs_cart_chunks(
+                connection, conn, query, 'c.category_id', params,
+                batch_size, extraction_mode
+            ):
+                for cat in categories:
+                    rows[cat['category_id']] = cat
             
-            for i, cat in enumerate(categories, 1):
-                try:
-                    odoo_category = self._create_or_update_category(cat, category_mapping, update_existing)
-                    if odoo_category:
-                        category_mapping[cat['category_id']] = odoo_category.id
-                        migrated_categories.append(odoo_category.id)
-                        log.successful_records += 1
+            # Level batches carry no resumable key order, a resumed run
+            # reloads the whole tree (loads are upserts)
+            if resume_log:
+                self._update_migration_log(log, processed_records=0, successful_records=0, failed_records=0)
+            
+            i = 0
+            self._report_progress(log)
+            for depth, level in enumerate(self._get_category_levels(rows)):
+                # Wide levels are loaded batch_size categories at a time; the
+                # parents of a level all come from the previous ones
+                for start in range(0, len(level), batch_size):
+                    categories = level[start:start + batch_size]
+                    loaded = self._migrate_chunk(
+                        log, 'product.category', categories, prepare_vals, 'category_id', update_existing
+                    )
+                    category_mapping.update(loaded)
+                    migrated_categories.extend(loaded.values())
                     
+                    i += len(categories)
                     log.processed_records = i
+                    log.checkpoint_phase = 'load'
                     
                     # Batch commit
-                    if i % batch_size == 0:
-                        self.env.cr.commit()
-                        _logger.info(f"Processed {i} categories")
-                
-                except Exception as e:
-                    self._handle_migration_error(log, e, cat.get('category_id', 'unknown'))
-                    continue
+                    self.env.cr.commit()
+                    _logger.info(f"Processed {i} categories (depth {depth})")
+                    self._report_progress(log)
+            
+            # Translations of the whole tree are read with one query
+            if langs:
+                self._load_translations(
+                    log, 'product.category',
+                    self._fetch_translation_rows(
+                        conn, connection, 'category_translations', 'd.category_id', None, list(langs)
+                    ),
+                    'category_id', category_mapping, {'category': 'name', 'description': 'description'}, langs
+                )
+                self.env.cr.commit()
             
             # Update connection
             connection.last_sync_date = fields.Datetime.now()
@@ -80,41 +130,52 @@ class CategoryMigration(models.Model):
             )
             raise UserError(_('Category migration failed: %s') % str(e))
         finally:
-            if 'cursor' in locals():
-                cursor.close()
             if 'conn' in locals():
                 conn.close()
         
         return migrated_categories
     
-    def _create_or_update_category(self, cat_data, category_mapping, update_existing):
-        """Create or update a category in Odoo"""
+    def _get_category_levels(self, rows):
+        """Group source categories by depth, roots first
+        
+        Roots are categories whose parent is not part of the source rows;
+        their parent, if any, is resolved against categories already in Odoo.
+        Categories unreachable from a root (parent cycles) come last.
+        """
+        children = defaultdict(list)
+        level = []
+        for category_id, cat in rows.items():
+            parent_id = cat.get('parent_id')
+            if parent_id in rows and parent_id != category_id:
+                children[parent_id].append(cat)
+            else:
+                level.append(cat)
+        
+        levels = []
+        seen = set()
+        while level:
+            levels.append(level)
+            seen.update(cat['category_id'] for cat in level)
+            level = [child for cat in level for child in children.get(cat['category_id'], [])]
+        
+        orphans = [cat for category_id, cat in rows.items() if category_id not in seen]
+        if orphans:
+            _logger.warning(f"{len(orphans)} CS-Cart categories are part of a parent cycle")
+            levels.append(orphans)
+        
+        return levels
+    
+    def _prepare_category_vals(self, cat_data, category_mapping):
+        """Prepare product.category values from a CS-Cart category row"""
         # Find parent category
         parent_id = False
         if cat_data.get('parent_id') and cat_data['parent_id'] in category_mapping:
             parent_id = category_mapping[cat_data['parent_id']]
         
-        # Check if category already exists
-        existing_category = self.env['product.category'].search([
-            ('cs_cart_id', '=', cat_data['category_id'])
-        ], limit=1)
-        
-        # Prepare category values
-        category_vals = {
+        return {
             'name': cat_data.get('category') or cat_data.get('name', 'Unnamed Category'),
             'parent_id': parent_id,
             'description': cat_data.get('description') or '',
             'cs_cart_id': cat_data['category_id'],
             'active': cat_data.get('status', 'A') == 'A',
-        }
-        
-        # Handle existing category
-        if existing_category:
-            if update_existing:
-                existing_category.write(category_vals)
-                return existing_category
-            else:
-                return existing_category
-        else:
-            # Create new category
-            return self.env['product.category'].create(category_vals)
\ No newline at end of file
+        }
\ No newline at end of file
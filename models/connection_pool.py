@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import logging
+import queue
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Connections idle for longer than this are pinged before being handed out
+HEALTH_CHECK_IDLE_SECONDS = 30
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pool_key(host, port, database, user, password):
+    """Key identifying a pool; any credential change gives a new key"""
+    secret = hashlib.sha256((password or '').encode('utf-8')).hexdigest()
+    return (host, int(port), database, user, secret)
+
+
+class PooledConnection:
+    """MySQL connection borrowed from a pool; ``close()`` gives it back"""
+
+    def __init__(self, pool, cnx):
+        self._pool = pool
+        self._cnx = cnx
+
+    def __getattr__(self, name):
+        if self._cnx is None:
+            raise AttributeError(name)
+        return getattr(self._cnx, name)
+
+    def close(self):
+        if self._cnx is not None:
+            cnx, self._cnx = self._cnx, None
+            self._pool.release(cnx)
+
+    def __del__(self):
+        self.close()
+
+
+class ConnectionPool:
+    """Bounded pool of MySQL connections sharing the same credentials"""
+
+    def __init__(self, connect_params, max_size=5):
+        self.connect_params = connect_params
+        self.max_size = max_size
+        self._idle = queue.LifoQueue()
+        self._borrowed = 0
+        self._slots = threading.Condition()
+        self._closed = False
+
+    def resize(self, max_size):
+        """Change the number of connections that can be borrowed at once
+
+        Borrowed connections above a smaller size are closed on release.
+        """
+        with self._slots:
+            self.max_size = max_size
+            self._slots.notify_all()
+        while self._idle.qsize() > max_size:
+            try:
+                cnx, _released_at = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(cnx)
+
+    def acquire(self, timeout=60):
+        """Borrow a healthy connection, opening one if none is idle"""
+        return self.acquire_many(1, timeout)[0]
+
+    def acquire_many(self, count, timeout=60):
+        """Borrow ``count`` connections at once
+
+        The slots are taken together, so two borrowers needing several
+        connections never wait on each other while each holds a part.
+        """
+        import mysql.connector
+
+        if count > self.max_size:
+            raise mysql.connector.errors.PoolError(
+                f"{count} CS-Cart connections needed, the pool size is {self.max_size}")
+        with self._slots:
+            if not self._slots.wait_for(lambda: self._borrowed + count <= self.max_size, timeout=timeout):
+                raise mysql.connector.errors.PoolError(
+                    f"No CS-Cart connection available after {timeout}s (pool size {self.max_size})")
+            self._borrowed += count
+        connections = []
+        try:
+            for _i in range(count):
+                connections.append(PooledConnection(self, self._open()))
+        except Exception:
+            # Each borrowed connection gives its own slot back
+            for connection in connections:
+                connection.close()
+            for _i in range(count - len(connections)):
+                self._release_slot()
+            raise
+        return connections
+
+    def _open(self):
+        import mysql.connector
+
+        while True:
+            try:
+                cnx, released_at = self._idle.get_nowait()
+            except queue.Empty:
+                return mysql.connector.connect(**self.connect_params)
+            if self._is_healthy(cnx, released_at):
+                return cnx
+            self._discard(cnx)
+
+    def release(self, cnx):
+        """Return a connection; broken ones and ones with unread rows are dropped
+
+        The read transaction of the borrower is rolled back, so the next one
+        gets a fresh snapshot and no transaction stays open on the shop.
+        """
+        try:
+            if self._closed or getattr(cnx, 'unread_result', False) or not cnx.is_connected() \
+                    or self._idle.qsize() >= self.max_size:
+                self._discard(cnx)
+            else:
+                cnx.rollback()
+                self._idle.put((cnx, time.monotonic()))
+        except Exception:
+            self._discard(cnx)
+        finally:
+            self._release_slot()
+
+    def _release_slot(self):
+        with self._slots:
+            self._borrowed -= 1
+            self._slots.notify()
+
+    def close(self):
+        """Close idle connections; borrowed ones are closed on release"""
+        self._closed = True
+        while True:
+            try:
+                cnx, _released_at = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(cnx)
+
+    def _is_healthy(self, cnx, released_at):
+        if time.monotonic() - released_at < HEALTH_CHECK_IDLE_SECONDS:
+            return True
+        try:
+            cnx.ping(reconnect=False)
+            return True
+        except Exception as e:
+            _logger.info(f"Dropping stale CS-Cart connection: {str(e)}")
+            return False
+
+    def _discard(self, cnx):
+        try:
+            cnx.close()
+        except Exception:
+            pass
+
+
+def _connect_params(host, port, database, user, password, connect_params):
+    return dict(
+        connect_params,
+        host=host,
+        port=int(port),
+        database=database,
+        user=user,
+        password=password,
+    )
+
+
+def acquire_connection(host, port, database, user, password, max_size=5, **connect_params):
+    """Borrow a connection from the pool for these credentials, creating the pool if needed"""
+    return acquire_connections(host, port, database, user, password, 1, max_size, **connect_params)[0]
+
+
+def acquire_connections(host, port, database, user, password, count, max_size=5, **connect_params):
+    """Borrow ``count`` connections at once from the pool for these credentials"""
+    key = pool_key(host, port, database, user, password)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(
+                _connect_params(host, port, database, user, password, connect_params), max_size)
+    if pool.max_size != max_size:
+        pool.resize(max_size)
+    return pool.acquire_many(count)
+
+
+def connect_once(host, port, database, user, password, **connect_params):
+    """Open an unpooled connection, for ad-hoc tests of credentials typed by a user"""
+    import mysql.connector
+
+    return mysql.connector.connect(**_connect_params(host, port, database, user, password, connect_params))
+
+
+def close_pool(host, port, database, user, password):
+    """Drop the pool for these credentials, e.g. after they changed"""
+    with _pools_lock:
+        pool = _pools.pop(pool_key(host, port, database, user, password), None)
+    if pool is not None:
+        pool.close()
@@ -1,10 +1,19 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, UserError
+from odoo.tools import config
 import logging
+import os
+from . import connection_pool
+from . import file_source
+from . import schema_profile
 
 _logger = logging.getLogger(__name__)
 
+# Connections one migration run can hold at once (products with
+# translations read through a second connection)
+MIN_POOL_SIZE = 2
+
 class CsCartConnection(models.Model):
     _name = 'cs.cart.connection'
     _description = 'CS-Cart Database Connection'
@@ -16,9 +25,23 @@ class CsCartConnection(models.Model):
         tracking=True
     )
     
+    source_type = fields.Selection([
+        ('mysql', 'MySQL Server'),
+        ('dump', 'SQL Dump File'),
+        ('csv', 'CSV Exports'),
+    ], string='Source', default='mysql', required=True, tracking=True,
+       help="Where CS-Cart data is read from: a live MySQL server, a mysqldump file "
+            "(optionally gzipped) or a directory of <table>.csv exports")
+    
+    source_path = fields.Char(
+        string='Source Path',
+        help="mysqldump file, or directory of CSV table exports (with an optional schema.sql); "
+             "loaded once into a local cache, reloaded when the files change",
+        tracking=True
+    )
+    
     host = fields.Char(
         string='Host',
-        required=True,
         default='localhost',
         help="CS-Cart database server hostname or IP address",
         tracking=True
@@ -33,24 +56,43 @@ class CsCartConnection(models.Model):
     
     database = fields.Char(
         string='Database Name',
-        required=True,
         help="CS-Cart database name",
         tracking=True
     )
     
     username = fields.Char(
         string='Username',
-        required=True,
         default='root',
         tracking=True
     )
     
     password = fields.Char(
         string='Password',
+        tracking=True
+    )
+    
+    pool_size = fields.Integer(
+        string='Connection Pool Size',
+        default=5,
         required=True,
+        help="Maximum number of open MySQL connections kept per worker process "
+             "(parallel import jobs share them)"
+    )
+    
+    images_path = fields.Char(
+        string='Images Directory',
+        help="CS-Cart images directory (the store's images/ folder, local or mounted export); "
+             "product images are read from its detailed/ sub folder",
         tracking=True
     )
     
+    image_workers = fields.Integer(
+        string='Image Workers',
+        default=4,
+        required=True,
+        help="Threads reading, decoding and resizing product image files"
+    )
+    
     cs_cart_version = fields.Selection([
         ('auto', 'Auto Detect'),
         ('4.0', 'CS-Cart 4.0.x'),
@@ -76,6 +118,19 @@ class CsCartConnection(models.Model):
         tracking=True
     )
     
+    schema_profile = fields.Json(
+        string='Schema Profile',
+        readonly=True,
+        copy=False,
+        help="Tables, columns and indexes of the CS-Cart database the source queries are built from"
+    )
+    
+    schema_profile_date = fields.Datetime(
+        string='Schema Profiled On',
+        readonly=True,
+        copy=False
+    )
+    
     company_id = fields.Many2one(
         'res.company',
         string='Company',
@@ -119,12 +174,45 @@ class CsCartConnection(models.Model):
             if record.port < 1 or record.port > 65535:
                 raise ValidationError(_("Port must be between 1 and 65535"))
     
-    @api.constrains('host')
+    @api.constrains('pool_size')
+    def _check_pool_size(self):
+        for record in self:
+            if record.pool_size < MIN_POOL_SIZE or record.pool_size > 64:
+                raise ValidationError(_("Connection pool size must be between %s and 64") % MIN_POOL_SIZE)
+    
+    @api.constrains('image_workers')
+    def _check_image_workers(self):
+        for record in self:
+            if record.image_workers < 1 or record.image_workers > 32:
+                raise ValidationError(_("Image workers must be between 1 and 32"))
+    
+    @api.constrains('host', 'source_type')
     def _check_host(self):
         for record in self:
+            if record.source_type != 'mysql':
+                continue
             if not record.host or len(record.host.strip()) == 0:
                 raise ValidationError(_("Host cannot be empty"))
     
+    @api.constrains('source_type', 'source_path')
+    def _check_source_path(self):
+        for record in self:
+            if record.source_type != 'mysql' and not (record.source_path or '').strip():
+                raise ValidationError(_("Source path cannot be empty for a dump or CSV source"))
+    
+    def write(self, vals):
+        # Pooled connections use the old credentials, drop them on change
+        if set(vals) & {'host', 'port', 'database', 'username', 'password', 'pool_size'}:
+            self._close_connection_pool()
+        # Another database is profiled again on its first use
+        if set(vals) & {'host', 'port', 'database', 'source_type', 'source_path'}:
+            vals = dict(vals, schema_profile=False, schema_profile_date=False)
+        return super().write(vals)
+    
+    def unlink(self):
+        self._close_connection_pool()
+        return super().unlink()
+    
     # Compute methods
     @api.depends('last_sync_date')
     def _compute_migration_stats(self):
@@ -138,6 +226,7 @@ class CsCartConnection(models.Model):
         self.ensure_one()
         try:
             self._test_connection()
+            self._refresh_schema_profile()
             self.last_connection_test = fields.Datetime.now()
             self.last_migration_status = 'success'
             
@@ -161,6 +250,23 @@ class CsCartConnection(models.Model):
             self.last_migration_status = 'failed'
             raise UserError(_('Connection failed: %s') % str(e))
     
+    def action_refresh_schema_profile(self):
+        """Introspect the CS-Cart database again, e.g. after a store upgrade"""
+        self.ensure_one()
+        self._refresh_schema_profile()
+        if self.cs_cart_version == 'auto':
+            self.cs_cart_version = self._detect_cs_cart_version()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Schema Profile'),
+                'message': _('%s CS-Cart tables profiled') % len(self.schema_profile['tables']),
+                'type': 'success',
+                'sticky': False,
+            }
+        }
+    
     def action_open_migration_wizard(self):
         self.ensure_one()
         return {
@@ -189,21 +295,13 @@ class CsCartConnection(models.Model):
     # Private methods
     def _test_connection(self):
         """Test connection to CS-Cart database"""
-        import mysql.connector
         from mysql.connector import Error
         
         try:
-            connection = mysql.connector.connect(
-                host=self.host,
-                port=self.port,
-                database=self.database,
-                user=self.username,
-                password=self.password,
-                connect_timeout=10
-            )
+            connection = self.get_connection()
             
             if connection.is_connected():
-                _logger.info(f"Successfully connected to CS-Cart database: {self.database}")
+                _logger.info(f"Successfully connected to CS-Cart database: {self.database or self.source_path}")
                 connection.close()
                 return True
                 
@@ -215,91 +313,92 @@ class CsCartConnection(models.Model):
             raise
     
     def _detect_cs_cart_version(self):
-        """Auto-detect CS-Cart version"""
-        import mysql.connector
-        from mysql.connector import Error
+        """Closest known CS-Cart version of the database, from its schema profile"""
+        versions = [key for key, _label in self._fields['cs_cart_version'].selection if key not in ('auto', 'mve')]
+        return self._get_schema_profile().detect_version(versions)
+    
+    def _get_schema_profile(self, conn=None):
+        """Schema profile of the CS-Cart database, introspected on first use
         
-        try:
-            connection = mysql.connector.connect(
-                host=self.host,
-                port=self.port,
-                database=self.database,
-                user=self.username,
-                password=self.password
-            )
-            
-            cursor = connection.cursor(dictionary=True)
-            
-            # Method 1: Check settings table
-            try:
-                cursor.execute("SELECT value FROM cscart_settings WHERE name='version'")
-                result = cursor.fetchone()
-                if result:
-                    version_str = result['value']
-                    # Parse version string
-                    if '4.0' in version_str:
-                        return '4.0'
-                    elif '4.3' in version_str:
-                        return '4.3'
-                    elif '4.5' in version_str:
-                        return '4.5'
-                    elif '4.6' in version_str:
-                        return '4.6'
-                    elif '4.7' in version_str:
-                        return '4.7'
-                    elif '4.8' in version_str:
-                        return '4.8'
-                    elif '4.9' in version_str:
-                        return '4.9'
-                    elif '4.10' in version_str:
-                        return '4.10'
-                    elif '4.11' in version_str:
-                        return '4.11'
-                    elif '4.12' in version_str:
-                        return '4.12'
-                    elif '4.13' in version_str:
-                        return '4.13'
-                    elif '4.14' in version_str:
-                        return '4.14'
-                    elif '4.15' in version_str:
-                        return '4.15'
-            except:
-                pass
-            
-            # Method 2: Check for MVE tables
-            try:
-                cursor.execute("SHOW TABLES LIKE 'cscart_companies'")
-                if cursor.fetchone():
-                    cursor.execute("SHOW TABLES LIKE 'cscart_vendor_%'")
-                    if cursor.fetchone():
-                        return 'mve'
-            except:
-                pass
-            
-            # Method 3: Check table structure
+        ``conn`` is a connection the caller already holds, used for the
+        introspection instead of borrowing another one from the pool.
+        """
+        self.ensure_one()
+        if not self.schema_profile:
+            self._refresh_schema_profile(conn)
+        return schema_profile.SchemaProfile(self.schema_profile)
+    
+    def _refresh_schema_profile(self, conn=None):
+        """Record the tables, columns and indexes of the CS-Cart database"""
+        self.ensure_one()
+        if conn is not None:
+            profile = schema_profile.introspect(conn)
+        else:
+            conn = self.get_connection()
             try:
-                cursor.execute("SHOW COLUMNS FROM cscart_products LIKE 'detailed_params'")
-                if cursor.fetchone():
-                    return '4.10+'
-            except:
-                pass
-            
-            return '4.0'
-            
-        except Error as e:
-            _logger.error(f"Version detection error: {str(e)}")
-            return '4.0'
-        finally:
-            if 'connection' in locals():
-                connection.close()
+                profile = schema_profile.introspect(conn)
+            finally:
+                conn.close()
+        self.write({
+            'schema_profile': profile,
+            'schema_profile_date': fields.Datetime.now(),
+        })
+        _logger.info(f"Profiled CS-Cart database of connection {self.name}: "
+                     f"{len(profile['tables'])} tables, version {profile['version'] or 'unknown'}")
     
     def get_connection(self):
-        """Get MySQL connection object"""
-        import mysql.connector
-        return mysql.connector.connect(
-            host=self.host,
-            port=self.port,
-            database=self.database,
-            user=self.username,
-            password=self.password
-        )
\ No newline at end of file
+        """Get a pooled MySQL connection object; ``close()`` returns it to the pool
+        
+        Dump and CSV sources give a connection to their local copy instead,
+        answering the same queries.
+        """
+        self.ensure_one()
+        if self.source_type != 'mysql':
+            return self._get_file_source_connection()
+        return connection_pool.acquire_connection(
+            self.host, self.port, self.database, self.username, self.password,
+            max_size=self.pool_size or 5,
+            connect_timeout=10
+        )
+    
+    def get_connections(self, count):
+        """Get ``count`` connections at once, for runs reading through several
+        
+        Pooled connections are borrowed together, so concurrent runs cannot
+        each hold a part of what they need and wait for the rest.
+        """
+        self.ensure_one()
+        if self.source_type != 'mysql':
+            return [self._get_file_source_connection() for _i in range(count)]
+        return connection_pool.acquire_connections(
+            self.host, self.port, self.database, self.username, self.password, count,
+            max_size=self.pool_size or 5,
+            connect_timeout=10
+        )
+    
+    def _get_file_source_connection(self):
+        """Open the local copy of a dump or CSV source, loading it on first use"""
+        exists = os.path.isfile if self.source_type == 'dump' else os.path.isdir
+        if not self.source_path or not exists(self.source_path):
+            raise UserError(_('CS-Cart source not found: %s') % (self.source_path or ''))
+        cache_dir = os.path.join(config['data_dir'], 'cs_cart_sources', self.env.cr.dbname)
+        return file_source.connect(self.source_type, self.source_path, cache_dir)
+    
+    def _get_progress_channel(self):
+        """Bus channel of the migration progress events of this connection"""
+        self.ensure_one()
+        return f"cs_cart_migration_{self.id}"
+    
+    def _send_progress_event(self, payload):
+        """Push a compact migration progress event to the watchers of this connection
+        
+        Sent on commit of the current transaction.
+        """
+        self.env['bus.bus']._sendone(self._get_progress_channel(), 'cs_cart_migration/progress', payload)
+    
+    def _close_connection_pool(self):
+        """Close the pooled connections opened with the current credentials"""
+        for record in self:
+            connection_pool.close_pool(
+                record.host, record.port, record.database, record.username, record.password
+            )
\ No newline at end of file
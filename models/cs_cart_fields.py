@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields
+
+
+class ProductTemplate(models.Model):
+    _inherit = 'product.template'
+    
+    cs_cart_id = fields.Integer(string='CS-Cart ID', index=True, copy=False, readonly=True)
+    cs_cart_hash = fields.Char(
+        string='CS-Cart Fingerprint',
+        copy=False,
+        readonly=True,
+        help="Fingerprint of the values last imported from CS-Cart"
+    )
+    cs_cart_image_checksum = fields.Char(
+        string='CS-Cart Image Checksum',
+        copy=False,
+        readonly=True,
+        help="Checksum of the image files last imported from CS-Cart"
+    )
+
+
+class ProductCategory(models.Model):
+    _inherit = 'product.category'
+    
+    cs_cart_id = fields.Integer(string='CS-Cart ID', index=True, copy=False, readonly=True)
+    cs_cart_hash = fields.Char(
+        string='CS-Cart Fingerprint',
+        copy=False,
+        readonly=True,
+        help="Fingerprint of the values last imported from CS-Cart"
+    )
+
+
+class ResPartner(models.Model):
+    _inherit = 'res.partner'
+    
+    cs_cart_id = fields.Integer(string='CS-Cart ID', index=True, copy=False, readonly=True)
+    cs_cart_hash = fields.Char(
+        string='CS-Cart Fingerprint',
+        copy=False,
+        readonly=True,
+        help="Fingerprint of the values last imported from CS-Cart"
+    )
+
+
+class SaleOrder(models.Model):
+    _inherit = 'sale.order'
+    
+    cs_cart_id = fields.Integer(string='CS-Cart ID', index=True, copy=False, readonly=True)
+    cs_cart_hash = fields.Char(
+        string='CS-Cart Fingerprint',
+        copy=False,
+        readonly=True,
+        help="Fingerprint of the values last imported from CS-Cart"
+    )
\ No newline at end of file
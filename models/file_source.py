@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+import csv
+import glob
+import gzip
+import hashlib
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+
+_logger = logging.getLogger(__name__)
+
+# Tables read by the migrations; the rows of every other table of a dump
+# (sessions, logs, ...) are skipped while loading it
+SOURCE_TABLES = {
+    'cscart_settings',
+    'cscart_categories',
+    'cscart_category_descriptions',
+    'cscart_products',
+    'cscart_product_descriptions',
+    'cscart_products_categories',
+    'cscart_images',
+    'cscart_images_links',
+    'cscart_users',
+    'cscart_companies',
+    'cscart_orders',
+    'cscart_order_details',
+}
+
+# Rows sent per INSERT while loading CSV exports
+LOAD_BATCH_SIZE = 5000
+
+# Column types of CSV exports without a schema.sql, by column name
+INTEGER_COLUMNS = {'timestamp', 'updated_timestamp', 'position', 'amount'}
+REAL_COLUMNS = {'price', 'list_price', 'weight', 'length', 'width', 'height', 'total', 'subtotal'}
+
+# mysqldump writes one statement per line (newlines in strings are escaped),
+# table definitions excepted
+_CREATE_TABLE_RE = re.compile(r'^CREATE TABLE `([^`]+)`')
+_COLUMN_DEF_RE = re.compile(r'^\s+`([^`]+)`\s+(\w+)')
+_INSERT_RE = re.compile(
+    r'^(?:INSERT|REPLACE)(?:\s+IGNORE)?\s+INTO\s+`([^`]+)`\s*(?:\(([^)]*)\))?\s*VALUES\s*', re.IGNORECASE
+)
+_VALUE_RE = re.compile(r"""\s*(?:
+    (?P<open>\() | (?P<close>\)) | (?P<comma>,) | (?P<end>;) |
+    (?:_\w+\s*)?'(?P<string>(?:[^'\\]|\\.|'')*)' |
+    (?P<null>NULL) |
+    (?P<hex>0x[0-9A-Fa-f]*) |
+    (?P<number>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+)""", re.VERBOSE | re.DOTALL)
+_ESCAPE_RE = re.compile(r"\\(.)|''", re.DOTALL)
+_ESCAPES = {'0': '\0', 'b': '\b', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a'}
+
+# MySQL statements of the migrations with no SQLite equivalent
+_SHOW_TABLES_RE = re.compile(r"^\s*SHOW\s+TABLES(?:\s+LIKE\s+(?:'([^']*)'|%s))?\s*$", re.IGNORECASE)
+_SHOW_COLUMNS_RE = re.compile(
+    r"^\s*SHOW\s+COLUMNS\s+FROM\s+`?(\w+)`?(?:\s+LIKE\s+(?:'([^']*)'|%s))?\s*$", re.IGNORECASE
+)
+_SHOW_INDEX_RE = re.compile(r"^\s*SHOW\s+INDEX\s+FROM\s+`?(\w+)`?\s*$", re.IGNORECASE)
+
+_build_lock = threading.Lock()
+
+
+def _unescape(value):
+    """Decode a MySQL string literal body"""
+    return _ESCAPE_RE.sub(lambda m: _ESCAPES.get(m.group(1), m.group(1)) if m.group(1) is not None else "'", value)
+
+
+def _parse_values(line, pos):
+    """Yield the row tuples of the VALUES list of an INSERT statement"""
+    row = None
+    while pos < len(line):
+        match = _VALUE_RE.match(line, pos)
+        if not match:
+            if not line[pos:].strip():
+                break
+            raise ValueError(f"Unexpected SQL dump syntax: {line[pos:pos + 40]!r}")
+        pos = match.end()
+        kind = match.lastgroup
+        if kind == 'open':
+            row = []
+        elif kind == 'close':
+            yield tuple(row)
+            row = None
+        elif kind == 'end':
+            break
+        elif kind == 'comma':
+            continue
+        elif kind == 'string':
+            row.append(_unescape(match.group('string')))
+        elif kind == 'null':
+            row.append(None)
+        elif kind == 'hex':
+            row.append(bytes.fromhex(match.group('hex')[2:]))
+        else:
+            number = match.group('number')
+            row.append(float(number) if any(c in number for c in '.eE') else int(number))
+
+
+def _open_text(path):
+    """Open a (possibly gzipped) text file for streaming"""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, encoding='utf-8', errors='replace')
+
+
+def iter_dump_events(path):
+    """Stream a mysqldump file as table definitions and rows
+
+    Yields ``('table', name, [(column, mysql_type)])`` for each CREATE TABLE
+    and ``('rows', name, columns or None, rows)`` for each INSERT, holding
+    only one statement in memory at a time.
+    """
+    table = None
+    columns = []
+    with _open_text(path) as dump:
+        for line in dump:
+            if table is not None:
+                column = _COLUMN_DEF_RE.match(line)
+                if column:
+                    columns.append((column.group(1), column.group(2)))
+                elif line.startswith(')'):
+                    yield 'table', table, columns
+                    table, columns = None, []
+                continue
+
+            create = _CREATE_TABLE_RE.match(line)
+            if create:
+                table = create.group(1)
+                continue
+
+            insert = _INSERT_RE.match(line)
+            if insert:
+                names = [name.strip().strip('`') for name in insert.group(2).split(',')] if insert.group(2) else None
+                yield 'rows', insert.group(1), names, list(_parse_values(line.rstrip(), insert.end()))
+
+
+def iter_csv_events(directory):
+    """Stream a directory of CSV table exports as table definitions and rows
+
+    Each ``<table>.csv`` holds a header row; ``\\N`` is read as NULL. Column
+    types come from a ``schema.sql`` (``mysqldump --no-data``) next to the
+    files when there is one.
+    """
+    schema = {}
+    schema_path = os.path.join(directory, 'schema.sql')
+    if os.path.exists(schema_path):
+        schema = {event[1]: dict(event[2]) for event in iter_dump_events(schema_path) if event[0] == 'table'}
+
+    for path in sorted(glob.glob(os.path.join(directory, '*.csv')) + glob.glob(os.path.join(directory, '*.csv.gz'))):
+        table = os.path.basename(path).split('.')[0]
+        with _open_text(path) as export:
+            reader = csv.reader(export)
+            header = next(reader, None)
+            if not header:
+                continue
+            types = schema.get(table, {})
+            yield 'table', table, [(column, types.get(column)) for column in header]
+
+            batch = []
+            for record in reader:
+                batch.append(tuple(None if value == '\\N' else value for value in record))
+                if len(batch) == LOAD_BATCH_SIZE:
+                    yield 'rows', table, header, batch
+                    batch = []
+            if batch:
+                yield 'rows', table, header, batch
+
+
+def _sqlite_type(column, mysql_type):
+    """SQLite column affinity of a source column, so keys compare as numbers"""
+    if mysql_type:
+        mysql_type = mysql_type.lower()
+        if 'int' in mysql_type:
+            return 'INTEGER'
+        if mysql_type in ('decimal', 'numeric', 'float', 'double', 'real'):
+            return 'REAL'
+        return 'TEXT'
+    if column.endswith('_id') or column in INTEGER_COLUMNS:
+        return 'INTEGER'
+    if column in REAL_COLUMNS:
+        return 'REAL'
+    return 'TEXT'
+
+
+def _load_source(events, db_path):
+    """Write the tables and rows of a source into a new SQLite database"""
+    db = sqlite3.connect(db_path)
+    try:
+        db.execute('PRAGMA journal_mode=OFF')
+        db.execute('PRAGMA synchronous=OFF')
+        tables = {}
+        row_count = 0
+        for event in events:
+            if event[0] == 'table':
+                _kind, table, columns = event
+                db.execute(f'DROP TABLE IF EXISTS "{table}"')
+                db.execute(f'CREATE TABLE "{table}" (%s)' % ', '.join(
+                    f'"{column}" {_sqlite_type(column, mysql_type)}' for column, mysql_type in columns
+                ))
+                tables[table] = [column for column, _mysql_type in columns]
+                continue
+
+            _kind, table, names, rows = event
+            if table not in SOURCE_TABLES or table not in tables or not rows:
+                continue
+            names = names or tables[table]
+            db.executemany(
+                f'INSERT INTO "{table}" (%s) VALUES (%s)' % (
+                    ', '.join(f'"{name}"' for name in names), ', '.join('?' * len(names))
+                ),
+                rows
+            )
+            row_count += len(rows)
+
+        # Keyset pages, joins and lookups all go through the id columns
+        for table, columns in tables.items():
+            if table in SOURCE_TABLES:
+                for column in columns:
+                    if column.endswith('_id'):
+                        db.execute(f'CREATE INDEX "{table}_{column}_idx" ON "{table}" ("{column}")')
+        db.commit()
+    finally:
+        db.close()
+    return row_count
+
+
+def get_source_database(source_type, path, cache_dir):
+    """Path of the SQLite copy of an offline source, built on first use
+
+    The copy is rebuilt when the source file (or any file of a CSV
+    directory) changes; older copies of the same source are removed.
+    """
+    path = os.path.abspath(path)
+    files = [path] if source_type == 'dump' else sorted(glob.glob(os.path.join(path, '*')))
+    stamp = ':'.join(f"{f}:{os.path.getmtime(f)}:{os.path.getsize(f)}" for f in files)
+    source_key = hashlib.sha1(f"{source_type}:{path}".encode('utf-8')).hexdigest()[:12]
+    version_key = hashlib.sha1(stamp.encode('utf-8')).hexdigest()[:12]
+    db_path = os.path.join(cache_dir, f"cs_cart_{source_key}_{version_key}.sqlite")
+
+    with _build_lock:
+        if not os.path.exists(db_path):
+            os.makedirs(cache_dir, exist_ok=True)
+            building = f"{db_path}.{os.getpid()}.building"
+            if os.path.exists(building):
+                os.remove(building)
+            events = iter_dump_events(path) if source_type == 'dump' else iter_csv_events(path)
+            row_count = _load_source(events, building)
+            os.replace(building, db_path)
+            _logger.info(f"Loaded {row_count} rows of CS-Cart {source_type} source {path}")
+
+            for old_path in glob.glob(os.path.join(cache_dir, f"cs_cart_{source_key}_*.sqlite")):
+                if old_path != db_path:
+                    os.remove(old_path)
+    return db_path
+
+
+def _concat(*values):
+    """MySQL CONCAT(): NULL when any argument is NULL"""
+    if any(value is None for value in values):
+        return None
+    return ''.join(str(value) for value in values)
+
+
+def _floor(value):
+    return None if value is None else math.floor(value)
+
+
+class FileSourceCursor:
+    """SQLite cursor answering the MySQL connector calls of the migrations"""
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, query, params=None):
+        params = tuple(params or ())
+        show_tables = _SHOW_TABLES_RE.match(query)
+        show_columns = _SHOW_COLUMNS_RE.match(query)
+        show_index = _SHOW_INDEX_RE.match(query)
+        if show_tables:
+            pattern = show_tables.group(1) if show_tables.group(1) is not None else (params[0] if params else '%')
+            self._cursor.execute(
+                "SELECT name AS Tables FROM sqlite_master WHERE type = 'table' AND name LIKE ? ESCAPE '\\'",
+                (pattern,)
+            )
+        elif show_columns:
+            pattern = show_columns.group(2) if show_columns.group(2) is not None else (params[0] if params else '%')
+            self._cursor.execute(
+                "SELECT name AS Field, type AS Type FROM pragma_table_info(?) WHERE name LIKE ? ESCAPE '\\'",
+                (show_columns.group(1), pattern)
+            )
+        elif show_index:
+            self._cursor.execute(
+                "SELECT il.name AS Key_name, ii.seqno + 1 AS Seq_in_index, ii.name AS Column_name "
+                "FROM pragma_index_list(?) il JOIN pragma_index_info(il.name) ii",
+                (show_index.group(1),)
+            )
+        else:
+            self._cursor.execute(query.replace('%s', '?'), params)
+
+    def _convert(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+    def fetchone(self):
+        return self._convert(self._cursor.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._convert(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._convert(row) for row in self._cursor.fetchall()]
+
+    def close(self):
+        self._cursor.close()
+
+
+class FileSourceConnection:
+    """Read-only connection to the SQLite copy of an offline CS-Cart source
+
+    Offers the subset of the MySQL connector API used by the migrations,
+    so they run the same queries whatever the source.
+    """
+
+    def __init__(self, db_path):
+        self._db = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+        self._db.create_function('CONCAT', -1, _concat)
+        self._db.create_function('FLOOR', 1, _floor)
+
+    def cursor(self, dictionary=False, buffered=True):
+        return FileSourceCursor(self._db.cursor(), dictionary)
+
+    def is_connected(self):
+        return self._db is not None
+
+    def commit(self):
+        pass
+
+    def close(self):
+        if self._db is not None:
+            db, self._db = self._db, None
+            db.close()
+
+
+def connect(source_type, path, cache_dir):
+    """Open an offline source, loading it into its SQLite copy first if needed"""
+    return FileSourceConnection(get_source_database(source_type, path, cache_dir))
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools.image import image_process
+import base64
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from .migration_base import MigrationBase, FAST_IMPORT_CONTEXT
+
+_logger = logging.getLogger(__name__)
+
+# Largest image size stored by Odoo, smaller sizes are derived from it
+IMAGE_MAX_SIZE = (1920, 1920)
+
+# Processed images kept across batches, keyed by file checksum
+IMAGE_CACHE_SIZE = 256
+
+
+def _read_image_file(path):
+    """Read an image file in a worker thread; returns (data, sha1) or None when missing"""
+    try:
+        with open(path, 'rb') as image_file:
+            data = image_file.read()
+    except OSError:
+        return None
+    return data, hashlib.sha1(data).hexdigest()
+
+
+def _resize_image(data):
+    """Decode, verify and shrink an image in a worker thread; returns (base64, error)"""
+    try:
+        return base64.b64encode(image_process(data, size=IMAGE_MAX_SIZE, verify_resolution=True)), None
+    except Exception as e:
+        return None, e
+
+
+class ImageMigration(models.Model):
+    _name = 'cs.cart.image.migration'
+    _description = 'CS-Cart Image Migration'
+    _inherit = 'cs.cart.migration.base'
+    
+    def migrate_images(self, connection, batch_size=100, update_existing=True,
+                       extraction_mode='stream', resume_log=None,
+                       changed_since=None, fast_import=False):
+        """Attach CS-Cart product images to the migrated product templates
+        
+        Images have no change timestamp, ``changed_since`` is ignored: the
+        checksum stored on each product skips images that did not change.
+        """
+        if fast_import:
+            self = self.with_context(**FAST_IMPORT_CONTEXT)
+        
+        from mysql.connector import Error
+        
+        images_root = self._get_images_root(connection)
+        log = resume_log or self._create_migration_log(
+            connection, 'image', batch_size=batch_size,
+            update_existing=update_existing, extraction_mode=extraction_mode,
+            fast_import=fast_import
+        )
+        image_cache = OrderedDict()
+        migrated_products = []
+        
+        try:
+            conn = connection.get_connection()
+            
+            query = self._get_cs_cart_query(connection, 'images', conn)
+            
+            # A resumed run keeps the total counted when it started
+            if not resume_log:
+                log.total_records = self._count_cs_cart_rows(conn, query, distinct_key='product_id')
+                self._update_migration_log(log, processed_records=0)
+                self.env.cr.commit()
+            
+            i = log.processed_records
+            self._report_progress(log)
+            chunks = self._iter_cs_cart_chunks(
+                connection, conn, query, 'il.object_id', None,
+                batch_size, extraction_mode, fan_out=True,
+                start_after=log.checkpoint_key, end_at=log.shard_key_to
+            )
+            with ThreadPoolExecutor(max_workers=connection.image_workers,
+                                    thread_name_prefix='cs_cart_images') as executor:
+                for products in self._group_cs_cart_rows(chunks, 'product_id', {
+                    'main_image_file': 'main_image_files',
+                    'image_file': 'image_files',
+                }):
+                    migrated_products.extend(self._migrate_image_chunk(
+                        log, products, images_root, executor, image_cache, update_existing
+                    ))
+                    
+                    i += len(products)
+                    log.processed_records = i
+                    self._save_checkpoint(log, products, 'product_id')
+                    
+                    # Batch commit
+                    self.env.cr.commit()
+                    _logger.info(f"Processed images of {i} products")
+                    self._report_progress(log)
+            
+            # Update log
+            self._update_migration_log(log,
+                status='completed' if log.failed_records == 0 else 'partial',
+                details=f"Successfully attached images to {len(migrated_products)} products "
+                        f"({log.deduplicated_images} duplicate files, {log.missing_images} missing files)"
+            )
+            
+            _logger.info(f"Image migration completed: {len(migrated_products)} products")
+        
+        except Error as e:
+            self._update_migration_log(log,
+                status='failed',
+                error_message=f"Database error: {str(e)}"
+            )
+            raise UserError(_('Image migration failed: %s') % str(e))
+        except Exception as e:
+            self._update_migration_log(log,
+                status='failed',
+                error_message=f"Unexpected error: {str(e)}"
+            )
+            raise UserError(_('Image migration failed: %s') % str(e))
+        finally:
+            if 'conn' in locals():
+                conn.close()
+        
+        return migrated_products
+    
+    def _get_images_root(self, connection):
+        """Directory holding the CS-Cart detailed product images"""
+        if not connection.images_path:
+            raise UserError(_('Set the CS-Cart images directory on the connection to import images'))
+        if not os.path.isdir(connection.images_path):
+            raise UserError(_('CS-Cart images directory not found: %s') % connection.images_path)
+        
+        # The store's images/ folder or its detailed/ sub folder may be given
+        detailed = os.path.join(connection.images_path, 'detailed')
+        return detailed if os.path.isdir(detailed) else connection.images_path
+    
+    def _migrate_image_chunk(self, log, products, images_root, executor, image_cache, update_existing=True):
+        """Read, deduplicate, resize and attach the images of a chunk of products
+        
+        Files are read and checksummed, then every distinct file is decoded
+        and resized, in the worker threads; only the record writes run in the
+        ORM. Products whose combined image checksum did not change are not
+        written; products the database rejects are isolated by bisecting the
+        batch. Returns the ids of the product templates written.
+        """
+        Template = self.env['product.template']
+        existing_map, _fingerprints = self._get_existing_map(
+            'product.template', [prod['product_id'] for prod in products], log
+        )
+        stored_checksums = {
+            rec['id']: rec['cs_cart_image_checksum']
+            for rec in Template.browse(list(existing_map.values())).read(['cs_cart_image_checksum'])
+        }
+        
+        # Image files of each migrated product, main image first
+        product_files = {}
+        for prod in products:
+            if prod['product_id'] in existing_map:
+                main = prod['main_image_files'][:1]
+                product_files[prod['product_id']] = main + [f for f in prod['image_files'] if f not in main]
+        
+        paths = sorted({path for files in product_files.values() for path in files})
+        read = dict(zip(paths, executor.map(
+            lambda path: _read_image_file(os.path.join(images_root, path)), paths
+        )))
+        
+        targets = {}
+        to_resize = {}
+        for product_id, files in product_files.items():
+            found = [read[path] for path in files if read[path]]
+            log.missing_images += len(files) - len(found)
+            if not found:
+                continue
+            
+            template_id = existing_map[product_id]
+            file_checksums = [file_checksum for _data, file_checksum in found]
+            checksum = hashlib.sha1(' '.join(file_checksums).encode('utf-8')).hexdigest()
+            stored = stored_checksums.get(template_id)
+            if stored == checksum or (stored and not update_existing):
+                log.unchanged_records += 1
+                continue
+            
+            targets[product_id] = (template_id, checksum, file_checksums)
+            for data, file_checksum in found:
+                if file_checksum in image_cache or file_checksum in to_resize:
+                    log.deduplicated_images += 1
+                else:
+                    to_resize[file_checksum] = data
+        
+        images = {file_checksum: image_cache[file_checksum] for file_checksum in image_cache}
+        resize_errors = {}
+        for file_checksum, (image, error) in zip(to_resize, executor.map(_resize_image, to_resize.values())):
+            if error:
+                resize_errors[file_checksum] = error
+                continue
+            images[file_checksum] = image_cache[file_checksum] = image
+            image_cache.move_to_end(file_checksum)
+            if len(image_cache) > IMAGE_CACHE_SIZE:
+                image_cache.popitem(last=False)
+        
+        errors = []
+        to_write = []
+        for product_id, (template_id, checksum, file_checksums) in targets.items():
+            error = next((resize_errors[c] for c in file_checksums if c in resize_errors), None)
+            if error:
+                errors.append((product_id, error))
+                continue
+            to_write.append((product_id, template_id, checksum, file_checksums))
+        
+        written = []
+        if to_write:
+            started = time.perf_counter()
+            batch_written, failed = self._load_bisecting(
+                to_write, lambda part: self._write_image_batch(part, images)
+            )
+            log.load_duration += time.perf_counter() - started
+            written = list(batch_written.values())
+            log.successful_records += len(written)
+            errors.extend((target[0], e) for target, e in failed)
+        
+        for product_id, error in errors:
+            self._handle_migration_error(log, error, product_id)
+        
+        return written
+    
+    def _write_image_batch(self, targets, images):
+        """Write the images of a batch of product templates
+        
+        ``targets`` holds (CS-Cart product id, template id, combined checksum,
+        file checksums) tuples, main image first. Returns the CS-Cart
+        product id -> template id mapping of the written products.
+        """
+        Template = self.env['product.template']
+        writes = {}
+        extra_images = {}
+        for _product_id, template_id, checksum, file_checksums in targets:
+            writes.setdefault((file_checksums[0], checksum), []).append(template_id)
+            extra_images[template_id] = file_checksums[1:]
+        
+        # Products sharing the same images are written together
+        for (main_checksum, checksum), template_ids in writes.items():
+            Template.browse(template_ids).write({
+                'image_1920': images[main_checksum],
+                'cs_cart_image_checksum': checksum,
+            })
+        if 'product.image' in self.env:
+            self._load_extra_images(extra_images, images)
+        return {product_id: template_id for product_id, template_id, _checksum, _files in targets}
+    
+    def _load_extra_images(self, extra_images, images):
+        """Replace the additional images of product templates (website_sale)"""
+        templates = self.env['product.template'].browse(list(extra_images))
+        templates.product_template_image_ids.unlink()
+        self.env['product.image'].create([
+            {
+                'name': template.name,
+                'product_tmpl_id': template.id,
+                'image_1920': images[file_checksum],
+            }
+            for template in templates
+            for file_checksum in extra_images[template.id]
+        ])
\ No newline at end of file
@@ -1,5 +1,10 @@
 from . import cs_cart_config
+from . import cs_cart_fields
 from . import migration_base
 from . import product_migration
 from . import category_migration
-from . import partner_migration
\ No newline at end of file
+from . import partner_migration
+from . import image_migration
+from . import inventory_migration
+from . import order_migration
+from . import benchmark
\ No newline at end of file
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools import float_compare
+import logging
+import time
+from .migration_base import MigrationBase, FAST_IMPORT_CONTEXT
+
+_logger = logging.getLogger(__name__)
+
+class InventoryMigration(models.Model):
+    _name = 'cs.cart.inventory.migration'
+    _description = 'CS-Cart Inventory Migration'
+    _inherit = 'cs.cart.migration.base'
+    
+    def migrate_inventory(self, connection, location, batch_size=100, update_existing=True,
+                          extraction_mode='stream', resume_log=None,
+                          changed_since=None, fast_import=False):
+        """Set the on hand quantity of migrated products from CS-Cart stock amounts
+        
+        Each batch is applied as one inventory adjustment at ``location``:
+        quants are created or updated together and their moves are validated
+        in a single call.
+        """
+        if fast_import:
+            self = self.with_context(**FAST_IMPORT_CONTEXT)
+        
+        import mysql.connector
+        from mysql.connector import Error
+        
+        log = resume_log or self._create_migration_log(
+            connection, 'inventory', batch_size=batch_size,
+            update_existing=update_existing, extraction_mode=extraction_mode,
+            changed_since=changed_since, fast_import=fast_import,
+            location_id=location.id
+        )
+        adjusted_products = []
+        
+        try:
+            conn = connection.get_connection()
+            
+            query = self._get_cs_cart_query(connection, 'inventory', conn)
+            query, params = self._filter_changed_since(connection, query, None, 'inventory', changed_since)
+            
+            # A resumed run keeps the total counted when it started
+            if not resume_log:
+                log.total_records = self._count_cs_cart_rows(conn, query, params)
+                self._update_migration_log(log, processed_records=0)
+                self.env.cr.commit()
+            
+            i = log.processed_records
+            self._report_progress(log)
+            for stock_rows in self._iter_cs_cart_chunks(
+                connection, conn, query, 'p.product_id', params,
+                batch_size=batch_size, extraction_mode=extraction_mode,
+                start_after=log.checkpoint_key, end_at=log.shard_key_to
+            ):
+                adjusted_products.extend(
+                    self._migrate_inventory_chunk(log, stock_rows, location, update_existing)
+                )
+                
+                i += len(stock_rows)
+                log.processed_records = i
+                self._save_checkpoint(log, stock_rows, 'product_id')
+                
+                # Batch commit
+                self.env.cr.commit()
+                _logger.info(f"Processed stock of {i} products")
+                self._report_progress(log)
+            
+            # Update log
+            self._update_migration_log(log,
+                status='completed' if log.failed_records == 0 else 'partial',
+                details=f"Successfully adjusted stock of {len(adjusted_products)} products "
+                        f"in {location.complete_name}"
+            )
+            
+            _logger.info(f"Inventory migration completed: {len(adjusted_products)} products")
+        
+        except Error as e:
+            self._update_migration_log(log,
+                status='failed',
+                error_message=f"Database error: {str(e)}"
+            )
+            raise UserError(_('Inventory migration failed: %s') % str(e))
+        except Exception as e:
+            self._update_migration_log(log,
+                status='failed',
+                error_message=f"Unexpected error: {str(e)}"
+            )
+            raise UserError(_('Inventory migration failed: %s') % str(e))
+        finally:
+            if 'conn' in locals():
+                conn.close()
+        
+        return adjusted_products
+    
+    def _migrate_inventory_chunk(self, log, stock_rows, location, update_existing=True):
+        """Apply the stock amounts of a chunk of CS-Cart products as one adjustment
+        
+        The quant without lot, package or owner of each product is set so
+        that the product's total at ``location`` equals the CS-Cart amount;
+        products already at that quantity are left alone. Products whose
+        adjustment the database rejects are isolated by bisecting the batch.
+        Returns the ids of the adjusted product variants.
+        """
+        Quant = self.env['stock.quant'].with_context(inventory_mode=True)
+        existing_map, _fingerprints = self._get_existing_map(
+            'product.template', [row['product_id'] for row in stock_rows], log
+        )
+        variant_map = self._get_variant_map(list(existing_map.values()), storable=True)
+        
+        targets = {}
+        errors = []
+        for row in stock_rows:
+            variant_id = variant_map.get(existing_map.get(row['product_id']))
+            if not variant_id:
+                # Product not migrated (or not storable), nothing to stock
+                continue
+            try:
+                targets[variant_id] = (row['product_id'], float(row.get('amount') or 0))
+            except (TypeError, ValueError) as e:
+                errors.append((row['product_id'], e))
+        
+        # Quants of the whole chunk at the target location, in one query
+        totals = dict.fromkeys(targets, 0.0)
+        plain_quants = {}
+        for quant in Quant.search([('product_id', 'in', list(targets)), ('location_id', '=', location.id)]):
+            totals[quant.product_id.id] += quant.quantity
+            if not quant.lot_id and not quant.package_id and not quant.owner_id:
+                plain_quants[quant.product_id.id] = quant
+        
+        adjustments = []
+        for variant_id, (product_id, amount) in targets.items():
+            rounding = self.env['product.product'].browse(variant_id).uom_id.rounding
+            if float_compare(totals[variant_id], amount, precision_rounding=rounding) == 0:
+                log.unchanged_records += 1
+                continue
+            if totals[variant_id] and not update_existing:
+                log.unchanged_records += 1
+                continue
+            
+            quant = plain_quants.get(variant_id)
+            counted = amount - totals[variant_id] + (quant.quantity if quant else 0.0)
+            adjustments.append((product_id, variant_id, quant, counted))
+        
+        adjusted = []
+        if adjustments:
+            started = time.perf_counter()
+            batch_adjusted, failed = self._load_bisecting(
+                adjustments, lambda part: self._apply_inventory_batch(part, location)
+            )
+            log.load_duration += time.perf_counter() - started
+            adjusted = list(batch_adjusted.values())
+            log.successful_records += len(adjusted)
+            errors.extend((adjustment[0], e) for adjustment, e in failed)
+        
+        for product_id, error in errors:
+            self._handle_migration_error(log, error, product_id)
+        
+        return adjusted
+    
+    def _apply_inventory_batch(self, adjustments, location):
+        """Count the quants of a batch of products and apply them as one adjustment
+        
+        ``adjustments`` holds (CS-Cart product id, variant id, quant or None,
+        counted quantity) tuples. Moves are created and validated together.
+        Returns the CS-Cart product id -> adjusted variant id mapping.
+        """
+        Quant = self.env['stock.quant'].with_context(inventory_mode=True)
+        quants = Quant.browse()
+        to_create = []
+        for _product_id, variant_id, quant, counted in adjustments:
+            if quant:
+                quant.inventory_quantity = counted
+                quants |= quant
+            else:
+                to_create.append({
+                    'product_id': variant_id,
+                    'location_id': location.id,
+                    'inventory_quantity': counted,
+                })
+        if to_create:
+            quants |= Quant.create(to_create)
+        quants._apply_inventory()
+        return {product_id: variant_id for product_id, variant_id, _quant, _counted in adjustments}
\ No newline at end of file
@@ -1,11 +1,35 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+import calendar
+import hashlib
+import json
 import logging
+from collections import Counter, defaultdict
+import re
+import time
 from datetime import datetime
 
 _logger = logging.getLogger(__name__)
 
+# Seconds re-read before a delta sync watermark, covering clock skew
+DELTA_SYNC_OVERLAP = 300
+
+# Context of fast imports: no tracking, chatter messages, follower
+# subscriptions or password reset mails for the imported records
+FAST_IMPORT_CONTEXT = {
+    'tracking_disable': True,
+    'mail_create_nolog': True,
+    'mail_create_nosubscribe': True,
+    'mail_notrack': True,
+    'mail_auto_subscribe_no_notify': True,
+    'no_reset_password': True,
+}
+
+# Throughput baseline (monotonic time, processed records) of the runs of
+# this process, keyed by (database, log id)
+_progress_baselines = {}
+
 class CsCartMigrationLog(models.Model):
     _name = 'cs.cart.migration.log'
     _description = 'CS-Cart Migration Log'
@@ -24,6 +48,8 @@ class CsCartMigrationLog(models.Model):
         ('product', 'Products'),
         ('customer', 'Customers'),
         ('supplier', 'Suppliers'),
+        ('image', 'Product Images'),
+        ('inventory', 'Inventory'),
         ('order', 'Orders'),
         ('full', 'Full Migration'),
     ], string='Migration Type', required=True)
@@ -45,9 +71,97 @@ class CsCartMigrationLog(models.Model):
     successful_records = fields.Integer(string='Successful Records')
     failed_records = fields.Integer(string='Failed Records')
     
+    unchanged_records = fields.Integer(
+        string='Unchanged Records',
+        help="Existing records skipped because their CS-Cart values did not change"
+    )
+    
+    load_duration = fields.Float(
+        string='Load Time (seconds)',
+        help="Time spent creating and writing Odoo records, flushes included"
+    )
+    load_ms_per_record = fields.Float(
+        string='Load Cost (ms/record)',
+        compute='_compute_load_ms_per_record'
+    )
+    
+    translated_records = fields.Integer(
+        string='Translations',
+        help="Record translations written, one per record and language"
+    )
+    missing_images = fields.Integer(string='Missing Image Files')
+    deduplicated_images = fields.Integer(
+        string='Duplicate Image Files',
+        help="Image files identical to one already processed in the run, reused without decoding"
+    )
+    
+    lookup_count = fields.Integer(string='Existence Lookups')
+    lookup_duration = fields.Float(string='Lookup Time (seconds)')
+    lookups_per_second = fields.Float(
+        string='Lookups per Second',
+        compute='_compute_lookups_per_second'
+    )
+    
+    location_hits = fields.Integer(string='Location Index Hits')
+    location_misses = fields.Integer(string='Location Index Misses')
+    
+    # Run parameters, kept so an interrupted run can be resumed as started
+    lang_code = fields.Char(string='Language Code')
+    batch_size = fields.Integer(string='Batch Size')
+    update_existing = fields.Boolean(string='Update Existing Records')
+    extraction_mode = fields.Char(string='Extraction Mode')
+    fast_import = fields.Boolean(string='Fast Import')
+    location_id = fields.Many2one('stock.location', string='Inventory Location')
+    translation_langs = fields.Char(string='Translation Languages')
+    changed_since = fields.Integer(
+        string='Changed Since (Unix Time)',
+        help="Delta sync watermark: only source rows changed after it are imported"
+    )
+    
+    # Checkpoint saved at every batch commit
+    checkpoint_key = fields.Integer(
+        string='Checkpoint Key',
+        help="Last CS-Cart source key whose batch was committed"
+    )
+    checkpoint_phase = fields.Selection([
+        ('start', 'Started'),
+        ('load', 'Loading'),
+        ('done', 'Finished'),
+    ], string='Checkpoint Phase', default='start')
+    checkpoint_date = fields.Datetime(string='Checkpoint Date')
+    
+    # Sharded runs: the parent log aggregates one child log per key range
+    parent_id = fields.Many2one(
+        'cs.cart.migration.log',
+        string='Parent Migration',
+        ondelete='cascade',
+        index=True
+    )
+    shard_ids = fields.One2many(
+        'cs.cart.migration.log',
+        'parent_id',
+        string='Shards'
+    )
+    shard_key_to = fields.Integer(
+        string='Shard Last Key',
+        help="Inclusive upper bound of the source key range handled by this shard"
+    )
+    wizard_id = fields.Integer(
+        string='Migration Wizard',
+        index=True,
+        help="Migration wizard whose run started this migration, its progress events are only shown there"
+    )
+    
     error_message = fields.Text(string='Error Message')
     details = fields.Text(string='Migration Details')
     
+    error_ids = fields.One2many('cs.cart.migration.error', 'log_id', string='Record Errors')
+    error_counts = fields.Json(
+        string='Error Counts',
+        help="Number of failed records per error class, shards included"
+    )
+    error_summary = fields.Text(string='Errors by Class', compute='_compute_error_summary')
+    
     # Related fields for quick access
     product_count = fields.Integer(string='Products Migrated', compute='_compute_counts')
     category_count = fields.Integer(string='Categories Migrated', compute='_compute_counts')
@@ -63,6 +177,30 @@ class CsCartMigrationLog(models.Model):
             else:
                 log.duration = 0.0
     
+    @api.depends('lookup_count', 'lookup_duration')
+    def _compute_lookups_per_second(self):
+        for log in self:
+            if log.lookup_duration:
+                log.lookups_per_second = log.lookup_count / log.lookup_duration
+            else:
+                log.lookups_per_second = 0.0
+    
+    @api.depends('load_duration', 'successful_records')
+    def _compute_load_ms_per_record(self):
+        for log in self:
+            if log.successful_records:
+                log.load_ms_per_record = log.load_duration * 1000 / log.successful_records
+            else:
+                log.load_ms_per_record = 0.0
+    
+    @api.depends('error_counts')
+    def _compute_error_summary(self):
+        for log in self:
+            counts = Counter(log.error_counts or {})
+            log.error_summary = '\n'.join(
+                f"{error_class}: {count}" for error_class, count in counts.most_common()
+            )
+    
     def _compute_counts(self):
         # This would be implemented to count actual migrated records
         pass
@@ -78,27 +216,321 @@ class CsCartMigrationLog(models.Model):
             'target': 'current',
         }
     
+    def action_view_errors(self):
+        """Record errors of this run, shards included"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Record Errors'),
+            'res_model': 'cs.cart.migration.error',
+            'view_mode': 'tree,form',
+            'domain': [('log_id', 'in', (self | self.shard_ids).ids)],
+            'context': {'group_by': 'error_class'},
+        }
+    
     def action_retry(self):
+        """Resume an interrupted migration from its last checkpoint"""
         self.ensure_one()
-        # Implement retry logic
-        pass
+        if self.migration_type not in self._get_migration_runners():
+            raise UserError(_('%s migrations cannot be resumed') % dict(
+                self._fields['migration_type'].selection).get(self.migration_type))
+        if self.checkpoint_phase == 'done':
+            raise UserError(_('This migration has already finished'))
+        
+        if self.shard_ids:
+            self._resume_shards()
+        else:
+            self.write({'status': 'in_progress', 'end_date': False})
+            self.with_delay()._resume_migration()
+        return self.action_view_details()
+    
+    def _resume_shards(self):
+        """Enqueue a job for every shard of this run that has not finished"""
+        self.write({'status': 'in_progress', 'end_date': False})
+        for shard in self.shard_ids.filtered(lambda s: s.checkpoint_phase != 'done'):
+            shard.write({'status': 'in_progress', 'end_date': False})
+            shard.with_delay()._resume_migration()
+    
+    def _aggregate_shards(self):
+        """Sum the shard counters into the parent log and close it when all shards ended
+        
+        Runs as its own job, queued by every shard that ends, so it reads the
+        committed state of all shards. The parent row is locked: concurrent
+        aggregations are serialized, and the one failing on the concurrent
+        update is retried by the job queue with a fresh snapshot.
+        """
+        self.ensure_one()
+        self.env.cr.execute("SELECT id FROM cs_cart_migration_log WHERE id = %s FOR UPDATE", (self.id,))
+        shards = self.shard_ids
+        self.write({
+            'processed_records': sum(shards.mapped('processed_records')),
+            'successful_records': sum(shards.mapped('successful_records')),
+            'failed_records': sum(shards.mapped('failed_records')),
+            'unchanged_records': sum(shards.mapped('unchanged_records')),
+            'lookup_count': sum(shards.mapped('lookup_count')),
+            'lookup_duration': sum(shards.mapped('lookup_duration')),
+            'load_duration': sum(shards.mapped('load_duration')),
+            'translated_records': sum(shards.mapped('translated_records')),
+            'location_hits': sum(shards.mapped('location_hits')),
+            'location_misses': sum(shards.mapped('location_misses')),
+            'error_counts': dict(sum((Counter(shard.error_counts or {}) for shard in shards), Counter())),
+        })
+        
+        if self.status != 'in_progress' or any(shard.status == 'in_progress' for shard in shards):
+            return
+        if any(shard.status == 'failed' for shard in shards):
+            status = 'failed'
+        elif self.failed_records:
+            status = 'partial'
+        else:
+            status = 'completed'
+        self.env['cs.cart.migration.base']._update_migration_log(
+            self, status=status,
+            details=f"{len(shards)} shards, {self.successful_records} records migrated"
+        )
+    
+    def _get_migration_runners(self):
+        """Migration model and method for each resumable migration type"""
+        return {
+            'category': ('cs.cart.category.migration', 'migrate_categories'),
+            'product': ('cs.cart.product.migration', 'migrate_products'),
+            'customer': ('cs.cart.partner.migration', 'migrate_customers'),
+            'supplier': ('cs.cart.partner.migration', 'migrate_suppliers'),
+            'image': ('cs.cart.image.migration', 'migrate_images'),
+            'inventory': ('cs.cart.inventory.migration', 'migrate_inventory'),
+            'order': ('cs.cart.order.migration', 'migrate_orders'),
+        }
+    
+    def _resume_migration(self):
+        """Background job continuing the migration after the checkpoint key"""
+        model_name, method = self._get_migration_runners()[self.migration_type]
+        kwargs = {
+            'batch_size': self.batch_size or 100,
+            'update_existing': self.update_existing,
+            'extraction_mode': self.extraction_mode or 'stream',
+            'resume_log': self,
+            'changed_since': self.changed_since or None,
+            'fast_import': self.fast_import,
+        }
+        if self.migration_type in ('category', 'product'):
+            kwargs['lang_code'] = self.lang_code or self.connection_id.language_code
+            kwargs['translation_langs'] = self.translation_langs
+        if self.migration_type == 'inventory':
+            kwargs['location'] = self.location_id
+        return getattr(self.env[model_name], method)(self.connection_id, **kwargs)
+
+class CsCartMigrationError(models.Model):
+    _name = 'cs.cart.migration.error'
+    _description = 'CS-Cart Migration Record Error'
+    _order = 'id'
+    _rec_name = 'source_id'
+    
+    log_id = fields.Many2one(
+        'cs.cart.migration.log',
+        string='Migration Log',
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+    entity = fields.Selection(
+        selection=lambda self: self.env['cs.cart.migration.log']._fields['migration_type'].selection,
+        string='Entity'
+    )
+    source_id = fields.Char(string='CS-Cart ID', index=True)
+    error_class = fields.Char(string='Error Class', index=True)
+    message = fields.Text(string='Message')
+
+class CsCartMigrationProgress(models.Model):
+    _name = 'cs.cart.migration.progress'
+    _description = 'CS-Cart Migration Progress'
+    _order = 'id'
+    
+    # Only ever written through a separate cursor, the import transaction
+    # never locks these rows
+    log_id = fields.Many2one(
+        'cs.cart.migration.log',
+        string='Migration Log',
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+    migration_type = fields.Selection(
+        selection=lambda self: self.env['cs.cart.migration.log']._fields['migration_type'].selection,
+        string='Entity'
+    )
+    processed_records = fields.Integer(string='Processed Records')
+    total_records = fields.Integer(string='Total Records')
+    rows_per_second = fields.Float(string='Records per Second')
+    eta_seconds = fields.Float(string='Time Left (seconds)')
+    
+    _sql_constraints = [
+        ('log_uniq', 'unique(log_id)', 'A migration log has a single progress record'),
+    ]
 
 class MigrationBase(models.AbstractModel):
     _name = 'cs.cart.migration.base'
     _description = 'CS-Cart Migration Base Class'
     
-    def _create_migration_log(self, connection, migration_type, total_records=0):
-        """Create a new migration log entry"""
-        return self.env['cs.cart.migration.log'].create({
-            'connection_id': connection.id,
-            'migration_type': migration_type,
-            'status': 'in_progress',
-            'start_date': fields.Datetime.now(),
-            'total_records': total_records,
-        })
+    def _create_migration_log(self, connection, migration_type, total_records=0, **params):
+        """Create a new migration log entry
+        
+        ``params`` holds the run parameters (lang_code, batch_size,
+        update_existing, extraction_mode) needed to resume the run later.
+        Runs started by the migration wizard carry its id in the
+        ``cs_cart_wizard_id`` context key.
+        """
+        return self.env['cs.cart.migration.log'].create(dict(
+            params,
+            wizard_id=self.env.context.get('cs_cart_wizard_id', 0),
+            connection_id=connection.id,
+            migration_type=migration_type,
+            status='in_progress',
+            start_date=fields.Datetime.now(),
+            total_records=total_records,
+        ))
+    
+    def _start_sharded_migration(self, connection, migration_type, query_type, query, key_column,
+                                 params=None, shard_count=4, **run_params):
+        """Split a migration into source key ranges, each run by its own background job
+        
+        A parent log aggregates the counters of one child log per range. Each
+        child starts as a resumable log whose checkpoint is the range start, so
+        shards run (and resume) through the regular ``_resume_migration`` path.
+        Returns the parent log.
+        """
+        conn = connection.get_connection()
+        try:
+            query, params = self._filter_changed_since(
+                connection, query, params, query_type, run_params.get('changed_since')
+            )
+            ranges = self._get_shard_ranges(conn, query, key_column, params, shard_count)
+        finally:
+            conn.close()
+        
+        parent = self._create_migration_log(
+            connection, migration_type,
+            total_records=sum(count for _lo, _hi, count in ranges),
+            **run_params
+        )
+        for start_after, end_at, count in ranges:
+            self._create_migration_log(
+                connection, migration_type, total_records=count,
+                parent_id=parent.id, checkpoint_key=start_after, shard_key_to=end_at,
+                **run_params
+            )
+        
+        # Shard jobs run in their own transactions and must see their logs
+        self.env.cr.commit()
+        for shard in parent.shard_ids:
+            shard.with_delay()._resume_migration()
+        
+        _logger.info(f"Started {len(ranges)} {migration_type} shards for log {parent.id}")
+        return parent
+    
+    def _get_changed_since(self, connection, migration_type):
+        """Delta sync watermark of an entity as a Unix timestamp
+        
+        The watermark is the start of the last completed run of the entity
+        (a sharded run counts once all its shards completed), minus a small
+        overlap for clock skew between the Odoo and CS-Cart servers. Partial
+        runs do not count, so their failed rows are read again. Returns None
+        when the entity never completed, i.e. a full import is needed.
+        """
+        last_log = self.env['cs.cart.migration.log'].search([
+            ('connection_id', '=', connection.id),
+            ('migration_type', '=', migration_type),
+            ('status', '=', 'completed'),
+            ('parent_id', '=', False),
+        ], order='start_date desc', limit=1)
+        if not last_log.start_date:
+            return None
+        return calendar.timegm(last_log.start_date.timetuple()) - DELTA_SYNC_OVERLAP
+    
+    def _get_timestamp_columns(self, query_type):
+        """Source tables and columns holding the change time of each entity"""
+        return {
+            'products': [('cscart_products', 'p.timestamp'), ('cscart_products', 'p.updated_timestamp')],
+            'categories': [('cscart_categories', 'c.timestamp'), ('cscart_categories', 'c.updated_timestamp')],
+            'inventory': [('cscart_products', 'p.timestamp'), ('cscart_products', 'p.updated_timestamp')],
+            'orders': [('cscart_orders', 'o.timestamp')],
+            'customers': [('cscart_users', 'u.timestamp')],
+            'suppliers': [('cscart_users', 'u.timestamp')],
+        }.get(query_type, [])
+    
+    def _filter_changed_since(self, connection, query, params, query_type, changed_since):
+        """Restrict a source query to the rows changed after ``changed_since``
+        
+        Only the timestamp columns that exist on this CS-Cart database are
+        used (``updated_timestamp`` is missing on older versions).
+        """
+        if not changed_since:
+            return query, params
+        
+        profile = connection._get_schema_profile()
+        columns = [
+            column for table, column in self._get_timestamp_columns(query_type)
+            if profile.has_column(table, column.split('.')[-1])
+        ]
+        if not columns:
+            raise UserError(_('CS-Cart %s have no timestamp column, delta sync is not possible') % query_type)
+        
+        condition = ' OR '.join(f"{column} > %s" for column in columns)
+        base, order_by = self._split_order_by(query)
+        query = f"{base} AND ({condition}) {order_by}"
+        return query, tuple(params or ()) + (changed_since,) * len(columns)
+    
+    def _get_shard_ranges(self, conn, query, key_column, params=None, shard_count=4):
+        """Split the key space of a source query into equal-width ranges
+        
+        Returns ``(start_after, end_at, record_count)`` tuples covering every
+        row with ``start_after < key <= end_at``; empty ranges are dropped.
+        """
+        key = key_column.split('.')[-1]
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT MIN({key}), MAX({key}) FROM ({query}) AS cs_cart_src", params)
+            min_key, max_key = cursor.fetchone()
+            if min_key is None:
+                return []
+            
+            width = max(-(-(max_key - min_key + 1) // shard_count), 1)
+            cursor.execute(
+                f"SELECT FLOOR(({key} - %s) / %s) AS shard, COUNT(DISTINCT {key}) "
+                f"FROM ({query}) AS cs_cart_src GROUP BY shard",
+                tuple(params or ()) + (min_key, width)
+            )
+            counts = {int(shard): count for shard, count in cursor.fetchall()}
+        finally:
+            cursor.close()
+        
+        return [
+            (min_key - 1 + shard * width, min(min_key - 1 + (shard + 1) * width, max_key), count)
+            for shard, count in sorted(counts.items())
+        ]
+    
+    def _save_checkpoint(self, log, rows, key):
+        """Record the resume point of a batch that is about to be committed
+        
+        ``rows`` hold complete records (one row per key, or records grouped
+        by ``_group_cs_cart_rows``, which holds back a record until all its
+        rows were read), so the checkpoint is the last fully processed key
+        and a resumed run reads the keys after it.
+        """
+        log.checkpoint_key = max(row[key] for row in rows)
+        log.checkpoint_phase = 'load'
+        log.checkpoint_date = fields.Datetime.now()
     
     def _update_migration_log(self, log, **kwargs):
-        """Update migration log with progress"""
+        """Update migration log with progress
+        
+        A failing shard is committed right away: its job is rolled back once
+        the error is raised, which would lose both the failure and the
+        aggregation of its parent. The unfinished batch is rolled back first.
+        """
+        fail_shard = kwargs.get('status') == 'failed' and log.parent_id
+        if fail_shard:
+            self.env.cr.rollback()
+        
         if 'processed_records' in kwargs:
             log.processed_records = kwargs['processed_records']
         if 'successful_records' in kwargs:
@@ -115,6 +547,60 @@ class MigrationBase(models.AbstractModel):
         # If completed or failed, set end date
         if kwargs.get('status') in ['completed', 'failed', 'partial']:
             log.end_date = fields.Datetime.now()
+            _progress_baselines.pop((self.env.cr.dbname, log.id), None)
+            if log.parent_id:
+                # Queued with this transaction, it sees the shard's final state
+                log.parent_id.with_delay()._aggregate_shards()
+        if kwargs.get('status') in ['completed', 'partial']:
+            log.checkpoint_phase = 'done'
+        if fail_shard:
+            self.env.cr.commit()
+    
+    def _report_progress(self, log):
+        """Publish the record counts, throughput and ETA of a run, once per batch
+        
+        Progress goes through a separate short-lived cursor into
+        cs.cart.migration.progress, so it is visible right away without
+        committing the import transaction. Throughput is measured from the
+        first report of the run in this process.
+        """
+        now = time.monotonic()
+        started, start_records = _progress_baselines.setdefault(
+            (self.env.cr.dbname, log.id), (now, log.processed_records)
+        )
+        elapsed = now - started
+        rate = (log.processed_records - start_records) / elapsed if elapsed > 0 else 0.0
+        remaining = max(log.total_records - log.processed_records, 0)
+        vals = {
+            'migration_type': log.migration_type,
+            'processed_records': log.processed_records,
+            'total_records': log.total_records,
+            'rows_per_second': rate,
+            'eta_seconds': remaining / rate if rate else 0.0,
+        }
+        
+        try:
+            with self.env.registry.cursor() as cr:
+                Progress = self.env(cr=cr, su=True)['cs.cart.migration.progress']
+                progress = Progress.search([('log_id', '=', log.id)], limit=1)
+                if progress:
+                    progress.write(vals)
+                else:
+                    Progress.create(dict(vals, log_id=log.id))
+                # Pushed with the progress write, watchers never poll
+                log.connection_id.with_env(Progress.env)._send_progress_event({
+                    'type': 'entity',
+                    'wizard_id': log.wizard_id,
+                    'log_id': log.id,
+                    'entity': dict(log._fields['migration_type'].selection).get(log.migration_type),
+                    'processed': vals['processed_records'],
+                    'total': vals['total_records'],
+                    'rate': round(vals['rows_per_second'], 1),
+                    'eta': round(vals['eta_seconds']),
+                })
+        except Exception as e:
+            # Progress is informative only, it never stops an import
+            _logger.warning(f"Could not report progress of migration log {log.id}: {str(e)}")
     
     def _handle_migration_error(self, log, error, record_id=None):
         """Handle migration errors gracefully"""
@@ -122,86 +608,620 @@ class MigrationBase(models.AbstractModel):
         
         if log:
             log.failed_records += 1
-            error_details = f"Record ID: {record_id}\nError: {str(error)}\n"
-            if log.error_message:
-                log.error_message += "\n---\n" + error_details
-            else:
-                log.error_message = error_details
+            self._buffer_migration_error(log, error, record_id)
         
         # You can implement email notification here if needed
     
+    def _buffer_migration_error(self, log, error, record_id=None):
+        """Queue a record error, inserted with the others of its batch on commit
+        
+        Errors are kept in the cursor's precommit data, so a rollback drops
+        them together with the batch they belong to.
+        """
+        precommit = self.env.cr.precommit
+        if 'cs_cart_migration_errors' not in precommit.data:
+            precommit.data['cs_cart_migration_errors'] = []
+            precommit.add(self._flush_migration_errors)
+        precommit.data['cs_cart_migration_errors'].append({
+            'log_id': log.id,
+            'entity': log.migration_type,
+            'source_id': str(record_id) if record_id is not None else False,
+            'error_class': type(error).__name__,
+            'message': str(error),
+        })
+    
+    def _flush_migration_errors(self):
+        """Bulk insert the buffered record errors and add them to the per-class counts"""
+        errors = self.env.cr.precommit.data.pop('cs_cart_migration_errors', [])
+        if not errors:
+            return
+        
+        self.env['cs.cart.migration.error'].sudo().create(errors)
+        counts = defaultdict(Counter)
+        for vals in errors:
+            counts[vals['log_id']][vals['error_class']] += 1
+        for log in self.env['cs.cart.migration.log'].browse(list(counts)):
+            log.error_counts = dict(Counter(log.error_counts or {}) + counts[log.id])
+        # Precommit hooks run after the transaction flush
+        self.env.flush_all()
+    
     def _batch_commit(self, batch_size=100, current_count=0):
         """Commit in batches to avoid memory issues"""
         if current_count % batch_size == 0:
             self.env.cr.commit()
             _logger.info(f"Committed batch: {current_count} records")
     
-    def _get_cs_cart_query(self, version, query_type):
-        """Get appropriate SQL query based on CS-Cart version"""
-        queries = {
-            '4.0': {
-                'categories': """
-                    SELECT category_id, parent_id, category, 
-                           description, position, status
-                    FROM cscart_categories
-                    WHERE status = 'A'
-                    ORDER BY parent_id, position
-                """,
-                'products': """
-                    SELECT p.product_id, p.product_code, p.product, 
-                           p.full_description, p.short_description, p.status,
-                           p.list_price, p.price, p.amount, p.weight,
-                           p.length, p.width, p.height, p.timestamp,
-                           pc.category_id
-                    FROM cscart_products p
-                    LEFT JOIN cscart_products_categories pc ON p.product_id = pc.product_id
-                    WHERE p.status = 'A'
-                """
-            },
-            '4.10': {
-                'categories': """
-                    SELECT c.category_id, c.parent_id, cd.category, 
-                           cd.description, c.position, c.status
-                    FROM cscart_categories c
-                    LEFT JOIN cscart_category_descriptions cd 
-                        ON c.category_id = cd.category_id AND cd.lang_code = %s
-                    WHERE c.status = 'A'
-                    ORDER BY c.parent_id, c.position
-                """,
-                'products': """
-                    SELECT p.product_id, p.product_code, pd.product, 
-                           pd.full_description, pd.short_description, p.status,
-                           p.list_price, p.price, p.amount, p.weight,
-                           p.length, p.width, p.height, p.timestamp,
-                           pi.detailed_id as image_id, pi.image_path,
-                           pc.category_id
-                    FROM cscart_products p
-                    LEFT JOIN cscart_product_descriptions pd 
-                        ON p.product_id = pd.product_id AND pd.lang_code = %s
-                    LEFT JOIN cscart_images pi 
-                        ON p.product_id = pi.object_id AND pi.object_type = 'product'
-                    LEFT JOIN cscart_products_categories pc 
-                        ON p.product_id = pc.product_id AND pc.link_type = 'M'
-                    WHERE p.status = 'A'
-                """
-            },
-            'mve': {
-                'suppliers': """
-                    SELECT u.user_id, u.email, u.firstname, u.lastname,
-                           u.phone, u.fax, u.company, u.address, u.city,
-                           u.state, u.country, u.zipcode, u.status,
-                           c.company as vendor_name, c.status as vendor_status
-                    FROM cscart_users u
-                    LEFT JOIN cscart_companies c ON u.company_id = c.company_id
-                    WHERE u.user_type = 'V' AND u.status = 'A'
-                """
-            }
+    def _get_category_mapping(self, connection):
+        """Get mapping of CS-Cart category IDs to Odoo category IDs"""
+        categories = self.env['product.category'].search([
+            ('cs_cart_id', '!=', False)
+        ])
+        return {cat.cs_cart_id: cat.id for cat in categories}
+    
+    def _get_existing_map(self, model_name, cs_cart_ids, log=None):
+        """Resolve existing Odoo records for a set of CS-Cart ids in one query
+        
+        Returns two dicts keyed by cs_cart_id: the Odoo record ids and the
+        fingerprints of the values last imported into them. Lookup counts and
+        timings are accumulated on ``log`` when given.
+        """
+        cs_cart_ids = list(set(cs_cart_ids))
+        if not cs_cart_ids:
+            return {}, {}
+        
+        started = time.perf_counter()
+        records = self.env[model_name].search_read(
+            [('cs_cart_id', 'in', cs_cart_ids)], ['cs_cart_id', 'cs_cart_hash']
+        )
+        if log:
+            log.lookup_count += len(cs_cart_ids)
+            log.lookup_duration += time.perf_counter() - started
+        
+        existing_map = {rec['cs_cart_id']: rec['id'] for rec in records}
+        fingerprints = {rec['cs_cart_id']: rec['cs_cart_hash'] for rec in records}
+        return existing_map, fingerprints
+    
+    def _get_variant_map(self, template_ids, storable=False):
+        """First product variant of each template, keyed by template id"""
+        Product = self.env['product.product']
+        domain = [('product_tmpl_id', 'in', template_ids)]
+        if storable:
+            # Storable products are flagged by is_storable on newer versions
+            if 'is_storable' in Product._fields:
+                domain.append(('is_storable', '=', True))
+            else:
+                domain.append(('type', '=', 'product'))
+        
+        variant_map = {}
+        for variant in Product.search_read(domain, ['product_tmpl_id'], order='id'):
+            variant_map.setdefault(variant['product_tmpl_id'][0], variant['id'])
+        return variant_map
+    
+    def _get_fingerprint(self, vals):
+        """Stable fingerprint of the values imported for one record"""
+        payload = json.dumps(
+            {k: v for k, v in vals.items() if k != 'cs_cart_hash'},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    
+    def _load_vals_batch(self, model_name, vals_list, existing_map, update_existing=True,
+                         fingerprints=None, log=None):
+        """Create or update a batch of prepared values keyed by ``cs_cart_id``
+        
+        ``existing_map`` maps the cs_cart_id of records already in Odoo to
+        their id. New records are created with a single ``create(vals_list)``
+        and existing ones are updated with one ``write()`` per distinct set of
+        values (per record for values that cannot be grouped, e.g. x2many
+        commands). Every record stores the fingerprint of its values; those of
+        updated records are set with one UPDATE. Records whose stored
+        fingerprint (from ``fingerprints``) matches are not written at all;
+        they are counted as unchanged on ``log``.
+        Returns a dict mapping cs_cart_id to the Odoo record id.
+        """
+        Model = self.env[model_name]
+        fingerprints = fingerprints or {}
+        
+        # Last row wins when the same source record appears twice in a batch
+        batch = {vals['cs_cart_id']: vals for vals in vals_list}
+        
+        result = {}
+        to_create = []
+        to_write = {}
+        write_hashes = {}
+        for cs_cart_id, vals in batch.items():
+            vals = dict(vals, cs_cart_hash=self._get_fingerprint(vals))
+            record_id = existing_map.get(cs_cart_id)
+            if not record_id:
+                to_create.append(vals)
+                continue
+            
+            result[cs_cart_id] = record_id
+            if fingerprints.get(cs_cart_id) == vals['cs_cart_hash']:
+                if log:
+                    log.unchanged_records += 1
+                continue
+            if update_existing:
+                # The fingerprint differs per record, it is left out of the
+                # grouped values
+                write_vals = {k: v for k, v in vals.items() if k not in ('cs_cart_id', 'cs_cart_hash')}
+                key = tuple(sorted(write_vals.items()))
+                try:
+                    hash(key)
+                except TypeError:
+                    key = ('record', record_id)
+                to_write.setdefault(key, (write_vals, []))[1].append(record_id)
+                write_hashes[record_id] = vals['cs_cart_hash']
+        
+        for write_vals, record_ids in to_write.values():
+            Model.browse(record_ids).write(write_vals)
+        if write_hashes:
+            self.env.cr.execute(
+                f'UPDATE "{Model._table}" AS t SET cs_cart_hash = v.hash '
+                f'FROM (VALUES {", ".join(["(%s, %s)"] * len(write_hashes))}) AS v(id, hash) '
+                f'WHERE t.id = v.id',
+                [value for item in write_hashes.items() for value in item]
+            )
+            Model.browse(list(write_hashes)).invalidate_recordset(['cs_cart_hash'])
+        
+        if to_create:
+            records = Model.create(to_create)
+            for vals, record in zip(to_create, records):
+                result[vals['cs_cart_id']] = record.id
+        
+        return result
+    
+    def _load_bisecting(self, items, load):
+        """Load a batch inside a savepoint, bisecting it to isolate failing items
+        
+        ``load`` is called with a list of items and returns a dict of what it
+        loaded. When it fails (including at flush), only its savepoint is
+        rolled back and each half is retried in its own savepoint, down to
+        single items: good items still go through batched loads and one bad
+        row costs a few extra statements instead of its whole batch.
+        Returns the merged ``load`` results and the (item, error) pairs of
+        the items that failed on their own.
+        """
+        try:
+            with self.env.cr.savepoint():
+                result = load(items)
+                self.env.flush_all()
+            return result, []
+        except Exception as e:
+            if len(items) == 1:
+                return {}, [(items[0], e)]
+            _logger.info(f"Batch of {len(items)} records failed ({type(e).__name__}), splitting it")
+        
+        middle = len(items) // 2
+        result, failed = self._load_bisecting(items[:middle], load)
+        result_right, failed_right = self._load_bisecting(items[middle:], load)
+        result.update(result_right)
+        return result, failed + failed_right
+    
+    def _migrate_chunk(self, log, model_name, rows, prepare_vals, key, update_existing=True,
+                       load_batch=None):
+        """Transform a chunk of source rows and load it as one batch
+        
+        Existing records are resolved for the whole chunk with one lookup;
+        when ``update_existing`` is off their rows are not transformed at all.
+        Rows that fail to transform are reported individually; the batch is
+        loaded through savepoints that isolate the rows the database rejects.
+        ``load_batch(vals_list, existing_map, fingerprints)`` replaces the
+        default upsert of ``_load_vals_batch``, e.g. to create records with
+        their lines; it runs inside the savepoint.
+        Returns the cs_cart_id -> Odoo id mapping of the loaded records.
+        """
+        if load_batch is None:
+            load_batch = lambda part, existing_map, fingerprints: self._load_vals_batch(
+                model_name, part, existing_map, update_existing, fingerprints, log
+            )
+        existing_map, fingerprints = self._get_existing_map(
+            model_name, [row[key] for row in rows if row.get(key)], log
+        )
+        
+        vals_list = []
+        errors = []
+        loaded = {}
+        for row in rows:
+            if not update_existing and row.get(key) in existing_map:
+                loaded[row[key]] = existing_map[row[key]]
+                continue
+            try:
+                vals_list.append(prepare_vals(row))
+            except Exception as e:
+                errors.append((row.get(key, 'unknown'), e))
+        skipped = len(rows) - len(vals_list) - len(errors)
+        
+        if vals_list:
+            started = time.perf_counter()
+            # Last row wins when the same source record appears twice, so
+            # that bisected halves never create it twice
+            batch = list({vals['cs_cart_id']: vals for vals in vals_list}.values())
+            # Stored fields computed for the whole batch are written in one
+            # flush, which also surfaces database errors inside the savepoint
+            batch_loaded, failed = self._load_bisecting(
+                batch, lambda part: load_batch(part, existing_map, fingerprints)
+            )
+            loaded.update(batch_loaded)
+            log.load_duration += time.perf_counter() - started
+            log.successful_records += len(vals_list) - len(failed)
+            errors.extend((vals['cs_cart_id'], e) for vals, e in failed)
+        
+        log.successful_records += skipped
+        for record_id, error in errors:
+            self._handle_migration_error(log, error, record_id)
+        
+        return loaded
+    
+    def _get_translation_langs(self, translation_langs, lang_code=None):
+        """Map comma separated CS-Cart language codes to active Odoo languages
+        
+        The run's main ``lang_code`` is left out, its values are imported as
+        the records' own values.
+        """
+        if not translation_langs:
+            return {}
+        
+        active_langs = self.env['res.lang'].search_read([], ['code', 'iso_code'])
+        langs = {}
+        for code in translation_langs.split(','):
+            code = code.strip().lower()
+            if not code or code == lang_code or code in langs:
+                continue
+            odoo_lang = next((
+                lang['code'] for lang in active_langs
+                if code in ((lang['iso_code'] or '').lower(), lang['code'].split('_')[0].lower())
+            ), None)
+            if not odoo_lang:
+                raise UserError(_("Language '%s' is not active in Odoo, activate it to import its translations") % code)
+            langs[code] = odoo_lang
+        return langs
+    
+    def _fetch_translation_rows(self, conn, connection, query_type, key_column, keys, langs):
+        """Read the description rows of ``keys`` in all translation languages with one query
+        
+        ``keys`` None reads the descriptions of every source record.
+        """
+        if not langs or keys is not None and not keys:
+            return []
+        
+        query = self._split_order_by(self._get_cs_cart_query(connection, query_type, conn))[0]
+        query += f" AND d.lang_code IN ({', '.join(['%s'] * len(langs))})"
+        params = tuple(langs)
+        if keys is not None:
+            query += f" AND {key_column} IN ({', '.join(['%s'] * len(keys))})"
+            params += tuple(keys)
+        
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+    
+    def _load_translations(self, log, model_name, rows, key, record_map, field_map, langs):
+        """Write the translated values of loaded records, one batch per language
+        
+        ``rows`` are CS-Cart description rows in any of the ``langs``
+        (CS-Cart -> Odoo language code); they are pivoted per record and
+        written in the language's context with one flush per language.
+        Only the translatable Odoo fields of ``field_map`` (source column ->
+        field) are written. A language that fails to load is rolled back on
+        its own and its records are reported as failed.
+        """
+        Model = self.env[model_name]
+        field_map = {
+            column: name for column, name in field_map.items()
+            if name in Model._fields and Model._fields[name].translate
         }
         
-        # Return query for the specific version or fallback to 4.0
-        if version in queries and query_type in queries[version]:
-            return queries[version][query_type]
-        elif query_type in queries['4.0']:
-            return queries['4.0'][query_type]
-        else:
-            raise ValueError(f"Query type '{query_type}' not found for version '{version}'")
\ No newline at end of file
+        by_lang = defaultdict(dict)
+        for row in rows:
+            if row[key] in record_map and row['lang_code'] in langs:
+                vals = {name: row[column] for column, name in field_map.items() if row.get(column)}
+                if vals:
+                    by_lang[row['lang_code']][row[key]] = vals
+        
+        for lang_code, translations in by_lang.items():
+            TranslatedModel = Model.with_context(lang=langs[lang_code])
+            try:
+                with self.env.cr.savepoint():
+                    for cs_cart_id, vals in translations.items():
+                        TranslatedModel.browse(record_map[cs_cart_id]).write(vals)
+                    self.env.flush_all()
+                log.translated_records += len(translations)
+            except Exception as e:
+                self.env.invalidate_all()
+                for cs_cart_id in translations:
+                    self._handle_migration_error(log, e, f"{cs_cart_id} ({lang_code})")
+    
+    def _count_cs_cart_rows(self, conn, query, params=None, distinct_key=None):
+        """Count the rows a source query returns with a separate cheap COUNT
+        
+        With ``distinct_key`` the records are counted instead of the rows,
+        for queries whose joins return several rows per record.
+        """
+        counted = f"DISTINCT {distinct_key}" if distinct_key else '*'
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT COUNT({counted}) FROM ({query}) AS cs_cart_src", params)
+            result = cursor.fetchone()
+            return result[0] if result else 0
+        finally:
+            cursor.close()
+    
+    def _estimate_source_volume(self, conn, query, distinct_key, params=None, sample_size=100):
+        """Size a source query without reading it through
+        
+        One COUNT pass gives the rows and the records, distinct values of the
+        ``distinct_key`` column (their ratio is the fan-out of the joins); the
+        payload is averaged over the first ``sample_size`` rows, read
+        unordered so the server stops early.
+        Returns a dict with ``rows``, ``records``, ``fan_out``,
+        ``row_bytes`` and ``record_bytes``.
+        """
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT COUNT(*), COUNT(DISTINCT {distinct_key}) FROM ({query}) AS cs_cart_src", params)
+            rows, records = cursor.fetchone() or (0, 0)
+        finally:
+            cursor.close()
+        
+        sample = []
+        if rows:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(f"{self._split_order_by(query)[0]} LIMIT %s", tuple(params or ()) + (sample_size,))
+                sample = cursor.fetchall()
+            finally:
+                cursor.close()
+        
+        row_bytes = sum(
+            len(str(value).encode()) for row in sample for value in row.values() if value is not None
+        ) / len(sample) if sample else 0.0
+        fan_out = rows / records if records else 0.0
+        return {
+            'rows': rows,
+            'records': records,
+            'fan_out': fan_out,
+            'row_bytes': row_bytes,
+            'record_bytes': row_bytes * fan_out,
+        }
+    
+    def _estimate_existing_records(self, conn, query, distinct_key, params, model_name, records,
+                                   domain=None, sample_size=1000):
+        """Estimate how many of the ``records`` source records are already in ``model_name``
+        
+        At most ``sample_size`` keys, spread over the key space (every key
+        divisible by a stride), are read from CS-Cart and looked up by
+        cs_cart_id in one query; their share of existing records is applied
+        to ``records``. Returns the estimate and whether every key was
+        checked (the count is then exact).
+        """
+        stride = max(1, -(-records // sample_size))
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                f"SELECT DISTINCT {distinct_key} FROM ({query}) AS cs_cart_src "
+                f"WHERE FLOOR({distinct_key} / %s) * %s = {distinct_key} LIMIT %s",
+                tuple(params or ()) + (stride, stride, sample_size)
+            )
+            keys = [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+        if not keys:
+            return 0, stride == 1
+        
+        existing = self.env[model_name].search_count((domain or []) + [('cs_cart_id', 'in', keys)])
+        if stride == 1:
+            return existing, True
+        return round(existing / len(keys) * records), False
+    
+    def _get_recorded_throughput(self, connection, migration_type, limit=5):
+        """Records per second of the last finished runs of an entity
+        
+        Runs of the connection are preferred, runs of other connections
+        (e.g. benchmarks) are used when it has none. Returns 0.0 without
+        any history.
+        """
+        Log = self.env['cs.cart.migration.log']
+        domain = [
+            ('migration_type', '=', migration_type),
+            ('status', 'in', ('completed', 'partial')),
+            ('parent_id', '=', False),
+            ('end_date', '!=', False),
+            ('processed_records', '>', 0),
+        ]
+        logs = Log.search(domain + [('connection_id', '=', connection.id)], order='start_date desc', limit=limit) \
+            or Log.search(domain, order='start_date desc', limit=limit)
+        duration = sum(logs.mapped('duration'))
+        return sum(logs.mapped('processed_records')) / duration if duration else 0.0
+    
+    def _stream_cs_cart_rows(self, conn, query, params=None, chunk_size=100):
+        """Stream source rows in chunks of ``chunk_size`` from an unbuffered cursor
+        
+        Rows are read from the server as they are consumed, so only one chunk
+        is held in memory at a time regardless of the table size.
+        """
+        cursor = conn.cursor(dictionary=True, buffered=False)
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                # Unread rows left on an aborted stream; the connection is
+                # closed by the caller anyway
+                pass
+    
+    def _group_cs_cart_rows(self, chunks, key, list_fields, row_fields=None):
+        """Collapse the rows of one-to-many joins into one record per key
+        
+        ``chunks`` must be in key order. The first row of a record is kept and
+        the values of ``list_fields`` (source column -> list name) are gathered
+        from all its rows as ordered lists without duplicates or NULLs.
+        ``row_fields`` (list name -> source columns) gathers those columns of
+        every joined row as a dict, e.g. order lines; rows whose first column
+        is NULL (no joined row) are left out. The last record of a chunk is
+        held back until the next chunk shows whether it continues there.
+        """
+        row_fields = row_fields or {}
+        pending = None
+        for rows in chunks:
+            records = []
+            for row in rows:
+                if pending is not None and pending[key] == row[key]:
+                    record = pending
+                else:
+                    if pending is not None:
+                        records.append(pending)
+                    record = pending = dict(row, **{name: [] for name in list_fields.values()},
+                                            **{name: [] for name in row_fields})
+                for column, name in list_fields.items():
+                    value = row.get(column)
+                    if value is not None and value not in record[name]:
+                        record[name].append(value)
+                for name, columns in row_fields.items():
+                    if row.get(columns[0]) is not None:
+                        record[name].append({column: row.get(column) for column in columns})
+            if records:
+                yield records
+        if pending is not None:
+            yield [pending]
+    
+    def _split_order_by(self, query):
+        """Split a source query into its filtered part and its ORDER BY clause"""
+        parts = re.split(r'(?=\bORDER\s+BY\b)', query, maxsplit=1, flags=re.IGNORECASE)
+        return parts[0].rstrip(), parts[1].strip() if len(parts) > 1 else ''
+    
+    def _keyset_query(self, query, key_column, window='page'):
+        """Rewrite a source query into a window on ``key_column``
+        
+        ``page`` selects the next LIMIT-bounded page after the last key seen,
+        ``range`` every row after a key in key order (unbounded stream),
+        ``exact`` the rows of a single key and ``upto`` the rows up to a key
+        (unordered, the other windows can be applied on top of it).
+        """
+        base = self._split_order_by(query)[0]
+        if window == 'upto':
+            return f"{base} AND {key_column} <= %s"
+        if window == 'exact':
+            return f"{base} AND {key_column} = %s"
+        if window == 'range':
+            return f"{base} AND {key_column} > %s ORDER BY {key_column}"
+        return f"{base} AND {key_column} > %s ORDER BY {key_column} LIMIT %s"
+    
+    def _page_cs_cart_rows(self, connection, conn, query, key_column, params=None,
+                           page_size=100, start_after=0, fan_out=False, max_retries=3):
+        """Yield source rows in keyset-paginated pages of ``page_size`` rows
+        
+        Every page is a short indexed range scan on ``key_column``. When the
+        connection drops, it is reopened and only the current page is read
+        again. With ``fan_out`` (queries joining one-to-many tables), the rows
+        of the last key of a full page are completed with an exact-key query so
+        a record is never split across two pages.
+        """
+        import mysql.connector
+        
+        page_query = self._keyset_query(query, key_column)
+        exact_query = self._keyset_query(query, key_column, 'exact')
+        key = key_column.split('.')[-1]
+        params = tuple(params or ())
+        last_key = start_after
+        own_conn = None
+        
+        def fetch(sql, sql_params):
+            nonlocal conn, own_conn
+            for attempt in range(max_retries + 1):
+                try:
+                    cursor = conn.cursor(dictionary=True)
+                    try:
+                        cursor.execute(sql, sql_params)
+                        return cursor.fetchall()
+                    finally:
+                        cursor.close()
+                except (mysql.connector.OperationalError, mysql.connector.InterfaceError) as e:
+                    if attempt == max_retries:
+                        raise
+                    _logger.warning(f"CS-Cart connection lost after key {last_key}, reconnecting: {str(e)}")
+                    # The lost connection (the caller's one included, closing
+                    # it again is a no-op) gives its pool slot back first
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                    conn = own_conn = connection.get_connection()
+        
+        try:
+            while True:
+                rows = fetch(page_query, params + (last_key, page_size))
+                if not rows:
+                    break
+                full_page = len(rows) == page_size
+                
+                boundary = rows[-1][key]
+                if fan_out and full_page:
+                    rows = [row for row in rows if row[key] != boundary]
+                    rows += fetch(exact_query, params + (boundary,))
+                
+                last_key = boundary
+                if rows:
+                    yield rows
+                
+                if not full_page:
+                    break
+        finally:
+            if own_conn:
+                own_conn.close()
+    
+    def _iter_cs_cart_chunks(self, connection, conn, query, key_column, params=None,
+                             batch_size=100, extraction_mode='stream', fan_out=False,
+                             start_after=0, end_at=None):
+        """Yield chunks of source rows with ``start_after < key <= end_at`` in key order
+        
+        Both extraction modes read in ``key_column`` order so that the
+        checkpoint saved at each batch commit is a valid resume point.
+        """
+        params = tuple(params or ())
+        if end_at:
+            query = self._keyset_query(query, key_column, 'upto')
+            params += (end_at,)
+        
+        if extraction_mode == 'keyset' and not self._is_key_indexed(connection, query, key_column):
+            # Every page would scan the table to seek past the last key
+            _logger.warning(f"{key_column} is not indexed on the CS-Cart database, streaming instead of keyset pages")
+            extraction_mode = 'stream'
+        
+        if extraction_mode == 'keyset':
+            return self._page_cs_cart_rows(
+                connection, conn, query, key_column, params,
+                page_size=batch_size, start_after=start_after, fan_out=fan_out
+            )
+        return self._stream_cs_cart_rows(
+            conn, self._keyset_query(query, key_column, 'range'),
+            params + (start_after,), batch_size
+        )
+    
+    def _is_key_indexed(self, connection, query, key_column):
+        """Whether the source table of ``key_column`` (``alias.column``) has an index starting with it"""
+        alias, _sep, column = key_column.rpartition('.')
+        match = re.search(rf"(?:FROM|JOIN)\s+(\w+)\s+{re.escape(alias)}\b", query) if alias else None
+        if not match:
+            return True
+        return connection._get_schema_profile().is_indexed(match.group(1), column)
+    
+    def _get_cs_cart_query(self, connection, query_type, conn=None):
+        """SQL of a source query, built for the schema profile of the connection's database
+        
+        ``conn``, when the caller holds one, profiles the database on first
+        use without borrowing a second connection.
+        """
+        try:
+            return connection._get_schema_profile(conn).build_query(query_type)
+        except ValueError as e:
+            raise UserError(str(e))
\ No newline at end of file
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api, _, Command
+from odoo.exceptions import UserError
+from odoo.tools import escape_psql
+import logging
+from datetime import datetime, timezone
+from .migration_base import MigrationBase, FAST_IMPORT_CONTEXT
+
+_logger = logging.getLogger(__name__)
+
+# CS-Cart order status -> sale.order state
+ORDER_STATES = {
+    'O': 'sale',    # Open
+    'P': 'sale',    # Processed
+    'C': 'sale',    # Complete
+    'B': 'sale',    # Backordered
+    'F': 'cancel',  # Failed
+    'D': 'cancel',  # Declined
+    'I': 'cancel',  # Canceled
+}
+
+class OrderMigration(models.Model):
+    _name = 'cs.cart.order.migration'
+    _description = 'CS-Cart Order Migration'
+    _inherit = 'cs.cart.migration.base'
+    
+    def migrate_orders(self, connection, batch_size=100, update_existing=True,
+                       extraction_mode='stream', resume_log=None,
+                       changed_since=None, fast_import=False):
+        """Migrate the CS-Cart order history to sale orders
+        
+        Orders are streamed with their lines in order_id order and loaded one
+        batch at a time: one create for the headers and lines of the new
+        orders and grouped writes for the headers of changed ones. Historical
+        orders get their state directly, they are not confirmed (no pickings
+        or procurements are created). Returns the number of orders migrated;
+        their ids are not kept, a full history is millions of orders.
+        """
+        if fast_import:
+            self = self.with_context(**FAST_IMPORT_CONTEXT)
+        
+        import mysql.connector
+        from mysql.connector import Error
+        
+        log = resume_log or self._create_migration_log(
+            connection, 'order', batch_size=batch_size,
+            update_existing=update_existing, extraction_mode=extraction_mode,
+            changed_since=changed_since, fast_import=fast_import
+        )
+        migrated_count = 0
+        
+        try:
+            conn = connection.get_connection()
+            
+            query = self._get_cs_cart_query(connection, 'orders', conn)
+            query, params = self._filter_changed_since(connection, query, None, 'orders', changed_since)
+            
+            # A resumed run keeps the total counted when it started
+            if not resume_log:
+                log.total_records = self._count_cs_cart_rows(conn, query, params, distinct_key='order_id')
+                self._update_migration_log(log, processed_records=0)
+                self.env.cr.commit()
+            
+            i = log.processed_records
+            self._report_progress(log)
+            # The order details join returns one row per line, lines are
+            # gathered into one record per order
+            chunks = self._iter_cs_cart_chunks(
+                connection, conn, query, 'o.order_id', params,
+                batch_size, extraction_mode, fan_out=True,
+                start_after=log.checkpoint_key, end_at=log.shard_key_to
+            )
+            for orders in self._group_cs_cart_rows(chunks, 'order_id', {}, {
+                'lines': ['item_id', 'product_id', 'product_code', 'price', 'amount'],
+            }):
+                loaded = self._migrate_order_chunk(log, orders, update_existing)
+                migrated_count += len(loaded)
+                
+                i += len(orders)
+                log.processed_records = i
+                self._save_checkpoint(log, orders, 'order_id')
+                
+                # Batch commit
+                self.env.cr.commit()
+                _logger.info(f"Processed {i} orders")
+                self._report_progress(log)
+            
+            # Update connection
+            connection.last_sync_date = fields.Datetime.now()
+            
+            # Update log
+            self._update_migration_log(log,
+                status='completed' if log.failed_records == 0 else 'partial',
+                details=f"Successfully migrated {migrated_count} orders"
+            )
+            
+            _logger.info(f"Order migration completed: {migrated_count} orders")
+        
+        except Error as e:
+            self._update_migration_log(log,
+                status='failed',
+                error_message=f"Database error: {str(e)}"
+            )
+            raise UserError(_('Order migration failed: %s') % str(e))
+        except Exception as e:
+            self._update_migration_log(log,
+                status='failed',
+                error_message=f"Unexpected error: {str(e)}"
+            )
+            raise UserError(_('Order migration failed: %s') % str(e))
+        finally:
+            if 'conn' in locals():
+                conn.close()
+        
+        return migrated_count
+    
+    def _migrate_order_chunk(self, log, orders, update_existing=True):
+        """Load a chunk of CS-Cart orders with their lines as one batch
+        
+        Customers and products are resolved through their cs_cart_id for the
+        whole chunk. New orders are created with their lines in one
+        ``create()``; existing orders only get their header updated (lines of
+        confirmed orders cannot be replaced), unless it did not change.
+        Returns the cs_cart_id -> sale.order id mapping of the loaded orders.
+        """
+        customer_map, _fingerprints = self._get_existing_map(
+            'res.partner', [order['user_id'] for order in orders if order.get('user_id')], log
+        )
+        template_map, _fingerprints = self._get_existing_map(
+            'product.template',
+            [line['product_id'] for order in orders for line in order['lines'] if line['product_id']],
+            log
+        )
+        variant_map = self._get_variant_map(list(template_map.values()))
+        
+        # Customers of guest orders are only created with their orders,
+        # inside the batch savepoint
+        guests = {}
+        
+        def prepare_vals(order):
+            vals = self._prepare_order_vals(order, customer_map)
+            if not vals['partner_id']:
+                guests[order['order_id']] = self._prepare_guest_vals(order)
+            vals['order_line'] = [
+                Command.create(self._prepare_order_line_vals(line, template_map, variant_map))
+                for line in order['lines']
+            ]
+            return vals
+        
+        return self._migrate_chunk(
+            log, 'sale.order', orders, prepare_vals, 'order_id', update_existing,
+            load_batch=lambda part, existing_map, fingerprints: self._load_order_batch(
+                part, guests, existing_map, update_existing, fingerprints, log
+            )
+        )
+    
+    def _load_order_batch(self, orders, guests, existing_map, update_existing=True,
+                          fingerprints=None, log=None):
+        """Create new orders with their lines and update the headers of existing ones
+        
+        Guest customers are resolved or created first. Headers go through the
+        common upsert (fingerprints, grouped writes); lines are only ever
+        created with their order.
+        """
+        guest_partners = self._get_guest_partners(
+            {vals['cs_cart_id']: guests[vals['cs_cart_id']] for vals in orders if not vals['partner_id']}
+        )
+        # Copies: a bisected retry must not reuse a rolled back guest
+        headers = [
+            dict(vals, partner_id=vals['partner_id'] or guest_partners[vals['cs_cart_id']])
+            for vals in orders
+        ]
+        
+        SaleOrder = self.env['sale.order'].with_context(skip_procurement=True)
+        to_update = [
+            {k: v for k, v in vals.items() if k != 'order_line'}
+            for vals in headers if vals['cs_cart_id'] in existing_map
+        ]
+        to_create = [
+            dict(vals, cs_cart_hash=self._get_fingerprint({k: v for k, v in vals.items() if k != 'order_line'}))
+            for vals in headers if vals['cs_cart_id'] not in existing_map
+        ]
+        
+        loaded = self._load_vals_batch(
+            'sale.order', to_update, existing_map, update_existing, fingerprints, log
+        )
+        if to_create:
+            for vals, order in zip(to_create, SaleOrder.create(to_create)):
+                loaded[vals['cs_cart_id']] = order.id
+        return loaded
+    
+    def _get_guest_partners(self, guests):
+        """Customer of each guest order, from ``guests`` (order id -> partner values)
+        
+        Guest orders (and orders of customers that were not migrated) are
+        matched to a partner by e-mail, case-insensitively; missing ones are
+        created in bulk. Returns a dict keyed by CS-Cart order id.
+        """
+        if not guests:
+            return {}
+        
+        orders_by_email = {}
+        for order_id, vals in guests.items():
+            email = (vals.get('email') or '').strip().lower()
+            orders_by_email.setdefault(email or f"order-{order_id}", []).append(order_id)
+        
+        emails = [email for email in orders_by_email if '@' in email]
+        guest_partners = {}
+        if emails:
+            domain = ['|'] * (len(emails) - 1) + [('email', '=ilike', escape_psql(email)) for email in emails]
+            for partner in self.env['res.partner'].search_read(domain, ['email'], order='id'):
+                guest_partners.setdefault(partner['email'].strip().lower(), partner['id'])
+        
+        new_guests = [email for email in orders_by_email if email not in guest_partners]
+        if new_guests:
+            new_partners = self.env['res.partner'].create([
+                guests[orders_by_email[email][0]] for email in new_guests
+            ])
+            guest_partners.update(zip(new_guests, new_partners.ids))
+        
+        return {
+            order_id: guest_partners[email]
+            for email, order_ids in orders_by_email.items()
+            for order_id in order_ids
+        }
+    
+    def _prepare_guest_vals(self, order_data):
+        """Prepare res.partner values for the customer of a guest order"""
+        name = f"{order_data.get('firstname') or ''} {order_data.get('lastname') or ''}".strip()
+        return {
+            'name': order_data.get('company') or name or order_data.get('email') or _('CS-Cart Guest'),
+            'email': order_data.get('email') or '',
+            'phone': order_data.get('phone') or '',
+            'customer_rank': 1,
+        }
+    
+    def _prepare_order_vals(self, order_data, customer_map):
+        """Prepare sale.order header values from a CS-Cart order row
+        
+        ``partner_id`` is False for guest orders, their customer is resolved
+        when the batch is loaded. Without a timestamp ``date_order`` is left
+        out (the column default applies on create), so the fingerprint of the
+        order stays stable between runs.
+        """
+        timestamp = int(order_data.get('timestamp') or 0)
+        vals = {
+            'partner_id': customer_map.get(order_data.get('user_id')) or False,
+            'state': ORDER_STATES.get(order_data.get('status'), 'draft'),
+            'client_order_ref': str(order_data['order_id']),
+            'note': order_data.get('notes') or '',
+            'cs_cart_id': order_data['order_id'],
+        }
+        if timestamp:
+            vals['date_order'] = datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+        return vals
+    
+    def _prepare_order_line_vals(self, line_data, template_map, variant_map):
+        """Prepare sale.order.line values from a CS-Cart order detail row
+        
+        Lines of products that were not migrated are kept as notes.
+        """
+        quantity = float(line_data.get('amount') or 0)
+        price = float(line_data.get('price') or 0)
+        variant_id = variant_map.get(template_map.get(line_data.get('product_id')))
+        if not variant_id:
+            return {
+                'display_type': 'line_note',
+                'name': _('%s x %s at %.2f (CS-Cart product %s)') % (
+                    line_data.get('product_code') or '', quantity, price, line_data.get('product_id')),
+            }
+        
+        # CS-Cart prices are final, Odoo default taxes are not applied
+        tax_field = 'tax_ids' if 'tax_ids' in self.env['sale.order.line']._fields else 'tax_id'
+        return {
+            'product_id': variant_id,
+            'product_uom_qty': quantity,
+            'price_unit': price,
+            tax_field: [Command.clear()],
+        }
\ No newline at end of file
@@ -2,7 +2,7 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 import logging
-from .migration_base import MigrationBase
+from .migration_base import MigrationBase, FAST_IMPORT_CONTEXT
 
 _logger = logging.getLogger(__name__)
 
@@ -11,51 +11,62 @@ class PartnerMigration(models.Model):
     _description = 'CS-Cart Partner Migration'
     _inherit = 'cs.cart.migration.base'
     
-    def migrate_customers(self, connection, batch_size=100, update_existing=True):
+    def migrate_customers(self, connection, batch_size=100, update_existing=True,
+                          extraction_mode='stream', resume_log=None,
+                          changed_since=None, fast_import=False):
         """Migrate customers from CS-Cart to Odoo"""
+        if fast_import:
+            self = self.with_context(**FAST_IMPORT_CONTEXT)
+        
         import mysql.connector
         from mysql.connector import Error
         
-        log = self._create_migration_log(connection, 'customer')
+        log = resume_log or self._create_migration_log(
+            connection, 'customer', batch_size=batch_size,
+            update_existing=update_existing, extraction_mode=extraction_mode,
+            changed_since=changed_since, fast_import=fast_import
+        )
         migrated_customers = []
         
         try:
             conn = connection.get_connection()
-            cursor = conn.cursor(dictionary=True)
             
-            # Customer query for CS-Cart
-            query = """
-                SELECT u.user_id, u.email, u.firstname, u.lastname,
-                       u.phone, u.fax, u.company, u.address, u.city,
-                       u.state, u.country, u.zipcode, u.status,
-                       u.timestamp, u.user_type
-                FROM cscart_users u
-                WHERE u.user_type = 'C' AND u.status = 'A'
-                ORDER BY u.user_id
-            """
+            query = self._get_cs_cart_query(connection, 'customers', conn)
+            query, params = self._filter_changed_since(connection, query, None, 'customers', changed_since)
+            
+            # A resumed run keeps the total counted when it started
+            if not resume_log:
+                log.total_records = self._count_cs_cart_rows(conn, query, params)
+                self._update_migration_log(log, processed_records=0)
+                self.env.cr.commit()
             
-            cursor.execute(query)
-            customers = cursor.fetchall()
-            log.total_records = len(customers)
-            self._update_migration_log(log, processed_records=0)
+            # Countries and states are resolved in memory for the whole run
+            location_index = self._build_location_index(log)
             
-            for i, cust in enumerate(customers, 1):
-                try:
-                    odoo_partner = self._create_or_update_customer(cust, update_existing)
-                    if odoo_partner:
-                        migrated_customers.append(odoo_partner.id)
-                        log.successful_records += 1
-                    
-                    log.processed_records = i
-                    
-                    # Batch commit
-                    if i % batch_size == 0:
-                        self.env.cr.commit()
-                        _logger.info(f"Processed {i} customers")
+            i = log.processed_records
+            self._report_progress(log)
+            for customers in self._iter_cs_cart_chunks(
+                connection, conn, query, 'u.user_id', params,
+                batch_size=batch_size, extraction_mode=extraction_mode,
+                start_after=log.checkpoint_key, end_at=log.shard_key_to
+            ):
+                loaded = self._migrate_chunk(
+                    log, 'res.partner', customers,
+                    lambda cust: self._prepare_customer_vals(cust, location_index),
+                    'user_id', update_existing
+                )
+                migrated_customers.extend(loaded.values())
+                
+                i += len(customers)
+                log.processed_records = i
+                log.location_hits = location_index['hits']
+                log.location_misses = location_index['misses']
+                self._save_checkpoint(log, customers, 'user_id')
                 
-                except Exception as e:
-                    self._handle_migration_error(log, e, cust.get('user_id', 'unknown'))
-                    continue
+                # Batch commit
+                self.env.cr.commit()
+                _logger.info(f"Processed {i} customers")
+                self._report_progress(log)
             
             # Update connection
             connection.last_sync_date = fields.Datetime.now()
@@ -81,50 +92,72 @@ class PartnerMigration(models.Model):
             )
             raise UserError(_('Customer migration failed: %s') % str(e))
         finally:
-            if 'cursor' in locals():
-                cursor.close()
             if 'conn' in locals():
                 conn.close()
         
         return migrated_customers
     
-    def migrate_suppliers(self, connection, batch_size=100, update_existing=True):
+    def migrate_customers_sharded(self, connection, shard_count, batch_size=100, update_existing=True,
+                                  extraction_mode='stream', changed_since=None,
+                                  fast_import=False):
+        """Split the customer import into user_id ranges, one background job each"""
+        return self._start_sharded_migration(
+            connection, 'customer', 'customers', self._get_cs_cart_query(connection, 'customers'), 'u.user_id',
+            shard_count=shard_count, batch_size=batch_size,
+            update_existing=update_existing, extraction_mode=extraction_mode,
+            changed_since=changed_since, fast_import=fast_import
+        )
+    
+    def migrate_suppliers(self, connection, batch_size=100, update_existing=True,
+                          extraction_mode='stream', resume_log=None,
+                          changed_since=None, fast_import=False):
         """Migrate suppliers from CS-Cart to Odoo (for Mve edition)"""
+        if fast_import:
+            self = self.with_context(**FAST_IMPORT_CONTEXT)
+        
         import mysql.connector
         from mysql.connector import Error
         
-        log = self._create_migration_log(connection, 'supplier')
+        log = resume_log or self._create_migration_log(
+            connection, 'supplier', batch_size=batch_size,
+            update_existing=update_existing, extraction_mode=extraction_mode,
+            changed_since=changed_since, fast_import=fast_import
+        )
         migrated_suppliers = []
         
         try:
             conn = connection.get_connection()
-            cursor = conn.cursor(dictionary=True)
             
             # Supplier query for CS-Cart Mve
-            query = self._get_cs_cart_query(connection.cs_cart_version, 'suppliers')
+            query = self._get_cs_cart_query(connection, 'suppliers', conn)
+            query, params = self._filter_changed_since(connection, query, None, 'suppliers', changed_since)
             
-            cursor.execute(query)
-            suppliers = cursor.fetchall()
-            log.total_records = len(suppliers)
-            self._update_migration_log(log, processed_records=0)
+            # A resumed run keeps the total counted when it started
+            if not resume_log:
+                log.total_records = self._count_cs_cart_rows(conn, query, params)
+                self._update_migration_log(log, processed_records=0)
+                self.env.cr.commit()
             
-            for i, sup in enumerate(suppliers, 1):
-                try:
-                    odoo_partner = self._create_or_update_supplier(sup, update_existing)
-                    if odoo_partner:
-                        migrated_suppliers.append(odoo_partner.id)
-                        log.successful_records += 1
-                    
-                    log.processed_records = i
-                    
-                    # Batch commit
-                    if i % batch_size == 0:
-                        self.env.cr.commit()
-                        _logger.info(f"Processed {i} suppliers")
+            i = log.processed_records
+            self._report_progress(log)
+            for suppliers in self._iter_cs_cart_chunks(
+                connection, conn, query, 'u.user_id', params,
+                batch_size=batch_size, extraction_mode=extraction_mode,
+                start_after=log.checkpoint_key, end_at=log.shard_key_to
+            ):
+                loaded = self._migrate_chunk(
+                    log, 'res.partner', suppliers, self._prepare_supplier_vals, 'user_id', update_existing
+                )
+                migrated_suppliers.extend(loaded.values())
+                
+                i += len(suppliers)
+                log.processed_records = i
+                self._save_checkpoint(log, suppliers, 'user_id')
                 
-                except Exception as e:
-                    self._handle_migration_error(log, e, sup.get('user_id', 'unknown'))
-                    continue
+                # Batch commit
+                self.env.cr.commit()
+                _logger.info(f"Processed {i} suppliers")
+                self._report_progress(log)
             
             # Update connection
             connection.last_sync_date = fields.Datetime.now()
@@ -150,20 +183,13 @@ class PartnerMigration(models.Model):
             )
             raise UserError(_('Supplier migration failed: %s') % str(e))
         finally:
-            if 'cursor' in locals():
-                cursor.close()
             if 'conn' in locals():
                 conn.close()
         
         return migrated_suppliers
     
-    def _create_or_update_customer(self, cust_data, update_existing):
-        """Create or update a customer in Odoo"""
-        # Check if partner already exists
-        existing_partner = self.env['res.partner'].search([
-            ('cs_cart_id', '=', cust_data['user_id'])
-        ], limit=1)
-        
+    def _prepare_customer_vals(self, cust_data, location_index):
+        """Prepare res.partner values from a CS-Cart customer row"""
         # Prepare partner name
         firstname = cust_data.get('firstname', '')
         lastname = cust_data.get('lastname', '')
@@ -177,11 +203,10 @@ class PartnerMigration(models.Model):
             partner_name = cust_data.get('email', 'Unknown Customer')
         
         # Get country and state IDs
-        country_id = self._get_country_id(cust_data.get('country'))
-        state_id = self._get_state_id(cust_data.get('state'), country_id)
+        country_id = self._get_country_id(cust_data.get('country'), location_index)
+        state_id = self._get_state_id(cust_data.get('state'), country_id, location_index)
         
-        # Prepare partner values
-        partner_vals = {
+        return {
             'name': partner_name,
             'email': cust_data.get('email', ''),
             'phone': cust_data.get('phone', ''),
@@ -198,27 +223,11 @@ class PartnerMigration(models.Model):
             'cs_cart_id': cust_data['user_id'],
             'is_company': bool(company),
         }
-        
-        # Handle existing partner
-        if existing_partner:
-            if update_existing:
-                existing_partner.write(partner_vals)
-                return existing_partner
-            else:
-                return existing_partner
-        else:
-            # Create new partner
-            return self.env['res.partner'].create(partner_vals)
     
-    def _create_or_update_supplier(self, sup_data, update_existing):
-        """Create or update a supplier in Odoo"""
+    def _prepare_supplier_vals(self, sup_data):
+        """Prepare res.partner values from a CS-Cart vendor row"""
         # Similar to customer but with supplier_rank = 1
-        existing_partner = self.env['res.partner'].search([
-            ('cs_cart_id', '=', sup_data['user_id'])
-        ], limit=1)
-        
-        # Prepare partner values (similar to customer)
-        partner_vals = {
+        return {
             'name': sup_data.get('vendor_name') or sup_data.get('company') or 'Unknown Supplier',
             'email': sup_data.get('email', ''),
             'phone': sup_data.get('phone', ''),
@@ -228,37 +237,68 @@ class PartnerMigration(models.Model):
             'cs_cart_id': sup_data['user_id'],
             'is_company': True,
         }
+    
+    def _build_location_index(self, log=None):
+        """Build the in-memory country and state resolution index for a run
         
-        # Handle existing partner
-        if existing_partner:
-            if update_existing:
-                existing_partner.write(partner_vals)
-                return existing_partner
-            else:
-                return existing_partner
-        else:
-            # Create new partner
-            return self.env['res.partner'].create(partner_vals)
+        Countries are keyed by code, states by (country id, normalized code)
+        and (country id, normalized name). Hit and miss counters start from
+        the log's values so that resumed runs keep counting.
+        """
+        countries = {
+            country['code'].upper(): country['id']
+            for country in self.env['res.country'].search_read([], ['code']) if country['code']
+        }
+        states = {}
+        for state in self.env['res.country.state'].search_read([], ['code', 'name', 'country_id']):
+            country_id = state['country_id'][0]
+            for value in (state['code'], state['name']):
+                if value:
+                    states.setdefault((country_id, self._normalize_location(value)), state['id'])
+        
+        return {
+            'countries': countries,
+            'states': states,
+            'hits': log.location_hits if log else 0,
+            'misses': log.location_misses if log else 0,
+        }
+    
+    def _normalize_location(self, value):
+        """Normalize a state name or code for index lookups"""
+        return ' '.join(str(value).split()).casefold()
     
-    def _get_country_id(self, country_code):
+    def _get_country_id(self, country_code, location_index):
         """Get Odoo country ID from country code"""
         if not country_code:
             return False
         
-        country = self.env['res.country'].search([
-            ('code', '=', country_code.upper())
-        ], limit=1)
-        
-        return country.id if country else False
+        countries = location_index['countries']
+        code = country_code.strip().upper()
+        # Unknown codes are cached as False and never looked up again, but
+        # still count as misses
+        country_id = countries.setdefault(code, False)
+        location_index['hits' if country_id else 'misses'] += 1
+        return country_id
     
-    def _get_state_id(self, state_name, country_id):
-        """Get Odoo state ID from state name"""
+    def _get_state_id(self, state_name, country_id, location_index):
+        """Get Odoo state ID from state code or name"""
         if not state_name or not country_id:
             return False
         
+        states = location_index['states']
+        key = (country_id, self._normalize_location(state_name))
+        if key in states:
+            # A cached failed lookup is still a miss
+            location_index['hits' if states[key] else 'misses'] += 1
+            return states[key]
+        
+        location_index['misses'] += 1
+        # Fall back once to the partial name match used before the index,
+        # caching the result (found or not) for the rest of the run
         state = self.env['res.country.state'].search([
             ('name', 'ilike', state_name),
             ('country_id', '=', country_id)
         ], limit=1)
+        states[key] = state.id if state else False
         
-        return state.id if state else False
\ No newline at end of file
+        return states[key]
\ No newline at end of file
@@ -2,60 +2,107 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 import logging
-from .migration_base import MigrationBase
+import time
+from .migration_base import MigrationBase, FAST_IMPORT_CONTEXT
 
 _logger = logging.getLogger(__name__)
 
+
+class _BenchmarkRollback(Exception):
+    """Raised to roll back the savepoint of a benchmark load"""
+
+
 class ProductMigration(models.Model):
     _name = 'cs.cart.product.migration'
     _description = 'CS-Cart Product Migration'
     _inherit = 'cs.cart.migration.base'
     
-    def migrate_products(self, connection, lang_code='tr', batch_size=50, update_existing=True):
-        """Migrate products from CS-Cart to Odoo"""
+    def migrate_products(self, connection, lang_code='tr', batch_size=50, update_existing=True,
+                         extraction_mode='stream', resume_log=None,
+                         changed_since=None, fast_import=False, translation_langs=None):
+        """Migrate products from CS-Cart to Odoo
+        
+        ``translation_langs`` (comma separated CS-Cart language codes) are
+        imported as translations of the products in the same pass.
+        """
+        if fast_import:
+            self = self.with_context(**FAST_IMPORT_CONTEXT)
+        
         import mysql.connector
         from mysql.connector import Error
         
-        log = self._create_migration_log(connection, 'product')
+        langs = self._get_translation_langs(translation_langs, lang_code)
+        log = resume_log or self._create_migration_log(
+            connection, 'product', lang_code=lang_code, batch_size=batch_size,
+            update_existing=update_existing, extraction_mode=extraction_mode,
+            changed_since=changed_since, fast_import=fast_import,
+            translation_langs=translation_langs
+        )
         migrated_products = []
         
         try:
-            conn = connection.get_connection()
-            cursor = conn.cursor(dictionary=True)
+            # The streamed product query keeps its connection busy,
+            # translations are read through a second one borrowed with it
+            if langs:
+                conn, translation_conn = connection.get_connections(2)
+            else:
+                conn, translation_conn = connection.get_connection(), None
             
             # Get query based on CS-Cart version
-            query = self._get_cs_cart_query(connection.cs_cart_version, 'products')
+            query = self._get_cs_cart_query(connection, 'products', conn)
+            params = (lang_code,) if '%s' in query else None
+            query, params = self._filter_changed_since(connection, query, params, 'products', changed_since)
             
-            # Execute query
-            if '%s' in query:
-                cursor.execute(query, (lang_code,))
-            else:
-                cursor.execute(query)
-            
-            products = cursor.fetchall()
-            log.total_records = len(products)
-            self._update_migration_log(log, processed_records=0)
+            # A resumed run keeps the total counted when it started
+            if not resume_log:
+                log.total_records = self._count_cs_cart_rows(conn, query, params, distinct_key='product_id')
+                self._update_migration_log(log, processed_records=0)
+                self.env.cr.commit()
             
             # Pre-fetch all categories for mapping
             category_mapping = self._get_category_mapping(connection)
             
-            for i, prod in enumerate(products, 1):
-                try:
-                    odoo_product = self._create_or_update_product(prod, category_mapping, update_existing)
-                    if odoo_product:
-                        migrated_products.append(odoo_product.id)
-                        log.successful_records += 1
-                    
-                    log.processed_records = i
-                    
-                    # Batch commit
-                    if i % batch_size == 0:
-                        self.env.cr.commit()
-                        _logger.info(f"Processed {i} products")
+            i = log.processed_records
+            self._report_progress(log)
+            # The category join returns one row per link, they are collapsed
+            # into one record per product
+            chunks = self._iter_cs_cart_chunks(
+                connection, conn, query, 'p.product_id', params,
+                batch_size, extraction_mode, fan_out=True,
+                start_after=log.checkpoint_key, end_at=log.shard_key_to
+            )
+            for products in self._group_cs_cart_rows(chunks, 'product_id', {
+                'category_id': 'category_ids',
+            }):
+                loaded = self._migrate_chunk(
+                    log, 'product.template', products,
+                    lambda prod: self._prepare_product_vals(prod, category_mapping),
+                    'product_id', update_existing
+                )
+                migrated_products.extend(loaded.values())
+                
+                if langs:
+                    self._load_translations(
+                        log, 'product.template',
+                        self._fetch_translation_rows(
+                            translation_conn, connection, 'product_translations',
+                            'd.product_id', list(loaded), list(langs)
+                        ),
+                        'product_id', loaded, {
+                            'product': 'name',
+                            'full_description': 'description',
+                            'short_description': 'description_sale',
+                        }, langs
+                    )
+                
+                i += len(products)
+                log.processed_records = i
+                self._save_checkpoint(log, products, 'product_id')
                 
-                except Exception as e:
-                    self._handle_migration_error(log, e, prod.get('product_id', 'unknown'))
-                    continue
+                # Batch commit
+                self.env.cr.commit()
+                _logger.info(f"Processed {i} products")
+                self._report_progress(log)
             
             # Update connection
             connection.last_sync_date = fields.Datetime.now()
@@ -81,43 +128,90 @@ class ProductMigration(models.Model):
             )
             raise UserError(_('Product migration failed: %s') % str(e))
         finally:
-            if 'cursor' in locals():
-                cursor.close()
             if 'conn' in locals():
                 conn.close()
+            if locals().get('translation_conn'):
+                translation_conn.close()
         
         return migrated_products
     
-    def _get_category_mapping(self, connection):
-        """Get mapping of CS-Cart category IDs to Odoo category IDs"""
-        categories = self.env['product.category'].search([
-            ('cs_cart_id', '!=', False)
-        ])
-        return {cat.cs_cart_id: cat.id for cat in categories}
+    def migrate_products_sharded(self, connection, shard_count, lang_code='tr', batch_size=50,
+                                 update_existing=True, extraction_mode='stream', changed_since=None,
+                                 fast_import=False, translation_langs=None):
+        """Split the product import into product_id ranges, one background job each"""
+        query = self._get_cs_cart_query(connection, 'products')
+        params = (lang_code,) if '%s' in query else None
+        return self._start_sharded_migration(
+            connection, 'product', 'products', query, 'p.product_id', params,
+            shard_count=shard_count, lang_code=lang_code, batch_size=batch_size,
+            update_existing=update_existing, extraction_mode=extraction_mode,
+            changed_since=changed_since, fast_import=fast_import,
+            translation_langs=translation_langs
+        )
     
-    def _create_or_update_product(self, prod_data, category_mapping, update_existing):
-        """Create or update a product in Odoo"""
-        # Check if product already exists
-        existing_product = self.env['product.template'].search([
-            ('cs_cart_id', '=', prod_data['product_id'])
-        ], limit=1)
+    def benchmark_fast_import(self, connection, lang_code='tr', sample_size=200):
+        """Measure the load cost of the first CS-Cart products in both import modes
         
-        # Find category
-        category_id = False
-        if prod_data.get('category_id') and prod_data['category_id'] in category_mapping:
-            category_id = category_mapping[prod_data['category_id']]
-        else:
+        The sample is loaded as new records once in the default context and
+        once under the fast import context, each inside a savepoint that is
+        rolled back. Returns the load cost in ms/record per mode.
+        """
+        conn = connection.get_connection()
+        try:
+            query = self._get_cs_cart_query(connection, 'products', conn)
+            params = (lang_code,) if '%s' in query else None
+            chunks = self._iter_cs_cart_chunks(
+                connection, conn, query, 'p.product_id', params, sample_size, fan_out=True
+            )
+            products = next(self._group_cs_cart_rows(chunks, 'product_id', {
+                'category_id': 'category_ids',
+            }), [])
+        finally:
+            conn.close()
+        
+        if not products:
+            raise UserError(_('No CS-Cart products to benchmark'))
+        
+        category_mapping = self._get_category_mapping(connection)
+        vals_list = [self._prepare_product_vals(prod, category_mapping) for prod in products]
+        
+        results = {'sample_size': len(vals_list)}
+        for mode, migration in (('normal', self), ('fast', self.with_context(**FAST_IMPORT_CONTEXT))):
+            self.env.flush_all()
+            started = time.perf_counter()
+            try:
+                with self.env.cr.savepoint():
+                    migration._load_vals_batch(
+                        'product.template', [dict(vals) for vals in vals_list], {}
+                    )
+                    self.env.flush_all()
+                    results[mode] = (time.perf_counter() - started) * 1000 / len(vals_list)
+                    raise _BenchmarkRollback()
+            except _BenchmarkRollback:
+                self.env.invalidate_all()
+        
+        _logger.info(f"Fast import benchmark on {len(vals_list)} products: "
+                     f"{results['normal']:.2f} ms/record normal, {results['fast']:.2f} ms/record fast")
+        return results
+    
+    def _prepare_product_vals(self, prod_data, category_mapping):
+        """Prepare product.template values from a CS-Cart product row"""
+        # Find category, the first migrated one when the product has several links
+        category_id = next((
+            category_mapping[cs_cart_category_id]
+            for cs_cart_category_id in prod_data.get('category_ids') or [prod_data.get('category_id')]
+            if cs_cart_category_id in category_mapping
+        ), False)
+        if not category_id:
             # Use default category
             category_id = self.env.ref('product.product_category_all').id
         
-        # Prepare product values
-        product_vals = {
+        vals = {
             'name': prod_data.get('product') or prod_data.get('name', 'Unnamed Product'),
             'default_code': prod_data.get('product_code') or '',
             'description': prod_data.get('full_description') or '',
             'description_sale': prod_data.get('short_description') or '',
             'categ_id': category_id,
-            'type': 'product',
             'list_price': float(prod_data.get('list_price', 0) or 0),
             'standard_price': float(prod_data.get('price', 0) or 0),
             'weight': float(prod_data.get('weight', 0) or 0),
@@ -129,14 +223,9 @@ class ProductMigration(models.Model):
             'sale_ok': True,
             'purchase_ok': True,
         }
-        
-        # Handle existing product
-        if existing_product:
-            if update_existing:
-                existing_product.write(product_vals)
-                return existing_product
-            else:
-                return existing_product
+        # Storable products are flagged by is_storable on newer versions
+        if 'is_storable' in self.env['product.template']._fields:
+            vals.update(type='consu', is_storable=True)
         else:
-            # Create new product
-            return self.env['product.template'].create(product_vals)
\ No newline at end of file
+            vals['type'] = 'product'
+        return vals
\ No newline at end of file
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+import re
+
+from .file_source import SOURCE_TABLES
+
+VERSION_RE = re.compile(r'(\d+)\.(\d+)')
+
+# Selected columns of each source table, missing ones are read as NULL
+CATEGORY_COLUMNS = ['category_id', 'parent_id']
+CATEGORY_DESCRIPTION_COLUMNS = ['category', 'description']
+PRODUCT_COLUMNS = ['product_id', 'product_code']
+PRODUCT_DESCRIPTION_COLUMNS = ['product', 'full_description', 'short_description']
+PRODUCT_DETAIL_COLUMNS = ['status', 'list_price', 'price', 'amount', 'weight',
+                          'length', 'width', 'height', 'timestamp']
+USER_COLUMNS = ['user_id', 'email', 'firstname', 'lastname', 'phone', 'fax', 'company',
+                'address', 'city', 'state', 'country', 'zipcode', 'status']
+ORDER_COLUMNS = ['order_id', 'user_id', 'timestamp', 'status', 'total', 'subtotal', 'notes',
+                 'firstname', 'lastname', 'company', 'email', 'phone']
+ORDER_LINE_COLUMNS = ['item_id', 'product_id', 'product_code', 'price', 'amount']
+
+
+def _first(row):
+    """First value of a plain or dictionary cursor row"""
+    return next(iter(row.values())) if isinstance(row, dict) else row[0]
+
+
+def introspect(conn):
+    """Read the tables, columns and indexes of the CS-Cart database behind ``conn``
+
+    Only the tables read by the migrations are described. Returns a JSON
+    serialisable profile, see ``SchemaProfile``.
+    """
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SHOW TABLES LIKE 'cscart\\_%'")
+        table_names = {_first(row) for row in cursor.fetchall()}
+
+        tables = {}
+        for table in sorted(table_names & SOURCE_TABLES):
+            cursor.execute(f"SHOW COLUMNS FROM {table}")
+            columns = [row['Field'] for row in cursor.fetchall()]
+            cursor.execute(f"SHOW INDEX FROM {table}")
+            indexes = {}
+            for row in sorted(cursor.fetchall(), key=lambda row: (row['Key_name'], row['Seq_in_index'])):
+                indexes.setdefault(row['Key_name'], []).append(row['Column_name'])
+            tables[table] = {'columns': columns, 'indexes': indexes}
+
+        version = None
+        if 'cscart_settings' in tables:
+            cursor.execute("SELECT value FROM cscart_settings WHERE name = 'version'")
+            row = cursor.fetchone()
+            version = str(_first(row)) if row else None
+    finally:
+        cursor.close()
+
+    return {
+        'version': version,
+        'multi_vendor': 'cscart_companies' in table_names
+                        and any(name.startswith('cscart_vendor_') for name in table_names),
+        'tables': tables,
+    }
+
+
+class SchemaProfile:
+    """Tables, columns and indexes of a CS-Cart database, and the source queries they allow
+
+    Queries select the columns that exist (others are read as NULL so rows
+    keep the same keys) and take names and descriptions from the main
+    table when it has them, from the per-language descriptions table
+    otherwise.
+    """
+
+    def __init__(self, profile):
+        profile = profile or {}
+        self.version = profile.get('version')
+        self.multi_vendor = profile.get('multi_vendor', False)
+        self.tables = profile.get('tables') or {}
+
+    def has_table(self, table):
+        return table in self.tables
+
+    def has_column(self, table, column):
+        return column in self.tables.get(table, {}).get('columns', [])
+
+    def is_indexed(self, table, column):
+        """Whether an index of ``table`` starts with ``column`` (keyset pages can seek on it)"""
+        return any(columns[:1] == [column] for columns in self.tables.get(table, {}).get('indexes', {}).values())
+
+    def detect_version(self, versions):
+        """Closest of the known ``versions`` (e.g. '4.12') for this database, or 'mve'"""
+        if self.multi_vendor:
+            return 'mve'
+        match = VERSION_RE.search(self.version or '')
+        if match:
+            found = (int(match.group(1)), int(match.group(2)))
+            known = sorted((tuple(int(part) for part in version.split('.')), version) for version in versions)
+            older = [version for parsed, version in known if parsed <= found]
+            return older[-1] if older else known[0][1]
+        # Without a version setting: descriptions moved out of the products
+        # table in later 4.x releases
+        if not self.has_column('cscart_products', 'product') and self.has_table('cscart_product_descriptions'):
+            return '4.10'
+        return '4.0'
+
+    def build_query(self, query_type):
+        """SQL of a source query for this database"""
+        builder = getattr(self, f'_build_{query_type}_query', None)
+        if not builder:
+            raise ValueError(f"Query type '{query_type}' not found")
+        return builder()
+
+    def _require(self, table):
+        if not self.has_table(table):
+            raise ValueError(f"CS-Cart table '{table}' not found, refresh the schema profile of the connection")
+
+    def _columns(self, alias, table, columns):
+        return [f"{alias}.{column}" if self.has_column(table, column) else f"NULL AS {column}"
+                for column in columns]
+
+    def _described_columns(self, alias, table, key, columns, joins):
+        """Name and description columns of a main table or of its descriptions table
+
+        The descriptions join (one language, ``%s`` parameter) is added to
+        ``joins`` only when the main table does not hold the values.
+        """
+        description_table = {
+            'cscart_categories': 'cscart_category_descriptions',
+            'cscart_products': 'cscart_product_descriptions',
+        }[table]
+        if self.has_column(table, columns[0]) or not self.has_table(description_table):
+            return self._columns(alias, table, columns)
+
+        description_alias = f"{alias}d"
+        joins.append(f"LEFT JOIN {description_table} {description_alias} "
+                     f"ON {alias}.{key} = {description_alias}.{key} AND {description_alias}.lang_code = %s")
+        return self._columns(description_alias, description_table, columns)
+
+    def _where(self, alias, table, conditions):
+        """WHERE clause of the ``(column, condition)`` pairs whose column exists"""
+        conditions = [condition for column, condition in conditions if self.has_column(table, column)]
+        return f"WHERE {' AND '.join(conditions) or '1 = 1'}"
+
+    def _select(self, columns, source, joins, where, order_by=''):
+        return f"""
+            SELECT {', '.join(columns)}
+            FROM {source}
+            {' '.join(joins)}
+            {where}
+            {order_by}
+        """
+
+    def _build_categories_query(self):
+        self._require('cscart_categories')
+        joins = []
+        columns = (
+            self._columns('c', 'cscart_categories', CATEGORY_COLUMNS)
+            + self._described_columns('c', 'cscart_categories', 'category_id', CATEGORY_DESCRIPTION_COLUMNS, joins)
+            + self._columns('c', 'cscart_categories', ['position', 'status'])
+        )
+        order_by = 'ORDER BY c.parent_id, c.position' if self.has_column('cscart_categories', 'position') \
+            else 'ORDER BY c.parent_id'
+        return self._select(columns, 'cscart_categories c', joins,
+                            self._where('c', 'cscart_categories', [('status', "c.status = 'A'")]), order_by)
+
+    def _build_products_query(self):
+        self._require('cscart_products')
+        joins = []
+        columns = (
+            self._columns('p', 'cscart_products', PRODUCT_COLUMNS)
+            + self._described_columns('p', 'cscart_products', 'product_id', PRODUCT_DESCRIPTION_COLUMNS, joins)
+            + self._columns('p', 'cscart_products', PRODUCT_DETAIL_COLUMNS)
+        )
+        if self.has_table('cscart_products_categories'):
+            # Only the main category link when links are typed, one row per product
+            link_type = " AND pc.link_type = 'M'" if self.has_column('cscart_products_categories', 'link_type') else ''
+            joins.append(f"LEFT JOIN cscart_products_categories pc ON p.product_id = pc.product_id{link_type}")
+            columns.append('pc.category_id')
+        else:
+            columns.append('NULL AS category_id')
+        return self._select(columns, 'cscart_products p', joins,
+                            self._where('p', 'cscart_products', [('status', "p.status = 'A'")]))
+
+    def _build_inventory_query(self):
+        self._require('cscart_products')
+        return self._select(self._columns('p', 'cscart_products', ['product_id', 'amount', 'timestamp']),
+                            'cscart_products p', [],
+                            self._where('p', 'cscart_products', [('status', "p.status = 'A'")]))
+
+    def _build_product_translations_query(self):
+        self._require('cscart_product_descriptions')
+        return self._select(
+            self._columns('d', 'cscart_product_descriptions', ['product_id', 'lang_code'] + PRODUCT_DESCRIPTION_COLUMNS),
+            'cscart_product_descriptions d', [], "WHERE d.product != ''"
+        )
+
+    def _build_category_translations_query(self):
+        self._require('cscart_category_descriptions')
+        return self._select(
+            self._columns('d', 'cscart_category_descriptions', ['category_id', 'lang_code'] + CATEGORY_DESCRIPTION_COLUMNS),
+            'cscart_category_descriptions d', [], "WHERE d.category != ''"
+        )
+
+    def _build_orders_query(self):
+        self._require('cscart_orders')
+        self._require('cscart_order_details')
+        return self._select(
+            self._columns('o', 'cscart_orders', ORDER_COLUMNS)
+            + self._columns('od', 'cscart_order_details', ORDER_LINE_COLUMNS),
+            'cscart_orders o', ['LEFT JOIN cscart_order_details od ON o.order_id = od.order_id'],
+            self._where('o', 'cscart_orders', [('status', "o.status != 'N'")])
+        )
+
+    def _build_images_query(self):
+        self._require('cscart_images')
+        image_file = "CONCAT(FLOOR(i.image_id / 1000), '/', i.image_path)"
+        if self.has_table('cscart_images_links'):
+            return self._select(
+                ['il.object_id AS product_id', f"{image_file} AS image_file",
+                 f"CASE WHEN il.type = 'M' THEN {image_file} END AS main_image_file"],
+                'cscart_images_links il', ['JOIN cscart_images i ON i.image_id = il.detailed_id'],
+                "WHERE il.object_type = 'product' AND i.image_path != ''"
+            )
+        # Older stores link images to their object directly; the table keeps
+        # the il alias so the key column is the same
+        return self._select(
+            ['il.object_id AS product_id', "CONCAT(FLOOR(il.image_id / 1000), '/', il.image_path) AS image_file",
+             'NULL AS main_image_file'],
+            'cscart_images il', [],
+            "WHERE il.object_type = 'product' AND il.image_path != ''"
+        )
+
+    def _build_customers_query(self):
+        self._require('cscart_users')
+        return self._select(
+            self._columns('u', 'cscart_users', USER_COLUMNS + ['timestamp', 'user_type']),
+            'cscart_users u', [],
+            self._where('u', 'cscart_users', [('user_type', "u.user_type = 'C'"), ('status', "u.status = 'A'")]),
+            'ORDER BY u.user_id'
+        )
+
+    def _build_suppliers_query(self):
+        self._require('cscart_users')
+        joins = []
+        columns = self._columns('u', 'cscart_users', USER_COLUMNS)
+        if self.has_table('cscart_companies') and self.has_column('cscart_users', 'company_id'):
+            joins.append('LEFT JOIN cscart_companies c ON u.company_id = c.company_id')
+            columns += ['c.company AS vendor_name', 'c.status AS vendor_status']
+        else:
+            columns += ['NULL AS vendor_name', 'NULL AS vendor_status']
+        return self._select(
+            columns, 'cscart_users u', joins,
+            self._where('u', 'cscart_users', [('user_type', "u.user_type = 'V'"), ('status', "u.status = 'A'")])
+        )
@@ -5,61 +5,152 @@ odoo.define('cs_cart_migration.migration_progress', function (require) {
     var FormView = require('web.FormView');
     var viewRegistry = require('web.view_registry');
 
+    var PROGRESS_EVENT = 'cs_cart_migration/progress';
+
     var MigrationProgressController = FormController.extend({
         /**
          * @override
          */
         init: function (parent, model, renderer, params) {
             this._super.apply(this, arguments);
-            this.progressCheckInterval = null;
+            this.progressChannel = null;
+            this.entityLogs = {};
+            this._onBusNotification = this._onBusNotification.bind(this);
         },
 
         /**
-         * Start checking progress if migration is in progress
+         * Listen to pushed progress events if migration is in progress
          */
         start: function () {
             var self = this;
             return this._super.apply(this, arguments).then(function () {
                 var record = self.model.get(self.handle);
                 if (record && record.data.state === 'progress') {
-                    self._startProgressChecker();
+                    self._startProgressListener(record);
                 }
             });
         },
 
         /**
-         * Start interval to check progress
+         * Subscribe to the progress channel of the migration's connection
          */
-        _startProgressChecker: function () {
-            var self = this;
-            this.progressCheckInterval = setInterval(function () {
-                self._checkProgress();
-            }, 3000); // Check every 3 seconds
+        _startProgressListener: function (record) {
+            this.progressChannel = 'cs_cart_migration_' + record.data.connection_id.res_id;
+            this.call('bus_service', 'addChannel', this.progressChannel);
+            this.call('bus_service', 'addEventListener', 'notification', this._onBusNotification);
         },
 
         /**
-         * Check migration progress
+         * Stop listening to progress events
          */
-        _checkProgress: function () {
-            var self = this;
-            var record = self.model.get(self.handle);
-            
-            if (!record || record.data.state !== 'progress') {
-                clearInterval(self.progressCheckInterval);
+        _stopProgressListener: function () {
+            if (!this.progressChannel) {
                 return;
             }
+            this.call('bus_service', 'removeEventListener', 'notification', this._onBusNotification);
+            this.call('bus_service', 'deleteChannel', this.progressChannel);
+            this.progressChannel = null;
+        },
+
+        /**
+         * Apply the progress events of this wizard to the rendered form
+         */
+        _onBusNotification: function (ev) {
+            var self = this;
+            var record = this.model.get(this.handle);
+            _.each(ev.detail, function (notification) {
+                var event = notification.payload;
+                // Other runs on the same connection publish on the same channel
+                if (notification.type !== PROGRESS_EVENT || event.wizard_id !== record.res_id) {
+                    return;
+                }
+                if (event.type === 'entity') {
+                    self._applyEntityProgress(event);
+                } else if (event.type === 'log') {
+                    self._appendLogMessage(event.message);
+                } else {
+                    self._applyWizardProgress(event);
+                }
+            });
+        },
 
-            // Reload the record to get updated progress
-            self.reload();
+        /**
+         * Update only the counters carried by a wizard event
+         */
+        _applyWizardProgress: function (event) {
+            if (event.progress !== undefined) {
+                var percent = Math.round(event.progress);
+                this.$('.progress-bar').css('width', percent + '%').find('span').text(percent);
+            }
+            if (event.current_operation !== undefined) {
+                this.$('.o_field_widget[name="current_operation"]').text(event.current_operation);
+            }
+            if (event.state && event.state !== 'progress') {
+                // Final state: stop listening and render the result once
+                this._stopProgressListener();
+                this.reload();
+            }
         },
 
         /**
-         * Clean up interval on destroy
+         * Replace the line of one entity in the rendered progress summary
+         *
+         * Shards of the same entity are summed, as on the server.
          */
-        destroy: function () {
-            if (this.progressCheckInterval) {
-                clearInterval(this.progressCheckInterval);
+        _applyEntityProgress: function (event) {
+            var logs = this.entityLogs[event.entity] = this.entityLogs[event.entity] || {};
+            logs[event.log_id] = event;
+            var processed = 0, total = 0, rate = 0;
+            _.each(logs, function (log) {
+                processed += log.processed;
+                total += log.total;
+                rate += log.rate;
+            });
+            var eta = rate ? Math.max(total - processed, 0) / rate : 0;
+            var text = _.str.sprintf('%s: %s / %s (%.1f records/s, ETA %s)',
+                event.entity, processed, total, rate, this._formatEta(eta));
+
+            var $summary = this.$('.o_field_widget[name="entity_progress"]');
+            var prefix = event.entity + ':';
+            var found = false;
+            var lines = _.map(_.compact($summary.text().split('\n')), function (line) {
+                if (line.indexOf(prefix) === 0) {
+                    found = true;
+                    return text;
+                }
+                return line;
+            });
+            if (!found) {
+                lines.push(text);
+            }
+            $summary.text(lines.join('\n'));
+        },
+
+        /**
+         * Short human readable duration, as rendered by the wizard
+         */
+        _formatEta: function (seconds) {
+            if (seconds < 60) {
+                return _.str.sprintf('%ds', Math.round(seconds));
+            } else if (seconds < 3600) {
+                return _.str.sprintf('%dm', Math.round(seconds / 60));
             }
+            return _.str.sprintf('%.1fh', seconds / 3600);
+        },
+
+        /**
+         * Append the new lines to the log instead of re-reading it
+         */
+        _appendLogMessage: function (message) {
+            var $log = this.$('.o_field_widget[name="log_message"]');
+            $log.text($log.text() + message);
+        },
+
+        /**
+         * Stop listening on destroy
+         */
+        destroy: function () {
+            this._stopProgressListener();
             this._super.apply(this, arguments);
         },
     });
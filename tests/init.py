@@ -0,0 +1,5 @@
+from . import test_benchmark
+from . import test_fast_import
+from . import test_file_source
+from . import test_migration_helpers
+from . import test_sharding
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import random
+import time
+from unittest.mock import patch
+
+from odoo.tests import TransactionCase, tagged
+
+from ..models.benchmark import CsCartBenchmarkRun
+
+
+class RecordingCursor:
+    """MySQL cursor double keeping the rows inserted per table"""
+
+    def __init__(self):
+        self.rows = {}
+
+    def executemany(self, query, rows):
+        table = query.split()[2]
+        self.rows.setdefault(table, []).extend(rows)
+
+
+class RecordingConnection:
+
+    def commit(self):
+        pass
+
+
+@tagged('post_install', '-at_install')
+class TestBenchmark(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.connection = cls.env['cs.cart.connection'].create({
+            'name': 'Benchmark',
+            'database': 'cscart_bench',
+        })
+        cls.run = cls.env['cs.cart.benchmark.run'].create({
+            'connection_id': cls.connection.id,
+            'category_depth': 3,
+            'category_fanout': 2,
+            'languages': 'en,de',
+        })
+        cls.dataset = cls.env['cs.cart.benchmark.dataset']
+
+    def _generate(self, generate, *args):
+        cursor = RecordingCursor()
+        result = generate(RecordingConnection(), cursor, random.Random(self.run.seed), *args)
+        return result, cursor.rows
+
+    def test_category_tree(self):
+        leaf_ids, rows = self._generate(self.dataset._generate_categories, self.run, ['en', 'de'])
+        categories = rows['cscart_categories']
+        self.assertEqual(len(categories), 2 + 4 + 8)
+        self.assertEqual(len(leaf_ids), 8)
+        self.assertEqual(len(rows['cscart_category_descriptions']), len(categories) * 2)
+        # Parents always come before their children
+        seen = {0}
+        for category in categories:
+            self.assertIn(category[1], seen)
+            seen.add(category[0])
+
+    def test_same_seed_same_data(self):
+        leaf_ids = list(range(1, 9))
+        first = self._generate(self.dataset._generate_products, 50, leaf_ids, ['en'])[1]
+        second = self._generate(self.dataset._generate_products, 50, leaf_ids, ['en'])[1]
+        self.assertEqual(first, second)
+        self.assertEqual(len(first['cscart_products']), 50)
+        main_links = [link for link in first['cscart_products_categories'] if link[2] == 'M']
+        self.assertEqual(len(main_links), 50)
+
+    def test_image_tables_walk_the_same_images(self):
+        _result, rows = self._generate(self.dataset._generate_images, 20, 3, False)
+        images = rows['cscart_images']
+        links = rows['cscart_images_links']
+        self.assertEqual([(row[0], row[2]) for row in images], [(row[0], row[1]) for row in links])
+        self.assertTrue(all(1 <= sum(1 for row in images if row[2] == product_id) <= 3
+                            for product_id in range(1, 21)))
+
+    def test_run_records_each_phase(self):
+        self.run.state = 'generated'
+        calls = []
+
+        def runner(phase):
+            def run():
+                calls.append(phase)
+                # Memory allocated by the phase shows in its own peak only;
+                # the pages are written and held for a few samples
+                payload = b'x' * (64 * 1024 * 1024) if phase == 'category' else b''
+                time.sleep(0.2)
+                return len(payload)
+            return run
+
+        runners = {phase: runner(phase) for phase in ('category', 'product', 'image', 'inventory',
+                                                      'customer', 'supplier', 'order')}
+        # The run commits after each phase
+        with patch.object(CsCartBenchmarkRun, '_get_phase_runners', lambda run: runners), \
+                patch.object(type(self.env.cr), 'commit', lambda cr: None):
+            self.run.run_benchmark()
+
+        self.assertEqual(self.run.state, 'done')
+        # No images directory and not a Multi-Vendor store
+        self.assertEqual(calls, ['category', 'product', 'inventory', 'customer', 'order'])
+        results = {result.phase: result for result in self.run.result_ids}
+        self.assertEqual(set(results), set(calls))
+        self.assertGreaterEqual(results['category'].peak_memory_mb, 48)
+        self.assertLess(results['product'].peak_memory_mb, 48)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+from ..models.migration_base import FAST_IMPORT_CONTEXT
+
+
+@tagged('post_install', '-at_install')
+class TestFastImport(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.migration = cls.env['cs.cart.partner.migration']
+
+    def _load(self, migration, first_id):
+        """Create three customers, then update them, through the batch loader"""
+        vals_list = [
+            {'name': f"Customer {cs_cart_id}", 'email': f"customer{cs_cart_id}@example.com",
+             'customer_rank': 1, 'cs_cart_id': cs_cart_id}
+            for cs_cart_id in range(first_id, first_id + 3)
+        ]
+        created = migration._load_vals_batch('res.partner', vals_list, {})
+        migration._load_vals_batch(
+            'res.partner',
+            [dict(vals, name=f"{vals['name']} (updated)", email=f"new.{vals['email']}") for vals in vals_list],
+            created
+        )
+        self.env.flush_all()
+        return list(created.values())
+
+    def _count_mail(self, partner_ids):
+        messages = self.env['mail.message'].search([
+            ('model', '=', 'res.partner'), ('res_id', 'in', partner_ids),
+        ])
+        tracking_values = self.env['mail.tracking.value'].search_count([
+            ('mail_message_id', 'in', messages.ids),
+        ])
+        return len(messages), tracking_values
+
+    def test_default_context_logs_creation(self):
+        partner_ids = self._load(self.migration, 1000)
+        messages, _tracking_values = self._count_mail(partner_ids)
+        self.assertGreaterEqual(messages, len(partner_ids))
+
+    def test_fast_import_creates_no_mail(self):
+        partner_ids = self._load(self.migration.with_context(**FAST_IMPORT_CONTEXT), 2000)
+        self.assertEqual(len(partner_ids), 3)
+        self.assertEqual(self._count_mail(partner_ids), (0, 0))
+        partners = self.env['res.partner'].browse(partner_ids)
+        self.assertTrue(all(name.endswith('(updated)') for name in partners.mapped('name')))
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+
+from odoo.tests import TransactionCase, tagged
+
+from ..models import file_source, schema_profile
+
+DUMP = """-- MySQL dump 10.13
+DROP TABLE IF EXISTS `cscart_products`;
+CREATE TABLE `cscart_products` (
+  `product_id` mediumint(8) unsigned NOT NULL AUTO_INCREMENT,
+  `product_code` varchar(64) NOT NULL DEFAULT '',
+  `status` char(1) NOT NULL DEFAULT 'A',
+  `list_price` decimal(12,2) NOT NULL DEFAULT '0.00',
+  PRIMARY KEY (`product_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+INSERT INTO `cscart_products` VALUES (1,'A-1','A',10.50),(2,'B\\'2','A',NULL),(10,'C\\\\3','D',3.00);
+CREATE TABLE `cscart_product_descriptions` (
+  `product_id` mediumint(8) unsigned NOT NULL DEFAULT '0',
+  `lang_code` char(2) NOT NULL DEFAULT '',
+  `product` varchar(255) NOT NULL DEFAULT '',
+  PRIMARY KEY (`product_id`,`lang_code`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+INSERT INTO `cscart_product_descriptions` (`product_id`, `lang_code`, `product`) VALUES (1,'en','Line\\nbreak'),(2,'en','Two'),(10,'en','Ten'),(1,'de','Eins');
+CREATE TABLE `cscart_sessions` (
+  `session_id` varchar(64) NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+INSERT INTO `cscart_sessions` VALUES ('abc');
+"""
+
+
+@tagged('post_install', '-at_install')
+class TestFileSource(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        self.cache_dir = os.path.join(self.tmp, 'cache')
+        self.dump_path = self._write('dump.sql', DUMP)
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmp, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def _connect(self, source_type, path):
+        conn = file_source.connect(source_type, path, self.cache_dir)
+        self.addCleanup(conn.close)
+        return conn
+
+    def test_dump_events(self):
+        events = list(file_source.iter_dump_events(self.dump_path))
+        self.assertEqual(events[0], ('table', 'cscart_products', [
+            ('product_id', 'mediumint'), ('product_code', 'varchar'),
+            ('status', 'char'), ('list_price', 'decimal'),
+        ]))
+        self.assertEqual(events[1], ('rows', 'cscart_products', None, [
+            (1, 'A-1', 'A', 10.5), (2, "B'2", 'A', None), (10, 'C\\3', 'D', 3.0),
+        ]))
+        self.assertEqual(events[3][2], ['product_id', 'lang_code', 'product'])
+        self.assertEqual(events[3][3][0], (1, 'en', 'Line\nbreak'))
+
+    def test_dump_source_skips_other_tables(self):
+        cursor = self._connect('dump', self.dump_path).cursor(dictionary=True)
+        cursor.execute("SHOW TABLES LIKE 'cscart\\_%'")
+        self.assertEqual(
+            {row['Tables'] for row in cursor.fetchall()},
+            {'cscart_products', 'cscart_product_descriptions', 'cscart_sessions'}
+        )
+        cursor.execute("SELECT COUNT(*) AS count FROM cscart_sessions")
+        self.assertEqual(cursor.fetchone()['count'], 0)
+        # Keys compare as numbers
+        cursor.execute("SELECT product_id FROM cscart_products WHERE product_id > %s ORDER BY product_id", (1,))
+        self.assertEqual([row['product_id'] for row in cursor.fetchall()], [2, 10])
+
+    def test_csv_source(self):
+        directory = os.path.join(self.tmp, 'csv')
+        self._write('csv/cscart_users.csv', 'user_id,email,firstname,timestamp\n'
+                                            '2,b@example.com,\\N,1700000000\n'
+                                            '10,j@example.com,John,1700000100\n')
+        cursor = self._connect('csv', directory).cursor(dictionary=True)
+        cursor.execute("SELECT * FROM cscart_users WHERE user_id > %s ORDER BY user_id", (1,))
+        self.assertEqual(cursor.fetchall(), [
+            {'user_id': 2, 'email': 'b@example.com', 'firstname': None, 'timestamp': 1700000000},
+            {'user_id': 10, 'email': 'j@example.com', 'firstname': 'John', 'timestamp': 1700000100},
+        ])
+
+    def test_profile_queries_run_on_source(self):
+        conn = self._connect('dump', self.dump_path)
+        profile = schema_profile.SchemaProfile(schema_profile.introspect(conn))
+        self.assertEqual(set(profile.tables), {'cscart_products', 'cscart_product_descriptions'})
+        self.assertTrue(profile.is_indexed('cscart_products', 'product_id'))
+        self.assertEqual(profile.detect_version(['4.0', '4.10', '4.12']), '4.10')
+
+        query = profile.build_query('products')
+        # Names come from the descriptions table, missing columns as NULL
+        self.assertIn('LEFT JOIN cscart_product_descriptions pd', query)
+        self.assertIn('NULL AS full_description', query)
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f"{query} ORDER BY p.product_id", ('en',))
+        rows = cursor.fetchall()
+        self.assertEqual([(row['product_id'], row['product']) for row in rows], [(1, 'Line\nbreak'), (2, 'Two')])
+        self.assertIsNone(rows[0]['category_id'])
+
+        with self.assertRaises(ValueError):
+            profile.build_query('orders')
+        with self.assertRaises(ValueError):
+            profile.build_query('unknown')
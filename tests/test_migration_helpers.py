@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+import calendar
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from odoo.tests import TransactionCase, tagged
+
+from ..models.migration_base import DELTA_SYNC_OVERLAP
+
+
+@tagged('post_install', '-at_install')
+class TestMigrationHelpers(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.migration = cls.env['cs.cart.partner.migration']
+        cls.connection = cls.env['cs.cart.connection'].create({
+            'name': 'Helpers',
+            'database': 'cscart_helpers',
+        })
+
+    def test_group_rows_across_chunks(self):
+        chunks = [
+            [{'order_id': 1, 'item_id': 11, 'image': 'a'}, {'order_id': 1, 'item_id': 12, 'image': 'a'},
+             {'order_id': 2, 'item_id': 21, 'image': None}],
+            [{'order_id': 2, 'item_id': 22, 'image': 'b'}, {'order_id': 3, 'item_id': None, 'image': None}],
+        ]
+        grouped = list(self.migration._group_cs_cart_rows(
+            iter(chunks), 'order_id', {'image': 'images'}, {'lines': ['item_id']}
+        ))
+        # The last record of a chunk waits for the next one
+        self.assertEqual([[order['order_id'] for order in orders] for orders in grouped], [[1], [2], [3]])
+        first, second, third = (orders[0] for orders in grouped)
+        self.assertEqual(first['lines'], [{'item_id': 11}, {'item_id': 12}])
+        self.assertEqual(first['images'], ['a'])
+        self.assertEqual(second['lines'], [{'item_id': 21}, {'item_id': 22}])
+        self.assertEqual(second['images'], ['b'])
+        self.assertEqual((third['lines'], third['images']), ([], []))
+
+    def test_category_levels(self):
+        rows = {
+            1: {'category_id': 1, 'parent_id': 0},
+            2: {'category_id': 2, 'parent_id': 1},
+            3: {'category_id': 3, 'parent_id': 2},
+            4: {'category_id': 4, 'parent_id': 99},
+            5: {'category_id': 5, 'parent_id': 6},
+            6: {'category_id': 6, 'parent_id': 5},
+        }
+        levels = self.env['cs.cart.category.migration']._get_category_levels(rows)
+        self.assertEqual(
+            [sorted(cat['category_id'] for cat in level) for level in levels],
+            [[1, 4], [2], [3], [5, 6]]
+        )
+
+    def test_keyset_query(self):
+        query = "SELECT u.user_id FROM cscart_users u WHERE u.status = 'A' ORDER BY u.user_id"
+        self.assertEqual(
+            self.migration._split_order_by(query),
+            ("SELECT u.user_id FROM cscart_users u WHERE u.status = 'A'", 'ORDER BY u.user_id')
+        )
+        base = "SELECT u.user_id FROM cscart_users u WHERE u.status = 'A'"
+        self.assertEqual(self.migration._keyset_query(query, 'u.user_id'),
+                         f"{base} AND u.user_id > %s ORDER BY u.user_id LIMIT %s")
+        self.assertEqual(self.migration._keyset_query(query, 'u.user_id', 'range'),
+                         f"{base} AND u.user_id > %s ORDER BY u.user_id")
+        self.assertEqual(self.migration._keyset_query(query, 'u.user_id', 'exact'), f"{base} AND u.user_id = %s")
+        self.assertEqual(self.migration._keyset_query(query, 'u.user_id', 'upto'), f"{base} AND u.user_id <= %s")
+
+    def test_fingerprint(self):
+        vals = {'name': 'A', 'cs_cart_id': 1, 'active': True}
+        fingerprint = self.migration._get_fingerprint(vals)
+        self.assertEqual(fingerprint, self.migration._get_fingerprint(dict(reversed(list(vals.items())))))
+        self.assertEqual(fingerprint, self.migration._get_fingerprint(dict(vals, cs_cart_hash='old')))
+        self.assertNotEqual(fingerprint, self.migration._get_fingerprint(dict(vals, name='B')))
+
+    def test_load_batch_groups_writes(self):
+        Partner = self.env['res.partner']
+        vals_list = [{'name': f"Partner {i}", 'cs_cart_id': i} for i in range(1, 5)]
+        created = self.migration._load_vals_batch('res.partner', vals_list, {})
+        self.assertEqual(set(created), {1, 2, 3, 4})
+        existing_map, fingerprints = self.migration._get_existing_map('res.partner', list(created))
+
+        updates = [
+            {'name': 'Partner 1', 'cs_cart_id': 1},
+            {'name': 'Renamed', 'cs_cart_id': 2},
+            {'name': 'Renamed', 'cs_cart_id': 3},
+            {'name': 'Other', 'cs_cart_id': 4},
+        ]
+        written = []
+        write = type(Partner).write
+
+        def recording_write(records, vals):
+            written.append((sorted(records.ids), vals))
+            return write(records, vals)
+
+        with patch.object(type(Partner), 'write', recording_write):
+            loaded = self.migration._load_vals_batch(
+                'res.partner', updates, existing_map, fingerprints=fingerprints
+            )
+        self.assertEqual(loaded, created)
+        # One write per distinct set of values, none for the unchanged record
+        self.assertEqual(sorted(written, key=lambda item: item[1]['name']), [
+            ([created[4]], {'name': 'Other'}),
+            (sorted([created[2], created[3]]), {'name': 'Renamed'}),
+        ])
+        _existing_map, new_fingerprints = self.migration._get_existing_map('res.partner', list(created))
+        self.assertEqual(new_fingerprints[1], fingerprints[1])
+        for cs_cart_id, vals in zip((2, 3, 4), updates[1:]):
+            self.assertEqual(new_fingerprints[cs_cart_id], self.migration._get_fingerprint(vals))
+
+    def _log(self, migration_type, status, start_date, **vals):
+        return self.env['cs.cart.migration.log'].create(dict(
+            vals,
+            connection_id=self.connection.id,
+            migration_type=migration_type,
+            status=status,
+            start_date=start_date,
+        ))
+
+    def test_changed_since(self):
+        self.assertIsNone(self.migration._get_changed_since(self.connection, 'customer'))
+
+        started = datetime(2024, 1, 1, 12, 0, 0)
+        self._log('customer', 'completed', started)
+        # Partial runs, other entities and shards do not move the watermark
+        self._log('customer', 'partial', started + timedelta(days=1))
+        self._log('product', 'completed', started + timedelta(days=2))
+        parent = self._log('customer', 'in_progress', started + timedelta(days=3))
+        self._log('customer', 'completed', started + timedelta(days=3), parent_id=parent.id)
+
+        self.assertEqual(
+            self.migration._get_changed_since(self.connection, 'customer'),
+            calendar.timegm(started.timetuple()) - DELTA_SYNC_OVERLAP
+        )
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+from odoo.exceptions import UserError
+from odoo.tests import TransactionCase, tagged
+
+
+class RecordingDelay:
+    """Stand-in for ``with_delay()`` recording the queued calls"""
+
+    def __init__(self, records, queued):
+        self.records = records
+        self.queued = queued
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.queued.append((self.records, name))
+
+
+@tagged('post_install', '-at_install')
+class TestSharding(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.connection = cls.env['cs.cart.connection'].create({
+            'name': 'Shards',
+            'database': 'cscart_shards',
+        })
+        Log = cls.env['cs.cart.migration.log']
+        cls.parent = Log.create({
+            'connection_id': cls.connection.id,
+            'migration_type': 'customer',
+            'status': 'in_progress',
+        })
+        cls.shards = Log.create([{
+            'connection_id': cls.connection.id,
+            'migration_type': 'customer',
+            'status': status,
+            'parent_id': cls.parent.id,
+            'processed_records': processed,
+            'successful_records': processed,
+        } for status, processed in (('completed', 10), ('in_progress', 4))])
+
+    def test_failed_shard_fails_parent(self):
+        queued = []
+        cursor_calls = []
+        Log = type(self.parent)
+
+        def fail(connection):
+            raise ConnectionError('CS-Cart server went away')
+
+        with patch.object(Log, 'with_delay', lambda records: RecordingDelay(records, queued), create=True), \
+                patch.object(type(self.connection), 'get_connection', fail), \
+                patch.object(type(self.env.cr), 'rollback', lambda cr: cursor_calls.append('rollback')), \
+                patch.object(type(self.env.cr), 'commit', lambda cr: cursor_calls.append('commit')):
+            with self.assertRaises(UserError):
+                self.shards[1]._resume_migration()
+
+        # The failure and its aggregation are committed before the job
+        # transaction is rolled back
+        self.assertEqual(cursor_calls, ['rollback', 'commit'])
+        self.assertEqual(self.shards[1].status, 'failed')
+        self.assertEqual(queued, [(self.parent, '_aggregate_shards')])
+
+        self.parent._aggregate_shards()
+        self.assertEqual(self.parent.status, 'failed')
+        self.assertEqual(self.parent.processed_records, 14)
+        self.assertTrue(self.parent.end_date)
@@ -25,6 +25,11 @@ class CsCartMigrationWizard(models.TransientModel):
     import_products = fields.Boolean(string='Import Products', default=True)
     import_customers = fields.Boolean(string='Import Customers', default=True)
     import_suppliers = fields.Boolean(string='Import Suppliers', default=False)
+    import_orders = fields.Boolean(
+        string='Import Orders',
+        default=False,
+        help="Import the CS-Cart order history as sale orders (after customers and products)"
+    )
     
     # Advanced Options
     update_existing = fields.Boolean(
@@ -42,7 +47,7 @@ class CsCartMigrationWizard(models.TransientModel):
     import_images = fields.Boolean(
         string='Import Product Images',
         default=False,
-        help="Import product images from CS-Cart (requires image paths)"
+        help="Import product images from the CS-Cart images directory set on the connection"
     )
     
     import_prices = fields.Boolean(
@@ -54,7 +59,16 @@ class CsCartMigrationWizard(models.TransientModel):
     import_inventory = fields.Boolean(
         string='Import Inventory',
         default=False,
-        help="Import product quantities (requires stock module)"
+        help="Set the on hand quantity of migrated products from the CS-Cart stock amounts"
+    )
+    
+    inventory_location_id = fields.Many2one(
+        'stock.location',
+        string='Inventory Location',
+        domain=[('usage', '=', 'internal')],
+        default=lambda self: self.env['stock.warehouse'].search(
+            [('company_id', '=', self.env.company.id)], limit=1).lot_stock_id,
+        help="Stock location receiving the imported quantities"
     )
     
     # Performance Options
@@ -65,6 +79,36 @@ class CsCartMigrationWizard(models.TransientModel):
         required=True
     )
     
+    sync_mode = fields.Selection([
+        ('full', 'Full Import'),
+        ('delta', 'Changed Since Last Sync'),
+    ], string='Sync Mode', default='full', required=True,
+        help="Changed Since Last Sync: only import CS-Cart rows whose timestamp is newer "
+             "than the start of the last completed migration of the same data type")
+    
+    shard_count = fields.Integer(
+        string='Parallel Jobs',
+        default=1,
+        required=True,
+        help="Split the product and customer imports into this many key ranges, "
+             "each imported by its own background job"
+    )
+    
+    fast_import = fields.Boolean(
+        string='Fast Import',
+        default=False,
+        help="Import without chatter messages, field tracking, follower subscriptions "
+             "or password reset mails; stored fields are recomputed once per batch"
+    )
+    
+    extraction_mode = fields.Selection([
+        ('stream', 'Streaming Cursor'),
+        ('keyset', 'Keyset Pages'),
+    ], string='Extraction Mode', default='stream', required=True,
+        help="Streaming Cursor: read each table with a single unbuffered query.\n"
+             "Keyset Pages: read each table in short primary key ranges "
+             "(one batch per query); a dropped connection only repeats the current page.")
+    
     language_code = fields.Char(
         string='Language Code',
         default='tr',
@@ -72,6 +116,12 @@ class CsCartMigrationWizard(models.TransientModel):
         required=True
     )
     
+    translation_langs = fields.Char(
+        string='Translation Languages',
+        help="Comma separated CS-Cart language codes (e.g. en,de) whose names and descriptions "
+             "are imported as translations in the same pass; the languages must be active in Odoo"
+    )
+    
     # Status Fields
     state = fields.Selection([
         ('draft', 'Draft'),
@@ -81,15 +131,34 @@ class CsCartMigrationWizard(models.TransientModel):
         ('error', 'Error'),
     ], string='Status', default='draft', readonly=True)
     
+    resume_run = fields.Boolean(
+        string='Resume Run',
+        readonly=True,
+        help="Set on retry: entities continue from their last checkpoint"
+    )
+    
     progress = fields.Float(string='Progress', default=0.0)
     current_operation = fields.Char(string='Current Operation')
+    entity_progress = fields.Text(
+        string='Entity Progress',
+        compute='_compute_entity_progress',
+        help="Records done, throughput and estimated time left of each imported entity"
+    )
     log_message = fields.Text(string='Log Messages')
+    dry_run_report = fields.Text(
+        string='Dry Run',
+        readonly=True,
+        help="Source volume, records already in Odoo and projected duration of each selected entity"
+    )
     
     # Results
     categories_imported = fields.Integer(string='Categories Imported', readonly=True)
     products_imported = fields.Integer(string='Products Imported', readonly=True)
     customers_imported = fields.Integer(string='Customers Imported', readonly=True)
     suppliers_imported = fields.Integer(string='Suppliers Imported', readonly=True)
+    orders_imported = fields.Integer(string='Orders Imported', readonly=True)
+    images_imported = fields.Integer(string='Product Images Imported', readonly=True)
+    inventory_imported = fields.Integer(string='Stock Levels Imported', readonly=True)
     
     start_time = fields.Datetime(string='Start Time', readonly=True)
     end_time = fields.Datetime(string='End Time', readonly=True)
@@ -103,6 +172,14 @@ class CsCartMigrationWizard(models.TransientModel):
             if record.batch_size > 1000:
                 raise ValidationError(_('Batch size cannot exceed 1000'))
     
+    @api.constrains('shard_count')
+    def _check_shard_count(self):
+        for record in self:
+            if record.shard_count < 1:
+                raise ValidationError(_('Parallel jobs must be at least 1'))
+            if record.shard_count > 64:
+                raise ValidationError(_('Parallel jobs cannot exceed 64'))
+    
     @api.depends('start_time', 'end_time')
     def _compute_duration(self):
         for record in self:
@@ -128,9 +205,12 @@ class CsCartMigrationWizard(models.TransientModel):
         self.ensure_one()
         
         # Validate inputs
-        if not any([self.import_categories, self.import_products, 
-                   self.import_customers, self.import_suppliers]):
+        if not any([self.import_categories, self.import_products, self.import_images,
+                   self.import_inventory, self.import_customers, self.import_suppliers,
+                   self.import_orders]):
             raise UserError(_('Please select at least one data type to import'))
+        if self.import_inventory and not self.inventory_location_id:
+            raise UserError(_('Please select the location receiving the imported inventory'))
         
         # Start migration in background job
         self._start_background_migration()
@@ -148,24 +228,41 @@ class CsCartMigrationWizard(models.TransientModel):
     
     def _start_background_migration(self):
         """Start migration in background"""
-        self.write({
-            'state': 'progress',
-            'start_time': fields.Datetime.now(),
-            'progress': 0,
-            'log_message': _('Migration started...\n'),
-        })
+        if self.resume_run:
+            # Keep the original start time, it identifies the logs to resume
+            self.write({
+                'state': 'progress',
+                'progress': 0,
+                'log_message': (self.log_message or '') + _('Resuming migration from the last checkpoint...\n'),
+            })
+        else:
+            self.write({
+                'state': 'progress',
+                'start_time': fields.Datetime.now(),
+                'progress': 0,
+                'log_message': _('Migration started...\n'),
+            })
         
         # Create background job
         self.with_delay()._run_migration_job()
     
     def _run_migration_job(self):
         """Background job for migration"""
+        # The migration logs of this run are tagged with the wizard, so its
+        # progress is told apart from other runs on the same connection
+        self = self.with_context(cs_cart_wizard_id=self.id)
+        # Counts are written with the final state, the running counts of
+        # each entity are published by the migrations themselves
+        imported = {}
         try:
             total_steps = sum([
                 1 if self.import_categories else 0,
                 1 if self.import_products else 0,
+                1 if self.import_images else 0,
+                1 if self.import_inventory else 0,
                 1 if self.import_customers else 0,
                 1 if self.import_suppliers else 0,
+                1 if self.import_orders else 0,
             ])
             
             current_step = 0
@@ -174,124 +271,486 @@ class CsCartMigrationWizard(models.TransientModel):
             if self.import_categories:
                 current_step += 1
                 self._update_progress(current_step, total_steps, _('Importing categories...'))
-                categories = self._import_categories()
-                self.categories_imported = len(categories)
-                self._add_log_message(_('Imported %d categories\n') % len(categories))
+                imported['categories_imported'] = self._run_import_step('category', self._import_categories)
+                self._add_log_message(_('Imported %d categories\n') % imported.get('categories_imported', 0))
             
             # Import products
             if self.import_products:
                 current_step += 1
                 self._update_progress(current_step, total_steps, _('Importing products...'))
-                products = self._import_products()
-                self.products_imported = len(products)
-                self._add_log_message(_('Imported %d products\n') % len(products))
+                if self.shard_count > 1:
+                    parent_log = self._start_import_shards('product', self._import_products_sharded)
+                    self._add_log_message(_('Queued products in %d parallel jobs (migration log #%d)\n')
+                                          % (len(parent_log.shard_ids), parent_log.id))
+                else:
+                    imported['products_imported'] = self._run_import_step('product', self._import_products)
+                    self._add_log_message(_('Imported %d products\n') % imported.get('products_imported', 0))
+            
+            # Import product images
+            if self.import_images:
+                current_step += 1
+                self._update_progress(current_step, total_steps, _('Importing product images...'))
+                if self.import_products and self.shard_count > 1:
+                    # Images are attached to existing products only
+                    self._add_log_message(_('Skipped product images: import them once the product jobs finished\n'))
+                else:
+                    imported['images_imported'] = self._run_import_step('image', self._import_images)
+                    self._add_log_message(_('Imported images of %d products\n') % imported.get('images_imported', 0))
+            
+            # Import inventory
+            if self.import_inventory:
+                current_step += 1
+                self._update_progress(current_step, total_steps, _('Importing inventory...'))
+                if self.import_products and self.shard_count > 1:
+                    # Quantities are set on existing products only
+                    self._add_log_message(_('Skipped inventory: import it once the product jobs finished\n'))
+                else:
+                    imported['inventory_imported'] = self._run_import_step('inventory', self._import_inventory)
+                    self._add_log_message(_('Adjusted stock of %d products\n') % imported.get('inventory_imported', 0))
             
             # Import customers
             if self.import_customers:
                 current_step += 1
                 self._update_progress(current_step, total_steps, _('Importing customers...'))
-                customers = self._import_customers()
-                self.customers_imported = len(customers)
-                self._add_log_message(_('Imported %d customers\n') % len(customers))
+                if self.shard_count > 1:
+                    parent_log = self._start_import_shards('customer', self._import_customers_sharded)
+                    self._add_log_message(_('Queued customers in %d parallel jobs (migration log #%d)\n')
+                                          % (len(parent_log.shard_ids), parent_log.id))
+                else:
+                    imported['customers_imported'] = self._run_import_step('customer', self._import_customers)
+                    self._add_log_message(_('Imported %d customers\n') % imported.get('customers_imported', 0))
             
             # Import suppliers
             if self.import_suppliers and self.cs_cart_version == 'mve':
                 current_step += 1
                 self._update_progress(current_step, total_steps, _('Importing suppliers...'))
-                suppliers = self._import_suppliers()
-                self.suppliers_imported = len(suppliers)
-                self._add_log_message(_('Imported %d suppliers\n') % len(suppliers))
+                imported['suppliers_imported'] = self._run_import_step('supplier', self._import_suppliers)
+                self._add_log_message(_('Imported %d suppliers\n') % imported.get('suppliers_imported', 0))
+            
+            # Import orders
+            if self.import_orders:
+                current_step += 1
+                self._update_progress(current_step, total_steps, _('Importing orders...'))
+                if self.shard_count > 1 and (self.import_products or self.import_customers):
+                    # Orders reference products and customers that must exist
+                    self._add_log_message(_('Skipped orders: import them once the product and customer jobs finished\n'))
+                else:
+                    imported['orders_imported'] = self._run_import_step('order', self._import_orders)
+                    self._add_log_message(_('Imported %d orders\n') % imported.get('orders_imported', 0))
             
             # Complete migration
-            self.write({
-                'state': 'completed',
-                'end_time': fields.Datetime.now(),
-                'progress': 100,
-            })
+            self._write_progress(dict(
+                imported,
+                state='completed',
+                end_time=fields.Datetime.now(),
+                progress=100,
+                # A later run of this wizard starts afresh unless retried
+                resume_run=False,
+            ))
             
             self._add_log_message(_('\nMigration completed successfully!\n'))
             self._add_log_message(_('Total imported:\n'))
-            self._add_log_message(_('- Categories: %d\n') % self.categories_imported)
-            self._add_log_message(_('- Products: %d\n') % self.products_imported)
-            self._add_log_message(_('- Customers: %d\n') % self.customers_imported)
+            self._add_log_message(_('- Categories: %d\n') % imported.get('categories_imported', 0))
+            self._add_log_message(_('- Products: %d\n') % imported.get('products_imported', 0))
+            if self.import_images:
+                self._add_log_message(_('- Product images: %d\n') % imported.get('images_imported', 0))
+            if self.import_inventory:
+                self._add_log_message(_('- Stock levels: %d\n') % imported.get('inventory_imported', 0))
+            self._add_log_message(_('- Customers: %d\n') % imported.get('customers_imported', 0))
             if self.cs_cart_version == 'mve':
-                self._add_log_message(_('- Suppliers: %d\n') % self.suppliers_imported)
+                self._add_log_message(_('- Suppliers: %d\n') % imported.get('suppliers_imported', 0))
+            if self.import_orders:
+                self._add_log_message(_('- Orders: %d\n') % imported.get('orders_imported', 0))
             
         except Exception as e:
             _logger.error(f"Migration failed: {str(e)}", exc_info=True)
-            self.write({
-                'state': 'error',
-                'end_time': fields.Datetime.now(),
-            })
+            self._write_progress(dict(
+                imported,
+                state='error',
+                end_time=fields.Datetime.now(),
+                resume_run=False,
+            ))
             self._add_log_message(_('\n❌ Migration failed:\n%s\n') % str(e))
             raise
     
-    def _import_categories(self):
+    def _get_resume_log(self, migration_type):
+        """Log of this wizard's interrupted run for an entity, when retrying"""
+        if not self.resume_run or not self.start_time:
+            return None
+        return self.env['cs.cart.migration.log'].search([
+            ('wizard_id', '=', self.id),
+            ('migration_type', '=', migration_type),
+            ('start_date', '>=', self.start_time),
+            ('parent_id', '=', False),
+        ], order='id desc', limit=1) or None
+    
+    def _run_import_step(self, migration_type, import_method):
+        """Run one entity import and return the number of imported records
+        
+        On retry the entity continues from the checkpoint of its interrupted
+        log, and entities that already finished are not imported again.
+        """
+        resume_log = self._get_resume_log(migration_type)
+        if resume_log and resume_log.checkpoint_phase == 'done':
+            return resume_log.successful_records
+        
+        records = import_method(resume_log=resume_log)
+        if resume_log:
+            return resume_log.successful_records
+        # The order import returns a count, it does not keep every order id
+        return records if isinstance(records, int) else len(records)
+    
+    def _get_changed_since(self, migration_type):
+        """Delta sync watermark for an entity, None for a full import"""
+        if self.sync_mode != 'delta':
+            return None
+        return self.env['cs.cart.migration.base']._get_changed_since(self.connection_id, migration_type)
+    
+    def _start_import_shards(self, migration_type, sharded_method):
+        """Queue one background job per key range and return the parent log
+        
+        On retry only the unfinished shards of the interrupted run are queued.
+        """
+        resume_log = self._get_resume_log(migration_type)
+        if resume_log and resume_log.shard_ids:
+            resume_log._resume_shards()
+            return resume_log
+        return sharded_method()
+    
+    def _import_categories(self, resume_log=None):
         """Import categories from CS-Cart"""
         migration = self.env['cs.cart.category.migration']
         return migration.migrate_categories(
             connection=self.connection_id,
             lang_code=self.language_code,
             batch_size=self.batch_size,
-            update_existing=self.update_existing
+            update_existing=self.update_existing,
+            extraction_mode=self.extraction_mode,
+            resume_log=resume_log,
+            changed_since=self._get_changed_since('category'),
+            fast_import=self.fast_import,
+            translation_langs=self.translation_langs
         )
     
-    def _import_products(self):
+    def _import_products(self, resume_log=None):
         """Import products from CS-Cart"""
         migration = self.env['cs.cart.product.migration']
         return migration.migrate_products(
             connection=self.connection_id,
             lang_code=self.language_code,
             batch_size=self.batch_size,
-            update_existing=self.update_existing
+            update_existing=self.update_existing,
+            extraction_mode=self.extraction_mode,
+            resume_log=resume_log,
+            changed_since=self._get_changed_since('product'),
+            fast_import=self.fast_import,
+            translation_langs=self.translation_langs
+        )
+    
+    def _import_products_sharded(self):
+        """Queue the product import as parallel product_id range jobs"""
+        migration = self.env['cs.cart.product.migration']
+        return migration.migrate_products_sharded(
+            connection=self.connection_id,
+            shard_count=self.shard_count,
+            lang_code=self.language_code,
+            batch_size=self.batch_size,
+            update_existing=self.update_existing,
+            extraction_mode=self.extraction_mode,
+            changed_since=self._get_changed_since('product'),
+            fast_import=self.fast_import,
+            translation_langs=self.translation_langs
+        )
+    
+    def _import_images(self, resume_log=None):
+        """Import product images from the CS-Cart images directory"""
+        migration = self.env['cs.cart.image.migration']
+        return migration.migrate_images(
+            connection=self.connection_id,
+            batch_size=self.batch_size,
+            update_existing=self.update_existing,
+            extraction_mode=self.extraction_mode,
+            resume_log=resume_log,
+            fast_import=self.fast_import
+        )
+    
+    def _import_inventory(self, resume_log=None):
+        """Import product stock amounts into the inventory location"""
+        migration = self.env['cs.cart.inventory.migration']
+        return migration.migrate_inventory(
+            connection=self.connection_id,
+            location=self.inventory_location_id,
+            batch_size=self.batch_size,
+            update_existing=self.update_existing,
+            extraction_mode=self.extraction_mode,
+            resume_log=resume_log,
+            changed_since=self._get_changed_since('inventory'),
+            fast_import=self.fast_import
         )
     
-    def _import_customers(self):
+    def _import_customers(self, resume_log=None):
         """Import customers from CS-Cart"""
         migration = self.env['cs.cart.partner.migration']
         return migration.migrate_customers(
             connection=self.connection_id,
             batch_size=self.batch_size,
-            update_existing=self.update_existing
+            update_existing=self.update_existing,
+            extraction_mode=self.extraction_mode,
+            resume_log=resume_log,
+            changed_since=self._get_changed_since('customer'),
+            fast_import=self.fast_import
         )
     
-    def _import_suppliers(self):
+    def _import_customers_sharded(self):
+        """Queue the customer import as parallel user_id range jobs"""
+        migration = self.env['cs.cart.partner.migration']
+        return migration.migrate_customers_sharded(
+            connection=self.connection_id,
+            shard_count=self.shard_count,
+            batch_size=self.batch_size,
+            update_existing=self.update_existing,
+            extraction_mode=self.extraction_mode,
+            changed_since=self._get_changed_since('customer'),
+            fast_import=self.fast_import
+        )
+    
+    def _import_suppliers(self, resume_log=None):
         """Import suppliers from CS-Cart"""
         migration = self.env['cs.cart.partner.migration']
         return migration.migrate_suppliers(
             connection=self.connection_id,
             batch_size=self.batch_size,
-            update_existing=self.update_existing
+            update_existing=self.update_existing,
+            extraction_mode=self.extraction_mode,
+            resume_log=resume_log,
+            changed_since=self._get_changed_since('supplier'),
+            fast_import=self.fast_import
+        )
+    
+    def _import_orders(self, resume_log=None):
+        """Import the order history from CS-Cart, returns the number of orders"""
+        migration = self.env['cs.cart.order.migration']
+        return migration.migrate_orders(
+            connection=self.connection_id,
+            batch_size=self.batch_size,
+            update_existing=self.update_existing,
+            extraction_mode=self.extraction_mode,
+            resume_log=resume_log,
+            changed_since=self._get_changed_since('order'),
+            fast_import=self.fast_import
         )
     
     def _update_progress(self, current, total, operation):
         """Update progress and current operation"""
         progress = (current / total) * 100 if total > 0 else 0
-        self.write({
+        self._write_progress({
             'progress': progress,
             'current_operation': operation,
         })
-        self.env.cr.commit()  # Commit progress to database
+    
+    def _write_progress(self, vals):
+        """Write job progress on the wizard through a separate short-lived cursor
+        
+        The import transaction is only committed by the migrations at batch
+        boundaries; progress is visible right away without committing it.
+        """
+        with self.env.registry.cursor() as cr:
+            wizard = self.with_env(self.env(cr=cr))
+            wizard.write(vals)
+            # Only the changed counters are pushed to the progress widget
+            wizard.connection_id._send_progress_event(dict(
+                {key: vals[key] for key in vals if key in ('state', 'progress', 'current_operation')},
+                type='wizard',
+                wizard_id=wizard.id,
+            ))
     
     def _add_log_message(self, message):
         """Add message to log"""
-        if self.log_message:
-            self.log_message += message
-        else:
-            self.log_message = message
-        self.env.cr.commit()
+        with self.env.registry.cursor() as cr:
+            wizard = self.with_env(self.env(cr=cr))
+            wizard.log_message = (wizard.log_message or '') + message
+            wizard.connection_id._send_progress_event({
+                'type': 'log',
+                'wizard_id': wizard.id,
+                'message': message,
+            })
+    
+    def _get_entity_progress(self):
+        """Records done, total, throughput and ETA of each entity of this run
+        
+        Shards of the same entity are summed.
+        """
+        if not self.start_time:
+            return []
+        
+        types = dict(self.env['cs.cart.migration.log']._fields['migration_type'].selection)
+        entities = {}
+        for progress in self.env['cs.cart.migration.progress'].search([
+            ('log_id.wizard_id', '=', self.id),
+            ('log_id.start_date', '>=', self.start_time),
+        ], order='id'):
+            entity = entities.setdefault(progress.migration_type, {
+                'entity': progress.migration_type,
+                'name': types.get(progress.migration_type),
+                'processed_records': 0,
+                'total_records': 0,
+                'rows_per_second': 0.0,
+            })
+            entity['processed_records'] += progress.processed_records
+            entity['total_records'] += progress.total_records
+            entity['rows_per_second'] += progress.rows_per_second
+        
+        for entity in entities.values():
+            remaining = max(entity['total_records'] - entity['processed_records'], 0)
+            rate = entity['rows_per_second']
+            entity['eta_seconds'] = remaining / rate if rate else 0.0
+        return list(entities.values())
+    
+    @api.depends('state', 'progress')
+    def _compute_entity_progress(self):
+        for record in self:
+            record.entity_progress = '\n'.join(
+                _('%(name)s: %(done)d / %(total)d (%(rate).1f records/s, ETA %(eta)s)') % {
+                    'name': entity['name'],
+                    'done': entity['processed_records'],
+                    'total': entity['total_records'],
+                    'rate': entity['rows_per_second'],
+                    'eta': record._format_eta(entity['eta_seconds']),
+                }
+                for entity in record._get_entity_progress()
+            )
+    
+    def _format_eta(self, seconds):
+        """Short human readable duration"""
+        if seconds < 60:
+            return f"{seconds:.0f}s"
+        elif seconds < 3600:
+            return f"{seconds / 60:.0f}m"
+        return f"{seconds / 3600:.1f}h"
     
     def action_retry(self):
-        """Retry failed migration"""
+        """Resume failed migration from the last committed checkpoint"""
         self.write({
             'state': 'draft',
             'progress': 0,
-            'log_message': '',
-            'start_time': False,
             'end_time': False,
+            'resume_run': True,
         })
         return self.action_start_migration()
     
+    def action_benchmark_fast_import(self):
+        """Compare the per-record load cost of normal and fast imports on a product sample"""
+        self.ensure_one()
+        results = self.env['cs.cart.product.migration'].benchmark_fast_import(
+            self.connection_id, lang_code=self.language_code, sample_size=self.batch_size
+        )
+        normal, fast = results['normal'], results['fast']
+        message = _('Normal import: %.2f ms/record, fast import: %.2f ms/record (%.1fx) '
+                    'on %d products, rolled back') % (
+            normal, fast, normal / fast if fast else 0, results['sample_size'])
+        self._add_log_message(message + '\n')
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Fast Import Benchmark'),
+                'message': message,
+                'sticky': True,
+            },
+        }
+    
+    def action_dry_run(self):
+        """Estimate the volume and duration of the selected imports without importing anything
+        
+        Only counts, a small row sample and a sample of the source keys are
+        read from CS-Cart, so it can run against a production store at any time. Durations are projected
+        from the throughput of previous runs.
+        """
+        self.ensure_one()
+        entities = self._get_dry_run_entities()
+        if not entities:
+            raise UserError(_('Please select at least one data type to import'))
+        
+        migration = self.env['cs.cart.migration.base']
+        connection = self.connection_id
+        types = dict(self.env['cs.cart.migration.log']._fields['migration_type'].selection)
+        lines = []
+        total_seconds = 0.0
+        unknown = []
+        conn = connection.get_connection()
+        try:
+            for migration_type, query_type, distinct_key, model_name, domain, changed_since in entities:
+                query = migration._get_cs_cart_query(connection, query_type, conn)
+                params = (self.language_code,) if '%s' in query else None
+                query, params = migration._filter_changed_since(connection, query, params, query_type, changed_since)
+                volume = migration._estimate_source_volume(conn, query, distinct_key, params, self.batch_size)
+                existing, exact = migration._estimate_existing_records(
+                    conn, query, distinct_key, params, model_name, volume['records'], domain
+                ) if model_name and volume['records'] else (0, True)
+                rate = migration._get_recorded_throughput(connection, migration_type)
+                seconds = volume['records'] / rate if rate else 0.0
+                total_seconds += seconds
+                if volume['records'] and not rate:
+                    unknown.append(types[migration_type])
+                
+                lines.append(_('%(name)s: %(records)d records (%(rows)d rows, fan-out %(fan_out).1f, '
+                               '~%(size).1f KB/record), %(existing)s already in Odoo, %(eta)s') % {
+                    'name': types[migration_type],
+                    'records': volume['records'],
+                    'rows': volume['rows'],
+                    'fan_out': volume['fan_out'],
+                    'size': volume['record_bytes'] / 1024,
+                    'existing': existing if exact else _('~%d (estimated from a key sample)') % existing,
+                    'eta': _('~%s at %.1f records/s') % (self._format_eta(seconds), rate) if rate
+                        else _('no previous run to project from'),
+                })
+        finally:
+            conn.close()
+        
+        lines.append(_('Projected duration: ~%s') % self._format_eta(total_seconds))
+        if unknown:
+            lines.append(_('Not projected (no previous run): %s') % ', '.join(unknown))
+        if self.shard_count > 1:
+            lines.append(_('Sharded entities run in parallel and may finish sooner'))
+        self.dry_run_report = '\n'.join(lines)
+        
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('CS-Cart Migration'),
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+    
+    def _get_dry_run_entities(self):
+        """Selected entities as (migration type, query type, source record key, Odoo model,
+        domain of the imported records, delta sync watermark) in import order"""
+        entities = []
+        if self.import_categories:
+            entities.append(('category', 'categories', 'category_id', 'product.category', [],
+                             self._get_changed_since('category')))
+        if self.import_products:
+            entities.append(('product', 'products', 'product_id', 'product.template', [],
+                             self._get_changed_since('product')))
+        if self.import_images:
+            # Images are compared by checksum, never delta synced
+            entities.append(('image', 'images', 'product_id', 'product.template',
+                             [('cs_cart_image_checksum', '!=', False)], None))
+        if self.import_inventory:
+            entities.append(('inventory', 'inventory', 'product_id', None, [],
+                             self._get_changed_since('inventory')))
+        if self.import_customers:
+            entities.append(('customer', 'customers', 'user_id', 'res.partner', [('customer_rank', '>', 0)],
+                             self._get_changed_since('customer')))
+        if self.import_suppliers and self.cs_cart_version == 'mve':
+            entities.append(('supplier', 'suppliers', 'user_id', 'res.partner', [('supplier_rank', '>', 0)],
+                             self._get_changed_since('supplier')))
+        if self.import_orders:
+            entities.append(('order', 'orders', 'order_id', 'sale.order', [],
+                             self._get_changed_since('order')))
+        return entities
+    
     def action_cancel(self):
         """Cancel migration"""
         self.ensure_one()
@@ -2,6 +2,7 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 import logging
+from ..models import connection_pool
 
 _logger = logging.getLogger(__name__)
 
@@ -28,15 +29,10 @@ class TestConnectionWizard(models.TransientModel):
         self.ensure_one()
         
         try:
-            import mysql.connector
             from mysql.connector import Error
             
-            connection = mysql.connector.connect(
-                host=self.host,
-                port=self.port,
-                database=self.database,
-                user=self.username,
-                password=self.password,
+            connection = connection_pool.connect_once(
+                self.host, self.port, self.database, self.username, self.password,
                 connect_timeout=10
             )
             